@@ -5,12 +5,13 @@ Projekt: Einfaches CRM System - 5BHWI
 
 import os
 from flask import Flask, render_template
-from dotenv import load_dotenv
 from models import db
-import pytz
 
-# Lade Umgebungsvariablen
-load_dotenv()
+# Lade Umgebungsvariablen aus .env (python-dotenv nur importieren, wenn es eine gibt)
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+if os.path.exists(ENV_FILE):
+    from dotenv import load_dotenv
+    load_dotenv(ENV_FILE)
 
 def create_app():
     """Factory-Funktion zum Erstellen der Flask-App"""
@@ -22,7 +23,70 @@ def create_app():
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SQLALCHEMY_DATABASE_URI', 'sqlite:///crm.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['TIMEZONE'] = pytz.timezone(os.getenv('TIMEZONE', 'Europe/Vienna'))
+    # Optionale Lese-Replica für GET-Seiten und Dashboard (siehe crm_app/replica.py)
+    app.config['SQLALCHEMY_REPLICA_URI'] = os.getenv('SQLALCHEMY_REPLICA_URI', '')
+    # So lange liest ein Benutzer nach einem Schreibzugriff von der primären Datenbank
+    app.config['REPLICA_PIN_SECONDS'] = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+    # SQLite-Engine-Profil für parallele Zugriffe (siehe crm_app/database.py);
+    # SQLITE_JOURNAL_MODE leer = Journal-Modus der Datenbankdatei beibehalten
+    app.config['SQLITE_JOURNAL_MODE'] = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+    app.config['SQLITE_CACHE_SIZE_KB'] = int(os.getenv('SQLITE_CACHE_SIZE_KB', '65536'))
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    app.config['SQLALCHEMY_POOL_SIZE'] = int(os.getenv('SQLALCHEMY_POOL_SIZE', '5'))
+    app.config['SQLALCHEMY_MAX_OVERFLOW'] = int(os.getenv('SQLALCHEMY_MAX_OVERFLOW', '10'))
+    app.config['SQLALCHEMY_POOL_TIMEOUT'] = int(os.getenv('SQLALCHEMY_POOL_TIMEOUT', '30'))
+    # Wiederholungen eines Commits bei "database is locked" (Pause verdoppelt sich je Versuch)
+    app.config['DB_COMMIT_RETRIES'] = int(os.getenv('DB_COMMIT_RETRIES', '3'))
+    app.config['DB_COMMIT_RETRY_DELAY_MS'] = int(os.getenv('DB_COMMIT_RETRY_DELAY_MS', '50'))
+    # Name der Zeitzone; das tzinfo-Objekt liefert models.get_timezone(name)
+    app.config['TIMEZONE'] = os.getenv('TIMEZONE', 'Europe/Vienna')
+    # Ungeplantes Lazy Loading in Requests als Fehler melden (Standard: nur in der Entwicklung)
+    app.config['SQLALCHEMY_RAISELOAD'] = os.getenv(
+        'SQLALCHEMY_RAISELOAD', '1' if os.getenv('FLASK_ENV') == 'development' else '0') == '1'
+    # SQL-Profiler pro Request (Header Server-Timing/X-DB-Queries, N+1-Erkennung)
+    app.config['SQL_PROFILER'] = os.getenv(
+        'SQL_PROFILER', '1' if os.getenv('FLASK_ENV') == 'development' else '0') == '1'
+    app.config['SQL_PROFILER_SLOWEST'] = int(os.getenv('SQL_PROFILER_SLOWEST', '3'))
+    app.config['SQL_N_PLUS_ONE_THRESHOLD'] = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', '10'))
+    app.config['SQL_N_PLUS_ONE_RAISE'] = os.getenv('SQL_N_PLUS_ONE_RAISE', '0') == '1'
+    # Gültigkeit des Dashboard-Snapshots in Sekunden (0 = immer neu berechnen)
+    app.config['DASHBOARD_TTL'] = int(os.getenv('DASHBOARD_TTL', '60'))
+    # Stammdaten-Cache (Produkte, Benutzer): Höchstalter in Sekunden (0 = nur
+    # Invalidierung) und Vorladen beim Start
+    app.config['REFERENCE_CACHE_TTL'] = int(os.getenv('REFERENCE_CACHE_TTL', '300'))
+    app.config['REFERENCE_CACHE_PRELOAD'] = os.getenv('REFERENCE_CACHE_PRELOAD', '1') == '1'
+    # Gebündelte Assets aus static/dist/ verwenden, sofern gebaut (siehe crm_app/assets.py);
+    # 0 = immer die Einzeldateien und CDNs (z.B. beim Bearbeiten von style.css/main.js)
+    app.config['ASSETS_BUNDLED'] = os.getenv('ASSETS_BUNDLED', '1') == '1'
+    # Cache-Dauer der gehashten Dateien in Sekunden (Standard: ein Jahr)
+    app.config['ASSETS_MAX_AGE'] = int(os.getenv('ASSETS_MAX_AGE', str(365 * 24 * 3600)))
+    # Fragment-Cache für {% cache %}-Blöcke: maximale Anzahl Fragmente (LRU). In der
+    # Entwicklung aus, weil geänderte Templates sonst alte Fragmente zeigen könnten
+    app.config['FRAGMENT_CACHE_SIZE'] = int(os.getenv(
+        'FRAGMENT_CACHE_SIZE', '0' if os.getenv('FLASK_ENV') == 'development' else '5000'))
+    # Kompilierte Templates als Dateien ablegen (leer = aus) und optional alle
+    # Templates schon in create_app() laden (siehe crm_app/templating.py)
+    app.config['JINJA_BYTECODE_CACHE_DIR'] = os.getenv(
+        'JINJA_BYTECODE_CACHE_DIR', os.path.join(app.instance_path, 'jinja_cache'))
+    app.config['TEMPLATE_PRECOMPILE'] = os.getenv('TEMPLATE_PRECOMPILE', '0') == '1'
+    # Hintergrund-Jobs (siehe crm_app/jobs.py): Worker-Threads im Webprozess
+    # (0 = Jobs nur über python -m crm_app.worker), Abfrageintervall, Pause vor
+    # der ersten Wiederholung und Zeit ohne Lebenszeichen bis zum erneuten Einreihen.
+    # Die Jobs (Score-Neuberechnung mit NumPy, Importe, Kennzahlen) rechnen großteils
+    # in Python und halten dabei den GIL: solange ein Worker-Thread im Webprozess
+    # arbeitet, antworten die Requests dieses Prozesses langsamer. Die Voreinstellung 1
+    # braucht keinen zweiten Dienst; läuft python -m crm_app.worker, hier 0 setzen
+    app.config['JOBS_WORKER_THREADS'] = int(os.getenv('JOBS_WORKER_THREADS', '1'))
+    app.config['JOBS_POLL_INTERVAL'] = float(os.getenv('JOBS_POLL_INTERVAL', '2'))
+    app.config['JOBS_RETRY_DELAY'] = int(os.getenv('JOBS_RETRY_DELAY', '30'))
+    app.config['JOBS_STALE_SECONDS'] = int(os.getenv('JOBS_STALE_SECONDS', '300'))
+    # Gesamtanzahlen gefilterter Listen (siehe crm_app/counting.py): gecachte
+    # Anzahlen (LRU, 0 = immer exakt zählen) und wie viele Zeilen hinter der
+    # aktuellen Seite höchstens gezählt werden, bevor die Anzahl geschätzt wird
+    app.config['COUNT_CACHE_SIZE'] = int(os.getenv('COUNT_CACHE_SIZE', '1000'))
+    app.config['COUNT_LIMIT'] = int(os.getenv('COUNT_LIMIT', '50000'))
     
     # Jinja2-Filter für Zahlenformatierung (Deutsch/Österreich)
     @app.template_filter('currency')
@@ -86,44 +150,86 @@ def create_app():
             return f"{years}y"
     
     # Initialisiere Datenbank
+    from crm_app.database import engine_options, init_engine_profile
+    from crm_app.replica import REPLICA_BIND_KEY, init_read_replica
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config, app.config['SQLALCHEMY_DATABASE_URI'])
+    if app.config['SQLALCHEMY_REPLICA_URI']:
+        app.config['SQLALCHEMY_BINDS'] = {
+            REPLICA_BIND_KEY: dict(url=app.config['SQLALCHEMY_REPLICA_URI'],
+                                   **engine_options(app.config, app.config['SQLALCHEMY_REPLICA_URI'])),
+        }
     db.init_app(app)
+    init_engine_profile(app)
+    init_read_replica(app)
     
     # Registriere Blueprints
     from crm_app.views.customers import customers_bp
     from crm_app.views.orders import orders_bp
     from crm_app.views.contacts import contacts_bp
+    from crm_app.views.imports import imports_bp
+    from crm_app.views.api import api_bp
+    from crm_app.views.jobs import jobs_bp
     
     app.register_blueprint(customers_bp)
     app.register_blueprint(orders_bp)
     app.register_blueprint(contacts_bp)
+    app.register_blueprint(imports_bp)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(jobs_bp)
+    
+    # SQL-Profiler
+    from crm_app.profiling import init_sql_profiler
+    init_sql_profiler(app)
+    
+    # Dashboard-Snapshot
+    from crm_app.dashboard import init_dashboard, get_dashboard
+    init_dashboard(app)
+    
+    # Stammdaten-Cache für Produkte und Benutzer
+    from crm_app.reference import init_reference_data
+    init_reference_data(app)
+    
+    # Fragment-Cache für Templates ({% cache %}, siehe crm_app/fragments.py)
+    from crm_app.fragments import init_fragment_cache
+    init_fragment_cache(app)
+    
+    # Gesamtanzahlen für Listen mit Seitenzahlen
+    from crm_app.counting import init_counting
+    init_counting(app)
+    
+    # Hintergrund-Jobs (Worker-Threads starten mit dem ersten Request)
+    from crm_app.jobs import init_jobs
+    init_jobs(app)
+    
+    # Statische Assets (Manifest, Cache-Header, vorkomprimierte Dateien)
+    from crm_app.assets import init_assets
+    init_assets(app)
+    
+    # Jinja-Bytecode-Cache, optional alle Templates vorab laden (nach allen
+    # Erweiterungen und Filtern, siehe crm_app/templating.py)
+    from crm_app.templating import init_template_cache
+    init_template_cache(app)
+    
+    # Registriere CLI-Befehle
+    from crm_app.commands import register_commands
+    register_commands(app)
     
     # Hauptroute - Dashboard
     @app.route('/')
     def index():
         """Dashboard mit Übersicht aller Kunden, Bestellungen und Kontakte"""
-        from models import Customer, Order, Contact
-        
-        # Lade die letzten Einträge für das Dashboard
-        recent_customers = Customer.query.order_by(Customer.created_at.desc()).limit(10).all()
-        recent_orders = Order.query.order_by(Order.order_date.desc()).limit(10).all()
-        recent_contacts = Contact.query.order_by(Contact.contact_time.desc()).limit(10).all()
-        
-        # Statistiken
-        total_customers = Customer.query.count()
-        total_orders = Order.query.count()
-        total_contacts = Contact.query.count()
-        
-        # Gesamtumsatz
-        total_revenue = db.session.query(db.func.sum(Order.total_amount)).scalar() or 0
+        # Vorberechneter Snapshot (siehe crm_app/dashboard.py)
+        dashboard = get_dashboard()
         
         return render_template('index.html',
-                             recent_customers=recent_customers,
-                             recent_orders=recent_orders,
-                             recent_contacts=recent_contacts,
-                             total_customers=total_customers,
-                             total_orders=total_orders,
-                             total_contacts=total_contacts,
-                             total_revenue=total_revenue)
+                             recent_customers=dashboard['recent_customers'],
+                             recent_orders=dashboard['recent_orders'],
+                             recent_contacts=dashboard['recent_contacts'],
+                             total_customers=dashboard['total_customers'],
+                             total_orders=dashboard['total_orders'],
+                             total_contacts=dashboard['total_contacts'],
+                             total_revenue=dashboard['total_revenue'],
+                             dashboard_generation=dashboard['generation'])
     
     @app.errorhandler(404)
     def page_not_found(e):
@@ -0,0 +1,243 @@
+"""
+Routen-Benchmark mit produktionsnahen Datenmengen
+
+Baut (einmalig) Datenbanken mit 10k, 100k und 1M Kunden samt proportionalen
+Bestellungen, Positionen und Kontakten und misst alle Blueprint-Routen über
+den Flask-Testclient. Pro Route werden Latenz-Perzentile und die Anzahl
+der SQL-Statements (Header X-DB-Queries des SQL-Profilers) erfasst und als
+JSON gespeichert. Mit --compare werden zwei Läufe verglichen und
+Verschlechterungen gemeldet (Exit-Code 1).
+
+Beispiele:
+    python benchmarks/bench_routes.py --sizes 10000 --output benchmarks/results/base.json
+    python benchmarks/bench_routes.py --sizes 10000 --compare benchmarks/results/base.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PROJECT_DIR)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_DATA_DIR = os.path.join(BENCH_DIR, 'data')
+
+
+def database_path(data_dir, size):
+    return os.path.join(data_dir, f'crm_{size}.db')
+
+
+def ensure_database(path, size, seed, rebuild=False):
+    """Erstellt die Benchmark-Datenbank, falls sie noch nicht existiert"""
+    if os.path.exists(path) and not rebuild:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    
+    # In eine temporäre Datei schreiben, damit ein abgebrochener Lauf keine
+    # halb gefüllte Datenbank hinterlässt
+    build_path = path + '.building'
+    if os.path.exists(build_path):
+        os.remove(build_path)
+    
+    from flask import Flask
+    from models import db
+    from migrations.seed import seed_database
+    
+    # Eigene Minimal-App, damit die Konfiguration der Haupt-App unberührt bleibt
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{build_path}'
+    db.init_app(app)
+    
+    started = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql('PRAGMA synchronous=OFF')
+            connection.commit()
+            counts = seed_database(
+                connection, size, seed=seed,
+                progress=lambda c: print(f"\r  {c['customers']:>9,} / {size:,} Kunden", end='', flush=True)
+            )
+        db.engine.dispose()
+    os.replace(build_path, path)
+    print(f"\n  {counts} in {time.perf_counter() - started:.1f}s")
+
+
+def benchmark_routes(size):
+    """Liste (Name, URL) aller gemessenen Routen für eine Datenbankgröße"""
+    rng = random.Random(size)
+    customer_ids = [rng.randint(1, size) for _ in range(5)]
+    return [
+        ('index', ['/']),
+        ('list_customers sort=name', ['/customers/?sort=name']),
+        ('list_customers sort=last_contact', ['/customers/?sort=last_contact']),
+        ('list_customers deep page', ['/customers/?page=200']),
+        ('list_customers search', ['/customers/?q=anna', '/customers/?q=huber', '/customers/?q=664']),
+        ('list_customers search sort=name', ['/customers/?q=anna&sort=name']),
+        ('customer_detail', [f'/customers/{cid}' for cid in customer_ids]),
+        ('customer_detail date range', [f'/customers/{cid}?from=2024-01-01&to=2024-06-30' for cid in customer_ids]),
+        ('customer_revenue', [f'/customers/{cid}/revenue?from=2023-01-01&to=2025-12-31' for cid in customer_ids]),
+        ('customer_orders', [f'/customers/{cid}/orders' for cid in customer_ids]),
+        ('customer_contacts', [f'/customers/{cid}/contacts' for cid in customer_ids]),
+        ('list_orders', ['/orders/']),
+        ('list_orders search', ['/orders/?q=berger', '/orders/?q=12']),
+        ('list_contacts', ['/contacts/']),
+        ('list_contacts channel', ['/contacts/?channel=Telefon', '/contacts/?channel=Meeting']),
+    ]
+
+
+def percentile(sorted_values, fraction):
+    """Perzentil per linearer Interpolation (Werte müssen sortiert sein)"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def measure(client, urls, repeat, warmup):
+    """Ruft die URLs reihum auf und liefert Latenz- und Query-Statistik"""
+    for i in range(warmup):
+        client.get(urls[i % len(urls)])
+    
+    latencies = []
+    query_counts = []
+    statuses = set()
+    for i in range(repeat):
+        started = time.perf_counter()
+        response = client.get(urls[i % len(urls)])
+        latencies.append((time.perf_counter() - started) * 1000)
+        statuses.add(response.status_code)
+        query_counts.append(int(response.headers.get('X-DB-Queries', -1)))
+    
+    latencies.sort()
+    return {
+        'samples': repeat,
+        'status': sorted(statuses),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p90_ms': round(percentile(latencies, 0.90), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'max_ms': round(latencies[-1], 3),
+        'queries': max(query_counts),
+    }
+
+
+def run_size(path, size, repeat, warmup):
+    """Misst alle Routen gegen eine Datenbank"""
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    os.environ['SQL_PROFILER'] = '1'
+    os.environ['SQL_N_PLUS_ONE_RAISE'] = '0'
+    os.environ['SQLALCHEMY_RAISELOAD'] = '0'
+    
+    from app import create_app
+    app = create_app()
+    client = app.test_client()
+    
+    results = {}
+    for name, urls in benchmark_routes(size):
+        results[name] = measure(client, urls, repeat, warmup)
+        r = results[name]
+        print(f"  {name:<36} p50 {r['p50_ms']:>9.2f} ms  p95 {r['p95_ms']:>9.2f} ms  "
+              f"queries {r['queries']:>4}  status {r['status']}")
+    
+    from models import db
+    with app.app_context():
+        db.engine.dispose()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=PROJECT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    """
+    Vergleicht zwei Läufe und liefert eine Liste von Verschlechterungen.
+    
+    Gemeldet wird, wenn p50 um mehr als den Faktor threshold langsamer ist
+    oder eine Route mehr SQL-Statements ausführt als zuvor.
+    """
+    regressions = []
+    for size, routes in current['results'].items():
+        for name, result in routes.items():
+            before = baseline.get('results', {}).get(size, {}).get(name)
+            if not before:
+                continue
+            if before['p50_ms'] > 0 and result['p50_ms'] / before['p50_ms'] > threshold:
+                regressions.append(f"{size} {name}: p50 {before['p50_ms']} -> {result['p50_ms']} ms")
+            if result['queries'] > before['queries'] >= 0:
+                regressions.append(f"{size} {name}: queries {before['queries']} -> {result['queries']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Routen-Benchmark für das CRM System')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Anzahl Kunden pro Datenbank (Standard: 10000 100000 1000000)')
+    parser.add_argument('--repeat', type=int, default=30, help='Messungen pro Route')
+    parser.add_argument('--warmup', type=int, default=3, help='Aufwärm-Requests pro Route')
+    parser.add_argument('--seed', type=int, default=42, help='Zufalls-Seed für die Testdaten')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Ablage der Benchmark-Datenbanken')
+    parser.add_argument('--rebuild', action='store_true', help='Datenbanken neu erzeugen')
+    parser.add_argument('--output', help='Ergebnisse als JSON speichern')
+    parser.add_argument('--compare', help='Vergleich mit einem früheren JSON-Ergebnis')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Erlaubter Faktor für p50-Verschlechterung beim Vergleich')
+    args = parser.parse_args()
+    
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': {},
+    }
+    
+    for size in args.sizes:
+        path = database_path(args.data_dir, size)
+        print(f"\n=== {size:,} Kunden ({path}) ===")
+        ensure_database(path, size, args.seed, rebuild=args.rebuild)
+        report['results'][str(size)] = run_size(path, size, args.repeat, args.warmup)
+    
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nErgebnisse gespeichert: {args.output}")
+    
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print("\n❌ Verschlechterungen gegenüber", args.compare)
+            for line in regressions:
+                print("  -", line)
+            sys.exit(1)
+        print("\n✅ Keine Verschlechterungen gegenüber", args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Startzeit-Benchmark: Import, create_app() und erster Request je Route
+
+Jeder Lauf startet einen frischen Python-Prozess, wie ein neu gestarteter
+Worker, und misst darin:
+
+- den Import von app (alle Module und Erweiterungen)
+- create_app()
+- den ersten und den zweiten Request jeder Route aus bench_routes.py
+
+Die Läufe werden in drei Varianten wiederholt: mit leerem Jinja-Bytecode-Cache,
+mit gefülltem Cache und mit gefülltem Cache plus TEMPLATE_PRECOMPILE=1.
+Ausgegeben wird jeweils der Median über alle Läufe.
+
+Beispiele:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --size 10000 --runs 10 --output benchmarks/results/startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.bench_routes import (DEFAULT_DATA_DIR, benchmark_routes, database_path,
+                                     ensure_database, git_revision)
+
+# Variante -> (Beschreibung, Bytecode-Cache vorab füllen, TEMPLATE_PRECOMPILE)
+VARIANTS = {
+    'cold': ('leerer Bytecode-Cache', False, False),
+    'warm': ('gefüllter Bytecode-Cache', True, False),
+    'precompile': ('gefüllter Bytecode-Cache + TEMPLATE_PRECOMPILE=1', True, True),
+}
+
+
+def measure_child(size):
+    """Läuft im Kindprozess: misst Import, create_app() und die ersten Requests"""
+    started = time.perf_counter()
+    import app as app_module
+    imported = time.perf_counter()
+    app = app_module.create_app()
+    created = time.perf_counter()
+    
+    client = app.test_client()
+    routes = {}
+    for name, urls in benchmark_routes(size):
+        timings = []
+        for _ in range(2):
+            request_started = time.perf_counter()
+            response = client.get(urls[0])
+            timings.append((time.perf_counter() - request_started) * 1000)
+        routes[name] = {'first_ms': timings[0], 'second_ms': timings[1],
+                        'status': response.status_code}
+    
+    return {
+        'import_ms': (imported - started) * 1000,
+        'create_app_ms': (created - imported) * 1000,
+        'routes': routes,
+    }
+
+
+def run_child(path, size, cache_dir, precompile):
+    """Startet einen frischen Interpreter und liefert dessen Messwerte"""
+    env = dict(os.environ)
+    # Produktionsnah: kein Profiler, keine Entwicklungs-Defaults
+    env.pop('FLASK_ENV', None)
+    env.update(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{path}',
+        SQL_PROFILER='0',
+        SQLALCHEMY_RAISELOAD='0',
+        JINJA_BYTECODE_CACHE_DIR=cache_dir,
+        TEMPLATE_PRECOMPILE='1' if precompile else '0',
+    )
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), '--child', '--size', str(size)],
+        cwd=PROJECT_DIR, env=env, text=True,
+    )
+    # Die letzte Zeile ist das JSON-Ergebnis (davor evtl. Log-Ausgaben der App)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(runs):
+    """Median je Messwert über alle Läufe einer Variante"""
+    def median(values):
+        return round(statistics.median(values), 2)
+    
+    routes = {}
+    for name in runs[0]['routes']:
+        routes[name] = {
+            'first_ms': median([run['routes'][name]['first_ms'] for run in runs]),
+            'second_ms': median([run['routes'][name]['second_ms'] for run in runs]),
+            'status': sorted({run['routes'][name]['status'] for run in runs}),
+        }
+    return {
+        'runs': len(runs),
+        'import_ms': median([run['import_ms'] for run in runs]),
+        'create_app_ms': median([run['create_app_ms'] for run in runs]),
+        'routes': routes,
+    }
+
+
+def run_variant(path, size, runs, fill_cache, precompile):
+    cache_root = tempfile.mkdtemp(prefix='crm-jinja-')
+    try:
+        results = []
+        if fill_cache:
+            # Ein ungemessener Lauf füllt den Cache (wie precompile-templates beim Deployment)
+            run_child(path, size, cache_root, precompile=True)
+        for run in range(runs):
+            cache_dir = cache_root
+            if not fill_cache:
+                # Jeder Lauf mit eigenem, leerem Verzeichnis
+                cache_dir = os.path.join(cache_root, str(run))
+            results.append(run_child(path, size, cache_dir, precompile))
+        return summarize(results)
+    finally:
+        shutil.rmtree(cache_root, ignore_errors=True)
+
+
+def print_summary(label, summary):
+    print(f"\n=== {label} (Median aus {summary['runs']} Läufen) ===")
+    print(f"  {'Import app':<36} {summary['import_ms']:>9.2f} ms")
+    print(f"  {'create_app()':<36} {summary['create_app_ms']:>9.2f} ms")
+    print(f"  {'Route':<36} {'1. Request':>12} {'2. Request':>12}")
+    for name, route in summary['routes'].items():
+        print(f"  {name:<36} {route['first_ms']:>9.2f} ms {route['second_ms']:>9.2f} ms  "
+              f"status {route['status']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startzeit-Benchmark für das CRM System')
+    parser.add_argument('--size', type=int, default=10_000, help='Anzahl Kunden der Testdatenbank')
+    parser.add_argument('--runs', type=int, default=5, help='Frische Prozesse pro Variante')
+    parser.add_argument('--variants', nargs='+', choices=list(VARIANTS), default=list(VARIANTS),
+                        help='Zu messende Varianten')
+    parser.add_argument('--seed', type=int, default=42, help='Zufalls-Seed für die Testdaten')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Ablage der Benchmark-Datenbanken')
+    parser.add_argument('--output', help='Ergebnisse als JSON speichern')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        print(json.dumps(measure_child(args.size)))
+        return
+    
+    path = database_path(args.data_dir, args.size)
+    ensure_database(path, args.size, args.seed)
+    
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'size': args.size,
+            'runs': args.runs,
+        },
+        'results': {},
+    }
+    for variant in args.variants:
+        label, fill_cache, precompile = VARIANTS[variant]
+        summary = run_variant(path, args.size, args.runs, fill_cache, precompile)
+        report['results'][variant] = summary
+        print_summary(label, summary)
+    
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nErgebnisse gespeichert: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,466 @@
+"""
+Statische Assets: lokal, gebündelt, mit Hash im Dateinamen und vorkomprimiert
+
+Ohne Build lädt base.html Bootstrap, Bootstrap Icons und die Schrift Inter
+von CDNs. Für den Betrieb über langsame oder fehlende Internetverbindungen
+gibt es zwei CLI-Schritte:
+    
+    flask --app app assets fetch   # Fremdbibliotheken nach static/vendor/ laden
+    flask --app app assets build   # Bündel nach static/dist/ schreiben
+
+fetch benötigt Internetzugang und wird einmal pro Installation (bzw. bei
+einem Versionswechsel in VENDOR_FILES) ausgeführt. static/vendor/ ist nicht
+im Repository enthalten: ohne fetch und build bleibt es bei den CDN-Links,
+offline fehlen dann Layout und Icons. Wer auf dem Zielserver kein Internet
+hat, führt beide Schritte vorher aus und kopiert static/vendor/ und
+static/dist/ mit (oder checkt static/vendor/ im eigenen Repository ein). build fasst
+CSS und JavaScript zu je einem Bündel zusammen (BUNDLES), entfernt
+Kommentare und Leerraum, kopiert die per url() referenzierten Schriften mit
+und schreibt alle Dateien mit Inhalts-Hash im Namen (app.3f2a9c1b7d4e.css).
+Textdateien werden zusätzlich als .gz und, falls das Paket brotli installiert
+ist, als .br abgelegt. manifest.json ordnet den logischen Namen die
+gehashten Dateien zu.
+
+Zur Laufzeit löst url_for('static', filename='css/app.css') über das
+Manifest auf die gehashte Datei auf. Dateien unter static/dist/ ändern sich
+nie (neuer Inhalt = neuer Name) und werden mit einem Jahr Cache-Dauer und
+"immutable" ausgeliefert, vorkomprimiert je nach Accept-Encoding.
+
+Solange kein Bündel gebaut ist, bindet base.html die CDN-Dateien aus
+CDN_STYLESHEETS/CDN_SCRIPTS ein, mit Subresource Integrity (integrity +
+crossorigin="anonymous"), wo für die gepinnte Version ein Hash in
+VENDOR_INTEGRITY hinterlegt ist: Bootstrap CSS und JS. Für Bootstrap Icons
+und Inter ist kein geprüfter Hash hinterlegt, sie werden ungeprüft geladen;
+das CSS von Google Fonts unterscheidet sich je nach Browser und kann
+grundsätzlich nicht per SRI geprüft werden. fetch prüft heruntergeladene
+Dateien gegen dieselben Hashes, verify prüft die Dateien in static/vendor/
+(und zeigt die Hashes der ungeprüften Dateien an, um sie nachzutragen).
+"""
+
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+from collections import namedtuple
+from flask import current_app, request, send_from_directory
+
+VENDOR_DIR = 'vendor'
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Fremdbibliotheken: Ziel unter static/vendor/ -> Quelle (feste Versionen)
+VENDOR_FILES = {
+    'bootstrap/bootstrap.min.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'bootstrap/bootstrap.bundle.min.js':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    'bootstrap-icons/bootstrap-icons.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.0/font/bootstrap-icons.css',
+    'bootstrap-icons/fonts/bootstrap-icons.woff2':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.0/font/fonts/bootstrap-icons.woff2',
+    'bootstrap-icons/fonts/bootstrap-icons.woff':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.0/font/fonts/bootstrap-icons.woff',
+    **{
+        f'inter/inter-latin-{weight}-normal.woff2':
+            f'https://cdn.jsdelivr.net/npm/@fontsource/inter@5.0.16/files/inter-latin-{weight}-normal.woff2'
+        for weight in (400, 500, 600, 700)
+    },
+}
+
+# SRI-Hashes der gepinnten Versionen (offizielle Werte der Bootstrap-Dokumentation);
+# Dateien ohne Eintrag werden ungeprüft geladen
+VENDOR_INTEGRITY = {
+    'bootstrap/bootstrap.min.css':
+        'sha384-9ndCyUaIbzAi2FUVXJi0CjmCapSmO7SnpJef0486qhLnuZ2cdeRhO02iuK6FUUVM',
+    'bootstrap/bootstrap.bundle.min.js':
+        'sha384-geWF76RCwLtnZ8qwWowPQNguL3RmwHVBC9FhGdlKrxdiJJigb/j/68SIy3Te4Bkz',
+}
+
+CdnAsset = namedtuple('CdnAsset', 'url integrity')
+
+
+def _cdn_asset(target):
+    return CdnAsset(VENDOR_FILES[target], VENDOR_INTEGRITY.get(target))
+
+
+# Einbindung über CDNs, solange kein Bündel gebaut ist (base.html)
+CDN_STYLESHEETS = [
+    # Google Fonts liefert je nach Browser anderes CSS: kein SRI möglich
+    CdnAsset('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap', None),
+    _cdn_asset('bootstrap/bootstrap.min.css'),
+    _cdn_asset('bootstrap-icons/bootstrap-icons.css'),
+]
+CDN_SCRIPTS = [
+    _cdn_asset('bootstrap/bootstrap.bundle.min.js'),
+]
+
+# Bündel: logischer Name -> Quelldateien (relativ zu static/, in dieser Reihenfolge)
+BUNDLES = {
+    'css/app.css': [
+        'vendor/bootstrap/bootstrap.min.css',
+        'vendor/bootstrap-icons/bootstrap-icons.css',
+        'css/fonts.css',
+        'css/style.css',
+    ],
+    'js/app.js': [
+        'vendor/bootstrap/bootstrap.bundle.min.js',
+        'js/main.js',
+    ],
+}
+
+# Endungen, die vorkomprimiert werden (Schriften wie woff2 sind bereits komprimiert)
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt')
+
+# Dateiendungen der vorkomprimierten Varianten, in der Reihenfolge der Präferenz
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+# ---------------------------------------------------------------------------
+# fetch: Fremdbibliotheken herunterladen
+# ---------------------------------------------------------------------------
+
+def sri_hash(data):
+    """Subresource-Integrity-Wert (sha384-<Base64>) zu den Bytes einer Datei"""
+    return 'sha384-' + base64.b64encode(hashlib.sha384(data).digest()).decode('ascii')
+
+
+def fetch_vendor_files(static_folder, force=False, timeout=30):
+    """
+    Lädt fehlende Dateien aus VENDOR_FILES; liefert die Liste der geladenen Pfade.
+    
+    Weicht eine Datei von ihrem Hash in VENDOR_INTEGRITY ab, wird sie nicht
+    gespeichert und ValueError ausgelöst.
+    """
+    # Nur für den Build-Schritt, nicht beim Start jedes Workers importieren
+    import urllib.request
+    
+    fetched = []
+    for target, url in VENDOR_FILES.items():
+        path = os.path.join(static_folder, VENDOR_DIR, *target.split('/'))
+        if os.path.exists(path) and not force:
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            data = response.read()
+        expected = VENDOR_INTEGRITY.get(target)
+        if expected is not None and sri_hash(data) != expected:
+            raise ValueError(f'{target}: Prüfsumme stimmt nicht ({sri_hash(data)}, erwartet {expected})')
+        # Erst vollständig schreiben, dann umbenennen: kein halbes File bei Abbruch
+        with open(path + '.tmp', 'wb') as stream:
+            stream.write(data)
+        os.replace(path + '.tmp', path)
+        fetched.append(target)
+    return fetched
+
+
+def missing_vendor_files(static_folder):
+    return [target for target in VENDOR_FILES
+            if not os.path.exists(os.path.join(static_folder, VENDOR_DIR, *target.split('/')))]
+
+
+def verify_vendor_files(static_folder):
+    """
+    Prüft die Dateien unter static/vendor/ gegen VENDOR_INTEGRITY.
+    
+    Rückgabe: Liste (Pfad, Status, Hash) mit Status 'ok', 'abweichend',
+    'ungeprüft' (kein Hash hinterlegt) oder 'fehlt' (Hash dann None)
+    """
+    results = []
+    for target in VENDOR_FILES:
+        path = os.path.join(static_folder, VENDOR_DIR, *target.split('/'))
+        if not os.path.exists(path):
+            results.append((target, 'fehlt', None))
+            continue
+        with open(path, 'rb') as stream:
+            actual = sri_hash(stream.read())
+        expected = VENDOR_INTEGRITY.get(target)
+        if expected is None:
+            status = 'ungeprüft'
+        else:
+            status = 'ok' if actual == expected else 'abweichend'
+        results.append((target, status, actual))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Minifizierung
+# ---------------------------------------------------------------------------
+
+def _strip_comments(source, line_comments):
+    """
+    Entfernt /* */-Kommentare (und bei JavaScript //-Kommentare) außerhalb
+    von Zeichenketten.
+    
+    //-Kommentare werden nur am Zeilenanfang oder nach Leerraum erkannt, damit
+    reguläre Ausdrücke und URLs wie 'http://' unangetastet bleiben. Zeilen-
+    umbrüche bleiben erhalten (automatische Semikolons in JavaScript).
+    """
+    result = []
+    index, length = 0, len(source)
+    quote = None
+    while index < length:
+        char = source[index]
+        if quote:
+            result.append(char)
+            if char == '\\' and index + 1 < length:
+                result.append(source[index + 1])
+                index += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'`':
+            quote = char
+            result.append(char)
+        elif source.startswith('/*', index):
+            end = source.find('*/', index + 2)
+            index = length if end < 0 else end + 2
+            continue
+        elif (line_comments and source.startswith('//', index)
+              and (index == 0 or source[index - 1] in ' \t\n')):
+            end = source.find('\n', index)
+            index = length if end < 0 else end
+            continue
+        else:
+            result.append(char)
+        index += 1
+    return ''.join(result)
+
+
+def minify_css(source):
+    """Entfernt Kommentare und überflüssigen Leerraum aus CSS"""
+    source = _strip_comments(source, line_comments=False)
+    source = re.sub(r'\s+', ' ', source)
+    # Kein Leerraum vor ":" entfernen: "a :hover" und "a:hover" sind verschiedene Selektoren
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    """
+    Entfernt Kommentare, Einrückung und Leerzeilen aus JavaScript.
+    
+    Zeilenumbrüche bleiben stehen; in mehrzeiligen Template-Strings geht nur
+    die Einrückung verloren (in main.js ausschließlich HTML-Schnipsel).
+    """
+    source = _strip_comments(source, line_comments=True)
+    lines = (line.strip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def _minify(path, source):
+    if '.min.' in posixpath.basename(path):
+        # Bereits minifiziert; nur den Verweis auf die (nicht vorhandene) Source Map entfernen
+        return re.sub(r'/[*/]# sourceMappingURL=[^\n]*', '', source).strip()
+    if path.endswith('.css'):
+        return minify_css(source)
+    return minify_js(source)
+
+
+# ---------------------------------------------------------------------------
+# build: Bündel, Hashes, Manifest, Kompression
+# ---------------------------------------------------------------------------
+
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+_CSS_CHARSET = re.compile(r'@charset\s+"[^"]*";\s*', re.IGNORECASE)
+
+
+def _hashed_name(path, data):
+    """css/app.css -> css/app.<12 Zeichen sha256>.css"""
+    root, ext = posixpath.splitext(path)
+    return f'{root}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+class _Build:
+    """Ein Durchlauf von build_assets (schreibt nach static/dist/)"""
+    
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.dist_folder = os.path.join(static_folder, DIST_DIR)
+        # Quellpfad (relativ zu static/) -> gehashter Pfad (relativ zu static/)
+        self.files = {}
+    
+    def read(self, path):
+        with open(os.path.join(self.static_folder, *path.split('/')), 'rb') as stream:
+            return stream.read()
+    
+    def write(self, path, data):
+        """Schreibt data gehasht unter dist/ und liefert den Pfad relativ zu static/"""
+        hashed = posixpath.join(DIST_DIR, _hashed_name(path, data))
+        target = os.path.join(self.static_folder, *hashed.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as stream:
+            stream.write(data)
+        return hashed
+    
+    def copy(self, path):
+        """Kopiert eine per url() referenzierte Datei (einmal pro Build)"""
+        if path not in self.files:
+            self.files[path] = self.write(path, self.read(path))
+        return self.files[path]
+    
+    def rewrite_css_urls(self, source, source_path, bundle_path):
+        """Biegt relative url()-Verweise auf die gehashten Kopien unter dist/ um"""
+        bundle_dir = posixpath.dirname(posixpath.join(DIST_DIR, bundle_path))
+        
+        def replace(match):
+            url = match.group(2).strip()
+            if url.startswith(('data:', 'http:', 'https:', '//', '#', '/')):
+                return match.group(0)
+            path = posixpath.normpath(posixpath.join(posixpath.dirname(source_path),
+                                                     re.split(r'[?#]', url)[0]))
+            return f'url("{posixpath.relpath(self.copy(path), bundle_dir)}")'
+        
+        return _CSS_URL.sub(replace, source)
+    
+    def bundle(self, name, sources):
+        parts = []
+        for source_path in sources:
+            source = self.read(source_path).decode('utf-8-sig')
+            if name.endswith('.css'):
+                source = _CSS_CHARSET.sub('', source)
+                source = self.rewrite_css_urls(source, source_path, name)
+            parts.append(_minify(source_path, source))
+        if name.endswith('.css'):
+            # @charset darf nur am Anfang stehen, aus den Einzeldateien entfernt
+            parts.insert(0, '@charset "UTF-8";')
+            content = '\n'.join(parts)
+        else:
+            # Semikolon zwischen den Dateien: schützt vor Verschmelzen zweier Ausdrücke
+            content = '\n;\n'.join(parts)
+        self.files[name] = self.write(name, content.encode('utf-8'))
+
+
+def _brotli():
+    """brotli ist optional; ohne das Paket werden nur .gz-Varianten erzeugt"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def _precompress(static_folder, path):
+    """Schreibt .gz/.br neben die Datei, sofern sie damit kleiner wird"""
+    import gzip
+    
+    full_path = os.path.join(static_folder, *path.split('/'))
+    with open(full_path, 'rb') as stream:
+        data = stream.read()
+    
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    brotli = _brotli()
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    
+    encodings = []
+    for encoding, compressed in variants.items():
+        if len(compressed) < len(data) * 0.95:
+            with open(full_path + ENCODING_SUFFIXES[encoding], 'wb') as stream:
+                stream.write(compressed)
+            encodings.append(encoding)
+    return sorted(encodings, key=list(ENCODING_SUFFIXES).index)
+
+
+def build_assets(static_folder):
+    """
+    Baut alle BUNDLES nach static/dist/ und schreibt das Manifest.
+    
+    Vorhandene Dateien unter dist/ werden vorher gelöscht. Fehlen Dateien aus
+    static/vendor/, wird FileNotFoundError ausgelöst (zuerst assets fetch),
+    weichen sie von VENDOR_INTEGRITY ab, ValueError.
+    """
+    missing = missing_vendor_files(static_folder)
+    if missing:
+        raise FileNotFoundError(f'Fehlende Dateien in static/{VENDOR_DIR}/: {", ".join(missing)}')
+    changed = [target for target, status, _ in verify_vendor_files(static_folder) if status == 'abweichend']
+    if changed:
+        raise ValueError(f'Prüfsumme stimmt nicht: {", ".join(changed)}')
+    
+    build = _Build(static_folder)
+    shutil.rmtree(build.dist_folder, ignore_errors=True)
+    for name, sources in BUNDLES.items():
+        build.bundle(name, sources)
+    
+    encodings = {}
+    for hashed in build.files.values():
+        if hashed.endswith(COMPRESSIBLE):
+            available = _precompress(static_folder, hashed)
+            if available:
+                encodings[hashed] = available
+    
+    manifest = {
+        'files': {name: build.files[name] for name in BUNDLES},
+        'encodings': encodings,
+    }
+    with open(os.path.join(build.dist_folder, MANIFEST_NAME), 'w', encoding='utf-8') as stream:
+        json.dump(manifest, stream, indent=2, sort_keys=True)
+    return manifest
+
+
+# ---------------------------------------------------------------------------
+# Laufzeit: url_for über das Manifest, Auslieferung mit Cache-Headern
+# ---------------------------------------------------------------------------
+
+def load_manifest(static_folder):
+    """Manifest aus static/dist/ oder None, wenn noch nicht gebaut wurde"""
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as stream:
+            return json.load(stream)
+    except FileNotFoundError:
+        return None
+
+
+def _resolve_static_url(endpoint, values):
+    """url_defaults: static/css/app.css -> static/dist/css/app.<hash>.css"""
+    if endpoint != 'static':
+        return
+    manifest = current_app.extensions['assets']
+    if manifest is not None and values.get('filename') in manifest['files']:
+        values['filename'] = manifest['files'][values['filename']]
+
+
+def _serve_static(filename):
+    """Static-Route: Dateien unter dist/ unveränderlich cachen und vorkomprimiert liefern"""
+    app = current_app
+    manifest = app.extensions['assets']
+    if manifest is None or not filename.startswith(DIST_DIR + '/'):
+        return app.send_static_file(filename)
+    
+    available = manifest['encodings'].get(filename, [])
+    encoding = request.accept_encodings.best_match(available) if available else None
+    max_age = app.config['ASSETS_MAX_AGE']
+    if encoding:
+        response = send_from_directory(app.static_folder, filename + ENCODING_SUFFIXES[encoding],
+                                       mimetype=mimetypes.guess_type(filename)[0], max_age=max_age)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(app.static_folder, filename, max_age=max_age)
+    if available:
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_assets(app):
+    """Lädt das Manifest (falls ASSETS_BUNDLED und gebaut) und registriert die Auflösung"""
+    manifest = load_manifest(app.static_folder) if app.config['ASSETS_BUNDLED'] else None
+    if app.config['ASSETS_BUNDLED'] and manifest is None:
+        app.logger.info('Keine gebauten Assets gefunden (flask --app app assets build), '
+                        'CSS/JS werden von CDNs geladen')
+    app.extensions['assets'] = manifest
+    app.url_defaults(_resolve_static_url)
+    app.view_functions['static'] = _serve_static
+    
+    @app.context_processor
+    def inject_assets():
+        return {
+            'assets_bundled': manifest is not None,
+            'cdn_stylesheets': CDN_STYLESHEETS,
+            'cdn_scripts': CDN_SCRIPTS,
+        }
@@ -0,0 +1,109 @@
+"""
+CLI-Befehle für Wartungsaufgaben (flask --app app <befehl>)
+"""
+
+import time
+import click
+from models import (db, create_row_counters, rebuild_customer_stats, rebuild_customer_scores,
+                    rebuild_monthly_revenue)
+from crm_app.imports import import_csv, IMPORT_KINDS, DEFAULT_CHUNK_SIZE
+from crm_app.dashboard import invalidate_dashboard
+from crm_app.assets import fetch_vendor_files, build_assets, verify_vendor_files
+from crm_app.templating import precompile_templates
+
+
+def register_commands(app):
+    """Registriert alle Wartungsbefehle an der Flask-App"""
+    
+    @app.cli.command('repair-stats')
+    def repair_stats_command():
+        """Berechnet die gespeicherten Kunden-Kennzahlen, Monatsumsätze, Scores und Zeilenzähler komplett neu"""
+        updated = rebuild_customer_stats()
+        months = rebuild_monthly_revenue()
+        scores = rebuild_customer_scores()
+        counters = create_row_counters(db.session.connection(), rebuild=True)
+        db.session.commit()
+        click.echo(f"✓ Kennzahlen für {updated} Kunden neu berechnet")
+        click.echo(f"✓ {months} Monatsumsätze neu berechnet")
+        click.echo(f"✓ {scores} Kunden-Scores geändert")
+        if counters:
+            click.echo("✓ Zeilenzähler neu gezählt")
+    
+    @app.cli.command('recompute-scores')
+    def recompute_scores_command():
+        """Berechnet den gespeicherten Score aller Kunden neu (läuft sonst täglich als Job)"""
+        started = time.perf_counter()
+        changed = rebuild_customer_scores()
+        db.session.commit()
+        click.echo(f"✓ {changed} Kunden-Scores geändert ({time.perf_counter() - started:.1f}s)")
+    
+    @app.cli.command('import-csv')
+    @click.argument('kind', type=click.Choice(IMPORT_KINDS))
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True,
+                  help='Zeilen pro Transaktion')
+    def import_csv_command(kind, path, chunk_size):
+        """Importiert Kunden, Bestellungen oder Kontakte aus einer CSV-Datei"""
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            result = import_csv(kind, stream, chunk_size=chunk_size)
+        if result.inserted:
+            invalidate_dashboard()
+        
+        for line, message in result.errors:
+            click.echo(f"  Zeile {line}: {message}", err=True)
+        if result.errors_truncated:
+            click.echo(f"  ... weitere {result.error_count - len(result.errors)} Fehler", err=True)
+        click.echo(f"✓ {result.inserted} von {result.processed} Zeilen importiert, "
+                   f"{result.error_count} fehlerhaft")
+    
+    @app.cli.group('assets')
+    def assets_group():
+        """Statische Assets lokal ablegen und bündeln"""
+    
+    @assets_group.command('fetch')
+    @click.option('--force', is_flag=True, help='Vorhandene Dateien erneut laden')
+    def assets_fetch_command(force):
+        """Lädt Bootstrap, Bootstrap Icons und Inter nach static/vendor/"""
+        try:
+            fetched = fetch_vendor_files(app.static_folder, force=force)
+        except OSError as error:
+            raise click.ClickException(f"Download fehlgeschlagen: {error}")
+        except ValueError as error:
+            raise click.ClickException(f"Download verworfen: {error}")
+        for target in fetched:
+            click.echo(f"  {target}")
+        click.echo(f"✓ {len(fetched)} Dateien geladen")
+    
+    @assets_group.command('build')
+    def assets_build_command():
+        """Bündelt CSS/JS nach static/dist/ (Hash im Dateinamen, .gz/.br, Manifest)"""
+        try:
+            manifest = build_assets(app.static_folder)
+        except FileNotFoundError as error:
+            raise click.ClickException(f"{error} (zuerst: flask --app app assets fetch)")
+        except ValueError as error:
+            raise click.ClickException(f"{error} (flask --app app assets fetch --force)")
+        for name, hashed in manifest['files'].items():
+            encodings = ', '.join(manifest['encodings'].get(hashed, [])) or 'unkomprimiert'
+            click.echo(f"  {name} -> {hashed} ({encodings})")
+        click.echo("✓ Assets gebaut; laufende Instanzen neu starten, damit sie das Manifest laden")
+    
+    @assets_group.command('verify')
+    def assets_verify_command():
+        """Prüft static/vendor/ gegen die hinterlegten SRI-Hashes"""
+        results = verify_vendor_files(app.static_folder)
+        for target, status, actual in results:
+            click.echo(f"  {status:10} {target}" + (f" ({actual})" if status == 'ungeprüft' else ''))
+        failed = [target for target, status, _ in results if status in ('abweichend', 'fehlt')]
+        if failed:
+            raise click.ClickException(f"{len(failed)} Dateien fehlen oder weichen ab")
+        click.echo("✓ Alle Dateien mit hinterlegtem Hash stimmen")
+    
+    @app.cli.command('precompile-templates')
+    def precompile_templates_command():
+        """Kompiliert alle Templates in den Jinja-Bytecode-Cache (JINJA_BYTECODE_CACHE_DIR)"""
+        if not app.config['JINJA_BYTECODE_CACHE_DIR']:
+            raise click.ClickException("JINJA_BYTECODE_CACHE_DIR ist leer, der Bytecode-Cache ist aus")
+        compiled, elapsed = precompile_templates(app)
+        click.echo(f"✓ {compiled} Templates in {elapsed * 1000:.0f} ms kompiliert "
+                   f"({app.config['JINJA_BYTECODE_CACHE_DIR']})")
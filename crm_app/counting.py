@@ -0,0 +1,113 @@
+"""
+Gesamtanzahlen für Listen mit Seitenzahlen
+
+Flask-SQLAlchemys paginate() führt zu jeder Seite ein SELECT count(*) über die
+komplette gefilterte Query aus, das oft so viel kostet wie die Seite selbst.
+counted_paginate() ermittelt die Anzahl stattdessen so billig wie möglich:
+
+1. Letzte Seite erreicht (weniger als per_page Einträge): Offset + Einträge.
+2. Ohne Filter: Zeilenzähler aus row_counts (per Trigger gepflegt, siehe
+   models.create_row_counters).
+3. Mit Filter: Anzahl pro (Tabelle, Filter, Datenversion) im Speicher gecacht.
+   Die Datenversion steigt bei jeder Änderung, die die Trefferzahl verändern
+   kann; ein Treffer im Cache ist daher exakt. Bei einem Fehlschlag wird nur
+   bis COUNT_LIMIT Zeilen hinter der aktuellen Seite gezählt; liegen mehr
+   Treffer vor, ist die Anzahl eine Untergrenze (total_is_estimate,
+   "Seite X von ~Y").
+"""
+
+import threading
+from collections import OrderedDict
+from flask import current_app
+from flask_sqlalchemy.pagination import QueryPagination
+from models import db, table_row_count
+
+
+class CountCache:
+    """Threadsicherer LRU-Speicher für gefilterte Anzahlen"""
+    
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+def count_limited(query, limit):
+    """Zählt die Zeilen der Query, höchstens aber limit + 1"""
+    limited = query.order_by(None).with_entities(db.literal_column('1')).limit(limit + 1).subquery()
+    return query.session.execute(db.select(db.func.count()).select_from(limited)).scalar()
+
+
+class CountedPagination(QueryPagination):
+    """QueryPagination mit Zählstrategie statt count(*) (siehe Modul-Docstring)"""
+    
+    total_is_estimate = False
+    
+    def _query_count(self):
+        offset = self._query_offset
+        if self.items and len(self.items) < self.per_page or not self.items and self.page == 1:
+            return offset + len(self.items)
+        
+        table_name = self._query_args['table_name']
+        filter_key = self._query_args['filter_key']
+        total, version = table_row_count(table_name)
+        if not filter_key:
+            return total
+        
+        query = self._query_args['query']
+        cache = current_app.extensions.get('count_cache')
+        if version is None or cache is None:
+            return query.order_by(None).count()
+        
+        # Ab der aktuellen Seite höchstens COUNT_LIMIT Zeilen weiter zählen
+        limit = offset + current_app.config['COUNT_LIMIT']
+        key = (table_name, filter_key, version)
+        cached = cache.get(key)
+        if cached is None or not cached[1] and cached[0] <= limit:
+            count = count_limited(query, limit)
+            cached = (count, count <= limit)
+            cache.set(key, cached)
+        
+        count, exact = cached
+        self.total_is_estimate = not exact
+        return count
+
+
+def counted_paginate(query, table_name, filter_key=None, page=1, per_page=25):
+    """
+    Blättert eine Query mit OFFSET/LIMIT und billiger Gesamtanzahl.
+    
+    table_name ist die Haupttabelle der Query (Schlüssel in
+    models.COUNTED_TABLES). filter_key beschreibt alle Filter der Query
+    (hashbar, z.B. ein Tupel aus Suchbegriff und Rating); None bzw. leer
+    heißt ungefiltert. Die Sortierung gehört nicht in den Schlüssel.
+    """
+    return CountedPagination(query=query, table_name=table_name, filter_key=filter_key,
+                             page=page, per_page=per_page, error_out=False)
+
+
+def init_counting(app):
+    """Registriert den Cache für gefilterte Anzahlen; COUNT_CACHE_SIZE = 0 zählt immer"""
+    size = app.config['COUNT_CACHE_SIZE']
+    app.extensions['count_cache'] = CountCache(size) if size > 0 else None
@@ -0,0 +1,166 @@
+"""
+Dashboard-Snapshot mit Stale-While-Revalidate
+
+Die Kennzahlen und "Neueste"-Listen des Dashboards werden einmal berechnet
+und danach aus dem Speicher ausgeliefert. Ist der Snapshot älter als
+DASHBOARD_TTL Sekunden (oder wurde er per invalidate_dashboard() verworfen),
+wird er im Hintergrund neu berechnet, während weiterhin der alte Stand
+ausgeliefert wird. Nur der allererste Aufruf rechnet synchron.
+
+Der Snapshot enthält ausschließlich einfache Werte (dicts), keine ORM-Objekte,
+damit er unabhängig von Session und Thread verwendet werden kann.
+"""
+
+import threading
+import time
+from flask import current_app
+from models import db, Customer, Order, Contact, table_row_count
+from crm_app.replica import use_read_replica
+
+RECENT_LIMIT = 10
+
+
+def compute_dashboard_data():
+    """Berechnet alle Werte des Dashboards (benötigt einen App-Kontext)"""
+    recent_customers = [
+        {
+            'id': customer_id,
+            'full_name': f"{last_name}, {first_name}",
+            'email': email,
+            'last_contact_date': last_contact_at,
+        }
+        for customer_id, first_name, last_name, email, last_contact_at in db.session.query(
+            Customer.id, Customer.first_name, Customer.last_name,
+            Customer.email, Customer.last_contact_at
+        ).order_by(Customer.created_at.desc()).limit(RECENT_LIMIT)
+    ]
+    
+    recent_orders = [
+        {
+            'id': order_id,
+            'total_amount': total_amount,
+            'customer': {'full_name': f"{last_name}, {first_name}"},
+        }
+        for order_id, total_amount, first_name, last_name in db.session.query(
+            Order.id, Order.total_amount, Customer.first_name, Customer.last_name
+        ).join(Customer, Order.customer_id == Customer.id)
+         .order_by(Order.order_date.desc()).limit(RECENT_LIMIT)
+    ]
+    
+    recent_contacts = [
+        {
+            'id': contact_id,
+            'contact_time': contact_time,
+            'channel': channel,
+            'subject': subject,
+            'customer': {'full_name': f"{last_name}, {first_name}"},
+        }
+        for contact_id, contact_time, channel, subject, first_name, last_name in db.session.query(
+            Contact.id, Contact.contact_time, Contact.channel, Contact.subject,
+            Customer.first_name, Customer.last_name
+        ).join(Customer, Contact.customer_id == Customer.id)
+         .order_by(Contact.contact_time.desc()).limit(RECENT_LIMIT)
+    ]
+    
+    return {
+        'recent_customers': recent_customers,
+        'recent_orders': recent_orders,
+        'recent_contacts': recent_contacts,
+        # Per Trigger gepflegte Zeilenzähler statt count(*) (models.create_row_counters)
+        'total_customers': table_row_count('customers')[0],
+        'total_orders': table_row_count('orders')[0],
+        'total_contacts': table_row_count('contacts')[0],
+        # Summe der gespeicherten Kundenumsätze: eine Zeile pro Kunde statt pro Bestellung
+        'total_revenue': db.session.query(db.func.sum(Customer.total_revenue)).scalar() or 0,
+    }
+
+
+class DashboardSnapshot:
+    """Im Speicher gehaltener Dashboard-Stand mit Hintergrund-Aktualisierung"""
+    
+    def __init__(self, app, ttl):
+        self.app = app
+        self.ttl = ttl
+        self.data = None
+        self.computed_at = 0.0
+        self.generation = 0
+        self._invalidations = 0
+        self._stale = False
+        self._refreshing = False
+        self._lock = threading.Lock()
+    
+    def get(self):
+        """Liefert den aktuellen Snapshot (berechnet ihn beim ersten Aufruf synchron)"""
+        if self.data is None or self.ttl <= 0:
+            invalidations = self._invalidations
+            self._store(compute_dashboard_data(), invalidations)
+        elif self.is_stale():
+            self.refresh_in_background()
+        return self.data
+    
+    def is_stale(self):
+        """True, wenn der Snapshot abgelaufen oder explizit verworfen ist"""
+        return self._stale or time.monotonic() - self.computed_at >= self.ttl
+    
+    def invalidate(self):
+        """Markiert den Snapshot als veraltet und stößt die Neuberechnung an"""
+        with self._lock:
+            self._stale = True
+            self._invalidations += 1
+        if self.data is not None:
+            self.refresh_in_background()
+    
+    def refresh_in_background(self):
+        """Startet eine Neuberechnung in einem Hintergrund-Thread (höchstens eine gleichzeitig)"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        
+        thread = threading.Thread(target=self._refresh, name='dashboard-refresh', daemon=True)
+        thread.start()
+    
+    def _refresh(self):
+        try:
+            invalidations = self._invalidations
+            with self.app.app_context():
+                use_read_replica()
+                self._store(compute_dashboard_data(), invalidations)
+        except Exception:
+            self.app.logger.exception('Dashboard-Snapshot konnte nicht aktualisiert werden')
+        finally:
+            with self._lock:
+                self._refreshing = False
+    
+    def _store(self, data, invalidations):
+        with self._lock:
+            # Eine während der Berechnung eingetroffene Invalidierung bleibt bestehen
+            self._stale = self._invalidations != invalidations
+            self.generation += 1
+            # Die Generation identifiziert den Stand, z.B. im Fragment-Cache des Dashboards
+            self.data = dict(data, generation=self.generation)
+            self.computed_at = time.monotonic()
+
+
+def init_dashboard(app):
+    """Registriert den Dashboard-Snapshot an der App"""
+    app.extensions['dashboard_snapshot'] = DashboardSnapshot(app, app.config['DASHBOARD_TTL'])
+
+
+def get_dashboard():
+    """Dashboard-Daten der aktuellen App"""
+    return current_app.extensions['dashboard_snapshot'].get()
+
+
+def invalidate_dashboard():
+    """
+    Verwirft den Dashboard-Snapshot nach Schreibzugriffen.
+    
+    Der Snapshot liegt im Speicher des aktuellen Prozesses; nur dieser wird
+    benachrichtigt. Andere Web-Prozesse und Schreibzugriffe des eigenständigen
+    Workers (python -m crm_app.worker) werden dort erst nach DASHBOARD_TTL
+    sichtbar.
+    """
+    snapshot = current_app.extensions.get('dashboard_snapshot')
+    if snapshot is not None:
+        snapshot.invalidate()
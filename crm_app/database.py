@@ -0,0 +1,152 @@
+"""
+Engine-Profil für SQLite im Mehrbenutzerbetrieb
+
+Standardmäßig öffnet SQLite die Datenbank im Rollback-Journal-Modus: ein
+Schreibvorgang sperrt alle Leser, und ein zweiter Schreiber bekommt sofort
+"database is locked". Das Profil setzt deshalb auf jeder neuen Verbindung:
+
+- journal_mode=WAL      Leser blockieren Schreiber nicht mehr und umgekehrt
+- synchronous=NORMAL    im WAL-Modus sicher, spart ein fsync pro Commit
+- mmap_size/cache_size  mehr Seiten im Speicher statt per read()
+- busy_timeout          wartet auf die Schreibsperre statt sofort abzubrechen
+
+Zusätzlich werden Poolgröße und Wartezeit des Connection-Pools gesetzt.
+Alle Werte kommen aus der App-Konfiguration (Umgebungsvariablen SQLITE_*
+und SQLALCHEMY_POOL_*, siehe .env.example).
+
+Bleibt eine Sperre trotz busy_timeout bestehen (z.B. wenn eine Transaktion
+nach dem Lesen schreiben will und ein anderer Schreiber zuvorgekommen ist),
+wiederholt commit_with_retry() den Commit einige Male mit wachsender Pause.
+"""
+
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from models import db
+from crm_app.replica import REPLICA_BIND_KEY
+
+JOURNAL_MODES = {'WAL', 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'OFF'}
+SYNCHRONOUS_MODES = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+
+# Wertebereich von SQLite-INTEGER (64 Bit); größere Python-ints scheitern erst
+# beim Binden mit OverflowError und müssen vorher abgewiesen werden
+SQLITE_MAX_INTEGER = 2 ** 63 - 1
+
+
+def _is_sqlite_memory(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(config, uri):
+    """
+    Engine-Optionen (Pool, Treiber-Timeout) für die Datenbank-URI uri.
+    
+    Für In-Memory-SQLite (ein Pool pro Thread) werden keine Pool-Optionen
+    gesetzt.
+    """
+    url = make_url(uri)
+    options = {}
+    
+    if not _is_sqlite_memory(url):
+        options.update(
+            pool_size=config['SQLALCHEMY_POOL_SIZE'],
+            max_overflow=config['SQLALCHEMY_MAX_OVERFLOW'],
+            pool_timeout=config['SQLALCHEMY_POOL_TIMEOUT'],
+        )
+    if url.get_backend_name() == 'sqlite':
+        # Wartezeit des sqlite3-Treibers selbst (Sekunden), passend zu busy_timeout;
+        # Verbindungen wandern über den Pool zwischen Threads
+        options['connect_args'] = {
+            'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000,
+            'check_same_thread': False,
+        }
+    return options
+
+
+def sqlite_pragmas(config):
+    """PRAGMA-Anweisungen, die auf jeder neuen SQLite-Verbindung ausgeführt werden"""
+    journal_mode = config['SQLITE_JOURNAL_MODE'].upper()
+    synchronous = config['SQLITE_SYNCHRONOUS'].upper()
+    if journal_mode and journal_mode not in JOURNAL_MODES:
+        raise ValueError(f'Ungültiger SQLITE_JOURNAL_MODE: {journal_mode}')
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f'Ungültiger SQLITE_SYNCHRONOUS: {synchronous}')
+    
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA synchronous = {synchronous}",
+        f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}",
+        # Negativer Wert = Größe in KiB statt in Seiten
+        f"PRAGMA cache_size = -{int(config['SQLITE_CACHE_SIZE_KB'])}",
+    ]
+    if journal_mode:
+        pragmas.insert(0, f"PRAGMA journal_mode = {journal_mode}")
+    return pragmas
+
+
+def init_engine_profile(app):
+    """Registriert die SQLite-PRAGMAs an allen Engines der App (nach db.init_app)"""
+    with app.app_context():
+        engines = dict(db.engines)
+    
+    for bind_key, engine in engines.items():
+        if engine.dialect.name != 'sqlite':
+            continue
+        pragmas = sqlite_pragmas(app.config)
+        if _is_sqlite_memory(engine.url) or bind_key == REPLICA_BIND_KEY:
+            # In-Memory-Datenbanken kennen kein WAL; den Journal-Modus der
+            # Replica bestimmt die primäre Datenbank bzw. die Replikation
+            pragmas = [pragma for pragma in pragmas if 'journal_mode' not in pragma]
+        if bind_key == REPLICA_BIND_KEY:
+            pragmas.append("PRAGMA query_only = ON")
+        event.listen(engine, 'connect', _pragma_listener(pragmas))
+
+
+def _pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+    return set_pragmas
+
+
+def is_lock_error(error):
+    """True, wenn ein OperationalError auf eine gesperrte Datenbank zurückgeht"""
+    message = str(getattr(error, 'orig', error)).lower()
+    return 'database is locked' in message or 'database table is locked' in message \
+        or 'database is busy' in message
+
+
+def commit_with_retry(apply_changes, retries=None, delay=None):
+    """
+    Führt apply_changes() aus und committet; bei Sperrkonflikten wird beides wiederholt.
+    
+    apply_changes muss die Änderungen an der Session vornehmen (add, Attribute
+    setzen), denn nach einem Rollback sind neue Objekte nicht mehr in der
+    Session und Änderungen an bestehenden verworfen. Andere Fehler und der
+    letzte Fehlversuch werden unverändert weitergereicht.
+    """
+    if retries is None:
+        retries = current_app.config['DB_COMMIT_RETRIES']
+    if delay is None:
+        delay = current_app.config['DB_COMMIT_RETRY_DELAY_MS'] / 1000
+    
+    attempt = 0
+    while True:
+        apply_changes()
+        try:
+            db.session.commit()
+            return
+        except OperationalError as error:
+            db.session.rollback()
+            if attempt >= retries or not is_lock_error(error):
+                raise
+            current_app.logger.warning('Datenbank gesperrt, Commit wird wiederholt (Versuch %d von %d)',
+                                       attempt + 1, retries)
+            time.sleep(delay * 2 ** attempt)
+            attempt += 1
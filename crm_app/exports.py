@@ -0,0 +1,137 @@
+"""
+Streaming-Export von Bestellungen und Kontakten (CSV / NDJSON)
+
+Die Zeilen werden mit yield_per blockweise aus der Datenbank gelesen und
+direkt als Antwort-Chunks ausgeliefert. Es werden nur die exportierten
+Spalten abgefragt (keine ORM-Objekte), der Speicherbedarf ist daher
+unabhängig von der Anzahl der Zeilen.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from flask import Response, abort, stream_with_context
+from sqlalchemy import select
+from models import db, Order, Customer, Contact, User
+
+# Format -> MIME-Typ
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+# Zeilen pro Datenbank-Block bzw. Antwort-Chunk
+YIELD_PER = 1000
+
+ORDER_EXPORT_COLUMNS = [
+    ('id', Order.id),
+    ('order_date', Order.order_date),
+    ('status', Order.status),
+    ('total_amount', Order.total_amount),
+    ('item_count', Order.item_count),
+    ('customer_id', Customer.id),
+    ('customer_first_name', Customer.first_name),
+    ('customer_last_name', Customer.last_name),
+    ('customer_email', Customer.email),
+]
+
+CONTACT_EXPORT_COLUMNS = [
+    ('id', Contact.id),
+    ('contact_time', Contact.contact_time),
+    ('channel', Contact.channel),
+    ('subject', Contact.subject),
+    ('notes', Contact.notes),
+    ('customer_id', Customer.id),
+    ('customer_first_name', Customer.first_name),
+    ('customer_last_name', Customer.last_name),
+    ('customer_email', Customer.email),
+    ('user_name', User.name),
+    ('user_email', User.email),
+]
+
+
+def order_export_query():
+    """SELECT der Bestell-Exportspalten (chronologisch, neueste zuerst)"""
+    return select(*[column.label(name) for name, column in ORDER_EXPORT_COLUMNS]) \
+        .select_from(Order).join(Customer, Order.customer_id == Customer.id) \
+        .order_by(Order.order_date.desc(), Order.id.desc())
+
+
+def contact_export_query():
+    """SELECT der Kontakt-Exportspalten (chronologisch, neueste zuerst)"""
+    return select(*[column.label(name) for name, column in CONTACT_EXPORT_COLUMNS]) \
+        .select_from(Contact).join(Customer, Contact.customer_id == Customer.id) \
+        .outerjoin(User, Contact.user_id == User.id) \
+        .order_by(Contact.contact_time.desc(), Contact.id.desc())
+
+
+def parse_date_range(date_from, date_to):
+    """
+    Wandelt 'from'/'to' (JJJJ-MM-TT) in Grenzen für einen Zeitstempel um.
+    
+    Das Bis-Datum ist inklusive, die obere Grenze ist daher der Folgetag.
+    Ungültige Werte führen zu 400 Bad Request.
+    """
+    try:
+        start = datetime.strptime(date_from, '%Y-%m-%d') if date_from else None
+        end = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1) if date_to else None
+    except ValueError:
+        abort(400, description='Ungültiges Datum (erwartet JJJJ-MM-TT)')
+    return start, end
+
+
+def json_value(value):
+    """Datum/Zeit als ISO-String, Decimal als String (exakt), sonst unverändert"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _csv_rows(result):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    writer.writerow(result.keys())
+    yield buffer.getvalue()
+    
+    for partition in result.partitions():
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows((json_value(value) for value in row) for row in partition)
+        yield buffer.getvalue()
+
+
+def _ndjson_rows(result):
+    columns = list(result.keys())
+    for partition in result.partitions():
+        yield ''.join(
+            json.dumps(dict(zip(columns, map(json_value, row))), ensure_ascii=False) + '\n'
+            for row in partition
+        )
+
+
+def stream_export(statement, fmt, filename):
+    """
+    Liefert das Ergebnis von statement als Download im Format fmt.
+    
+    Die Abfrage wird erst beim Ausliefern ausgeführt und blockweise
+    (YIELD_PER Zeilen) gelesen.
+    """
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    
+    def generate():
+        result = db.session.execute(statement.execution_options(yield_per=YIELD_PER))
+        try:
+            yield from (_csv_rows(result) if fmt == 'csv' else _ndjson_rows(result))
+        finally:
+            result.close()
+    
+    response = Response(stream_with_context(generate()), content_type=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = \
+        f'attachment; filename="{filename}-{datetime.now():%Y%m%d}.{fmt}"'
+    return response
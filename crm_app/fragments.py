@@ -0,0 +1,120 @@
+"""
+Fragment-Cache für teure Template-Abschnitte
+
+Ein {% cache %}-Block wird einmal gerendert und danach als fertiges HTML
+aus dem Speicher ausgeliefert, solange sich sein Schlüssel nicht ändert:
+    
+    {% cache 'customer-score', customer.id, customer.version, days_since(customer.last_contact_at) %}
+        {{ customer.score_rating }} - {{ customer.score_label }}
+        {% set score = customer.get_customer_score() %}
+        Umsatz: {{ score.revenue_score }}/40 ...
+    {% endcache %}
+
+Der Schlüssel besteht aus dem Template-Namen und allen angegebenen Werten
+(müssen hashbar sein). Statt Einträge gezielt zu löschen, gehört die
+Zeilenversion (Spalte version) in den Schlüssel: jede Änderung an einem
+Kunden, auch über neue Bestellungen und Kontakte (Kennzahlen), erhöht sie,
+und nur die Fragmente dieses Kunden werden neu gerendert. Veraltete
+Einträge fallen über die LRU-Grenze FRAGMENT_CACHE_SIZE heraus.
+
+Was innerhalb des Blocks berechnet wird (Scores, Umsatzabfragen über
+übergebene Funktionen), entfällt bei einem Treffer komplett. Werte, die sich
+mit der Zeit ändern, müssen im Schlüssel stehen (days_since(...) für den
+Kontakt-Score, time_bucket(60) für relative Zeitangaben wie "5min").
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+
+class FragmentCache:
+    """Threadsicherer LRU-Speicher für gerenderte Fragmente"""
+    
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+class FragmentCacheExtension(Extension):
+    """Jinja-Tag {% cache schlüssel, ... %}...{% endcache %}"""
+    
+    tags = {'cache'}
+    
+    def __init__(self, environment):
+        super().__init__(environment)
+        # Ohne init_fragment_cache (oder mit Größe 0) wird immer gerendert
+        environment.extend(fragment_cache=None)
+    
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [nodes.Const(parser.name), parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.Tuple(parts, 'load')]),
+                               [], [], body).set_lineno(lineno)
+    
+    def _render(self, key, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = caller()
+            cache.set(key, fragment)
+        return fragment
+
+
+def days_since(value):
+    """Ganze Tage seit value (wie im Kontakt-Score), None ohne Datum"""
+    if value is None:
+        return None
+    return (datetime.utcnow() - value).days
+
+
+def time_bucket(seconds):
+    """Nummer des aktuellen Zeitfensters; im Schlüssel = höchstens so lange gecacht"""
+    return int(time.time() // seconds)
+
+
+def init_fragment_cache(app):
+    """Aktiviert den {% cache %}-Tag; FRAGMENT_CACHE_SIZE = 0 rendert immer neu"""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.globals.update(days_since=days_since, time_bucket=time_bucket)
+    size = app.config['FRAGMENT_CACHE_SIZE']
+    cache = FragmentCache(size) if size > 0 else None
+    app.jinja_env.fragment_cache = cache
+    app.extensions['fragment_cache'] = cache
+
@@ -0,0 +1,608 @@
+"""
+Streaming-Import von Kunden, Bestellungen und Kontakten aus CSV-Dateien
+
+Die Datei wird zeilenweise gelesen und in Blöcken zu chunk_size Zeilen
+verarbeitet. Pro Block werden Kunden-, Produkt- und Benutzerverweise mit je
+einer IN-Abfrage aufgelöst und alle gültigen Zeilen per Core-Bulk-Insert in
+einer eigenen Transaktion geschrieben. Fehlerhafte Zeilen werden mit
+Zeilennummer gemeldet, ohne den restlichen Import abzubrechen.
+
+Dieselben Importer verarbeiten auch die JSON-Bestellschnittstelle
+(import_orders, POST /orders/bulk).
+
+Erwartete Spalten (Trennzeichen ',' oder ';', erste Zeile = Kopfzeile):
+    customers: first_name, last_name, email, phone, created_at
+    orders:    customer_id | customer_email, order_date, status, items
+               items = "SKU:Menge[:Preis]" mehrfach durch '|' getrennt
+    contacts:  customer_id | customer_email, channel, contact_time,
+               subject, notes, user_email
+"""
+
+import csv
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from itertools import chain
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from models import (db, Customer, Order, OrderItem, Product, Contact, User,
+                    refresh_customer_stats, refresh_monthly_revenue)
+from crm_app.database import SQLITE_MAX_INTEGER
+from crm_app.reference import get_reference_data
+from crm_app.views.contacts import CONTACT_CHANNELS
+from crm_app.views.orders import ORDER_STATUSES
+
+IMPORT_KINDS = ['customers', 'orders', 'contacts']
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Maximal gespeicherte Fehlermeldungen (gezählt werden alle)
+MAX_REPORTED_ERRORS = 1000
+
+# Maximale Anzahl Werte pro IN-Abfrage
+_LOOKUP_CHUNK_SIZE = 500
+
+_DATETIME_FORMATS = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S',
+                     '%Y-%m-%dT%H:%M', '%Y-%m-%d', '%d.%m.%Y %H:%M', '%d.%m.%Y']
+
+CENT = Decimal('0.01')
+
+# Größter Betrag der Spalten Numeric(10, 2) (Preise und Bestellsummen)
+MAX_AMOUNT = Decimal('99999999.99')
+
+
+class RowError(ValueError):
+    """Ungültige Importzeile (wird gemeldet, der Import läuft weiter)"""
+
+
+class ImportResult:
+    """Ergebnis eines Imports: Zähler und Fehler pro Zeile"""
+    
+    def __init__(self, kind):
+        self.kind = kind
+        self.processed = 0
+        self.inserted = 0
+        self.error_count = 0
+        self.errors = []
+        # Zeile -> ID des angelegten Datensatzes (nur Bestellungen)
+        self.created_ids = {}
+    
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+    
+    @property
+    def errors_truncated(self):
+        return self.error_count > len(self.errors)
+
+
+# ---------------------------------------------------------------------------
+# CSV lesen und Werte umwandeln
+# ---------------------------------------------------------------------------
+
+def read_csv_rows(stream):
+    """
+    Liest eine CSV-Datei zeilenweise (Generator).
+    
+    Das Trennzeichen (',' oder ';') wird aus der Kopfzeile bestimmt,
+    Spaltennamen werden kleingeschrieben und getrimmt.
+    
+    Rückgabe: (Zeilennummer, dict) pro Datenzeile
+    """
+    header = stream.readline()
+    if not header:
+        return
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    
+    reader = csv.reader(chain([header], stream), delimiter=delimiter)
+    columns = [column.strip().lower() for column in next(reader)]
+    for row in reader:
+        if not any(value.strip() for value in row):
+            continue
+        yield reader.line_num, {column: value.strip() for column, value in zip(columns, row)}
+
+
+def _parse_datetime(value, field):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        pass
+    else:
+        # Zeitzonenangaben (z.B. "2025-03-01T10:00:00Z") in UTC umrechnen
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    for fmt in _DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise RowError(f'{field}: ungültiges Datum "{value}"')
+
+
+def _parse_decimal(value, field):
+    # Deutsches Format "1.234,50" und englisches Format "1234.50"
+    if ',' in value:
+        value = value.replace('.', '').replace(',', '.')
+    try:
+        amount = Decimal(value)
+        if not amount.is_finite() or amount < 0 or amount > MAX_AMOUNT:
+            raise InvalidOperation
+        return amount.quantize(CENT)
+    except InvalidOperation:
+        raise RowError(f'{field}: ungültiger Betrag "{value}"')
+
+
+def _parse_customer_reference(row):
+    """Kundenverweis als ('id', int) oder ('email', str)"""
+    if row.get('customer_id'):
+        try:
+            customer_id = int(row['customer_id'])
+        except ValueError:
+            customer_id = None
+        if customer_id is None or not 0 < customer_id <= SQLITE_MAX_INTEGER:
+            raise RowError(f'customer_id: ungültige ID "{row["customer_id"]}"')
+        return ('id', customer_id)
+    if row.get('customer_email'):
+        return ('email', row['customer_email'])
+    raise RowError('customer_id oder customer_email fehlt')
+
+
+def _parse_customer(row):
+    if not row.get('first_name') or not row.get('last_name'):
+        raise RowError('Vorname und Nachname sind Pflichtfelder')
+    return {
+        'first_name': row['first_name'][:100],
+        'last_name': row['last_name'][:100],
+        'email': row.get('email') or None,
+        'phone': row.get('phone') or None,
+        'created_at': _parse_datetime(row['created_at'], 'created_at') if row.get('created_at') else datetime.utcnow(),
+    }
+
+
+def _parse_order(row):
+    status = row.get('status') or 'Offen'
+    if status not in ORDER_STATUSES:
+        raise RowError(f'status: unbekannter Status "{status}"')
+    
+    items = []
+    for position in (row.get('items') or '').split('|'):
+        if not position.strip():
+            continue
+        parts = [part.strip() for part in position.split(':')]
+        if len(parts) not in (2, 3) or not parts[0]:
+            raise RowError(f'items: ungültige Position "{position}" (erwartet SKU:Menge[:Preis])')
+        try:
+            quantity = int(parts[1])
+        except ValueError:
+            raise RowError(f'items: ungültige Menge "{parts[1]}"')
+        if not 0 < quantity <= SQLITE_MAX_INTEGER:
+            raise RowError(f'items: Menge muss zwischen 1 und {SQLITE_MAX_INTEGER} liegen ("{position}")')
+        unit_price = _parse_decimal(parts[2], 'items') if len(parts) == 3 else None
+        items.append({'sku': parts[0], 'quantity': quantity, 'unit_price': unit_price})
+    if not items:
+        raise RowError('items: mindestens eine Bestellposition erforderlich')
+    
+    return {
+        'customer': _parse_customer_reference(row),
+        'order_date': _parse_datetime(row['order_date'], 'order_date') if row.get('order_date') else datetime.utcnow(),
+        'status': status,
+        'items': items,
+    }
+
+
+def _is_positive_integer(value):
+    """Ganze Zahl (kein bool) von 1 bis SQLITE_MAX_INTEGER"""
+    return isinstance(value, int) and not isinstance(value, bool) and 0 < value <= SQLITE_MAX_INTEGER
+
+
+def _parse_order_json(order):
+    """Bestellung aus der JSON-Schnittstelle (gleiches Ergebnis wie _parse_order)"""
+    if not isinstance(order, dict):
+        raise RowError('Bestellung muss ein Objekt sein')
+    
+    if order.get('customer_id') is not None:
+        if not _is_positive_integer(order['customer_id']):
+            raise RowError('customer_id: ungültige ID')
+        customer = ('id', order['customer_id'])
+    elif isinstance(order.get('customer_email'), str) and order['customer_email']:
+        customer = ('email', order['customer_email'])
+    else:
+        raise RowError('customer_id oder customer_email fehlt')
+    
+    status = order.get('status') or 'Offen'
+    if status not in ORDER_STATUSES:
+        raise RowError(f'status: unbekannter Status "{status}"')
+    
+    order_date = order.get('order_date')
+    if order_date is not None and not isinstance(order_date, str):
+        raise RowError('order_date: ungültiges Datum')
+    
+    lines = order.get('items')
+    if not isinstance(lines, list) or not lines:
+        raise RowError('items: mindestens eine Bestellposition erforderlich')
+    
+    items = []
+    for position, line in enumerate(lines, start=1):
+        if not isinstance(line, dict):
+            raise RowError(f'items[{position}]: Position muss ein Objekt sein')
+        quantity = line.get('quantity')
+        if not _is_positive_integer(quantity):
+            raise RowError(f'items[{position}]: Menge muss eine ganze Zahl von 1 bis {SQLITE_MAX_INTEGER} sein')
+        
+        item = {'quantity': quantity, 'unit_price': None}
+        if isinstance(line.get('sku'), str) and line['sku']:
+            item['sku'] = line['sku']
+        elif line.get('product_id') is not None:
+            if not _is_positive_integer(line['product_id']):
+                raise RowError(f'items[{position}]: ungültige product_id')
+            item['product_ref'] = line['product_id']
+        else:
+            raise RowError(f'items[{position}]: sku oder product_id fehlt')
+        
+        unit_price = line.get('unit_price')
+        if unit_price is not None:
+            if isinstance(unit_price, bool) or not isinstance(unit_price, (int, float, str)):
+                raise RowError(f'items[{position}]: ungültiger Preis')
+            # Über str(), damit aus 19.99 nicht 19.989999... wird
+            item['unit_price'] = _parse_decimal(str(unit_price), f'items[{position}]')
+        items.append(item)
+    
+    return {
+        'customer': customer,
+        'order_date': _parse_datetime(order_date, 'order_date') if order_date else datetime.utcnow(),
+        'status': status,
+        'items': items,
+    }
+
+
+def _parse_contact(row):
+    channel = row.get('channel', '')
+    if channel not in CONTACT_CHANNELS:
+        raise RowError(f'channel: unbekannte Kontaktart "{channel}"')
+    return {
+        'customer': _parse_customer_reference(row),
+        'channel': channel,
+        'contact_time': (_parse_datetime(row['contact_time'], 'contact_time')
+                         if row.get('contact_time') else datetime.utcnow()),
+        'subject': (row.get('subject') or None) and row['subject'][:200],
+        'notes': row.get('notes') or None,
+        'user_email': row.get('user_email') or None,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Verweise blockweise auflösen
+# ---------------------------------------------------------------------------
+
+def _lookup(connection, key_column, value_columns, keys):
+    """Liefert {key: row} für alle vorhandenen keys (IN-Abfrage in Blöcken)"""
+    keys = list(keys)
+    found = {}
+    for start in range(0, len(keys), _LOOKUP_CHUNK_SIZE):
+        chunk = keys[start:start + _LOOKUP_CHUNK_SIZE]
+        for row in connection.execute(select(key_column, *value_columns).where(key_column.in_(chunk))):
+            found[row[0]] = row
+    return found
+
+
+def _resolve_customers(connection, entries, result):
+    """Ersetzt den Kundenverweis jeder Zeile durch die customer_id"""
+    customers = Customer.__table__
+    references = [entry['customer'] for _, entry in entries]
+    ids = {value for kind, value in references if kind == 'id'}
+    emails = {value for kind, value in references if kind == 'email'}
+    found_ids = _lookup(connection, customers.c.id, [], ids)
+    found_emails = _lookup(connection, customers.c.email, [customers.c.id], emails)
+    
+    resolved = []
+    for line, entry in entries:
+        kind, value = entry['customer']
+        if kind == 'id' and value in found_ids:
+            entry['customer_id'] = value
+        elif kind == 'email' and value in found_emails:
+            entry['customer_id'] = found_emails[value].id
+        else:
+            result.add_error(line, f'Kunde "{value}" nicht gefunden')
+            continue
+        resolved.append((line, entry))
+    return resolved
+
+
+class _ReferenceCache:
+    """Merkt sich bereits aufgelöste Produkte bzw. Benutzer über alle Blöcke"""
+    
+    def __init__(self, key_column, value_columns):
+        self.key_column = key_column
+        self.value_columns = value_columns
+        self.rows = {}
+        self.missing = set()
+    
+    def load(self, connection, keys):
+        unknown = set(keys) - self.rows.keys() - self.missing
+        if unknown:
+            found = _lookup(connection, self.key_column, self.value_columns, unknown)
+            self.rows.update(found)
+            self.missing.update(unknown - found.keys())
+    
+    def prefill(self, rows):
+        """Übernimmt bereits bekannte Zeilen (z.B. aus dem Stammdaten-Cache)"""
+        self.rows.update(rows)
+    
+    def get(self, key):
+        return self.rows.get(key)
+
+
+# ---------------------------------------------------------------------------
+# Import pro Tabelle
+# ---------------------------------------------------------------------------
+
+class _CustomerImporter:
+    parse = staticmethod(_parse_customer)
+    
+    def __init__(self, connection):
+        # E-Mail-Adressen aller bestehenden Kunden einmalig laden; danach wird
+        # jede Zeile nur noch gegen dieses Set (plus die bereits importierten
+        # Zeilen) geprüft statt einzeln per filter_by(email)
+        customers = Customer.__table__
+        self.emails = set(connection.execute(
+            select(customers.c.email).where(customers.c.email.isnot(None))
+        ).scalars())
+    
+    def prepare(self, connection, entries, result):
+        accepted = []
+        for line, entry in entries:
+            if entry['email'] in self.emails:
+                result.add_error(line, f'E-Mail "{entry["email"]}" existiert bereits')
+                continue
+            if entry['email']:
+                self.emails.add(entry['email'])
+            accepted.append((line, entry))
+        return accepted
+    
+    def write(self, connection, entries):
+        connection.execute(Customer.__table__.insert(), [entry for _, entry in entries])
+        return set()
+
+
+class _OrderImporter:
+    parse = staticmethod(_parse_order)
+    
+    def __init__(self, connection):
+        products = Product.__table__
+        self.products = _ReferenceCache(products.c.sku, [products.c.id, products.c.base_price])
+        self.products_by_id = _ReferenceCache(products.c.id, [products.c.id, products.c.base_price])
+        # Preise aus dem Stammdaten-Cache; nur unbekannte Produkte werden nachgeladen
+        reference = get_reference_data()
+        self.products.prefill(reference.products_by_sku)
+        self.products_by_id.prefill(reference.products_by_id)
+    
+    def _product(self, item):
+        if 'sku' in item:
+            return self.products.get(item['sku'])
+        return self.products_by_id.get(item['product_ref'])
+    
+    def prepare(self, connection, entries, result):
+        entries = _resolve_customers(connection, entries, result)
+        items = [item for _, entry in entries for item in entry['items']]
+        self.products.load(connection, {item['sku'] for item in items if 'sku' in item})
+        self.products_by_id.load(connection, {item['product_ref'] for item in items if 'sku' not in item})
+        
+        accepted = []
+        for line, entry in entries:
+            unknown = [str(item.get('sku', item.get('product_ref'))) for item in entry['items']
+                       if self._product(item) is None]
+            if unknown:
+                result.add_error(line, f'Produkt(e) nicht gefunden: {", ".join(unknown)}')
+                continue
+            
+            total = Decimal('0.00')
+            for item in entry['items']:
+                product = self._product(item)
+                item['product_id'] = product.id
+                if item['unit_price'] is None:
+                    item['unit_price'] = product.base_price
+                total += item['unit_price'] * item['quantity']
+            if total > MAX_AMOUNT:
+                result.add_error(line, f'Bestellsumme {total} übersteigt den Höchstbetrag {MAX_AMOUNT}')
+                continue
+            entry['total_amount'] = total.quantize(CENT)
+            accepted.append((line, entry))
+        return accepted
+    
+    def write(self, connection, entries):
+        orders = Order.__table__
+        order_rows = [
+            {
+                'customer_id': entry['customer_id'],
+                'order_date': entry['order_date'],
+                'status': entry['status'],
+                'total_amount': entry['total_amount'],
+            }
+            for _, entry in entries
+        ]
+        
+        # IDs der neuen Bestellungen in einem Statement zurückholen (INSERT ... RETURNING)
+        if connection.dialect.name == 'sqlite':
+            # SQLite vergibt die ROWIDs fortlaufend in VALUES-Reihenfolge, sortiert
+            # entsprechen sie also der Parameter-Reihenfolge. Mit sort_by_parameter_order
+            # würde SQLAlchemy mangels Sentinel-Spalte zeilenweise einfügen.
+            order_ids = sorted(connection.execute(
+                orders.insert().returning(orders.c.id), order_rows
+            ).scalars())
+        elif connection.dialect.insert_executemany_returning_sort_by_parameter_order:
+            order_ids = connection.execute(
+                orders.insert().returning(orders.c.id, sort_by_parameter_order=True), order_rows
+            ).scalars().all()
+        else:
+            order_ids = [connection.execute(orders.insert(), row).inserted_primary_key[0]
+                         for row in order_rows]
+        
+        for order_id, (_, entry) in zip(order_ids, entries):
+            entry['id'] = order_id
+        
+        item_rows = [
+            {
+                'order_id': order_id,
+                'product_id': item['product_id'],
+                'quantity': item['quantity'],
+                'unit_price': item['unit_price'],
+            }
+            for order_id, (_, entry) in zip(order_ids, entries)
+            for item in entry['items']
+        ]
+        connection.execute(OrderItem.__table__.insert(), item_rows)
+        
+        customer_ids = {entry['customer_id'] for _, entry in entries}
+        refresh_monthly_revenue(customer_ids, connection=connection)
+        return customer_ids
+
+
+class _ContactImporter:
+    parse = staticmethod(_parse_contact)
+    
+    def __init__(self, connection):
+        users = User.__table__
+        self.users = _ReferenceCache(users.c.email, [users.c.id])
+        self.users.prefill(get_reference_data().users_by_email)
+    
+    def prepare(self, connection, entries, result):
+        entries = _resolve_customers(connection, entries, result)
+        self.users.load(connection, {entry['user_email'] for _, entry in entries if entry['user_email']})
+        
+        accepted = []
+        for line, entry in entries:
+            user_id = None
+            if entry['user_email']:
+                user = self.users.get(entry['user_email'])
+                if user is None:
+                    result.add_error(line, f'Benutzer "{entry["user_email"]}" nicht gefunden')
+                    continue
+                user_id = user.id
+            entry['user_id'] = user_id
+            accepted.append((line, entry))
+        return accepted
+    
+    def write(self, connection, entries):
+        connection.execute(Contact.__table__.insert(), [
+            {
+                'customer_id': entry['customer_id'],
+                'user_id': entry['user_id'],
+                'channel': entry['channel'],
+                'subject': entry['subject'],
+                'notes': entry['notes'],
+                'contact_time': entry['contact_time'],
+            }
+            for _, entry in entries
+        ])
+        return {entry['customer_id'] for _, entry in entries}
+
+
+_IMPORTERS = {
+    'customers': _CustomerImporter,
+    'orders': _OrderImporter,
+    'contacts': _ContactImporter,
+}
+
+
+def _record_created(entries, result):
+    for line, entry in entries:
+        if 'id' in entry:
+            result.created_ids[line] = entry['id']
+
+
+def _write_chunk(importer, entries, result):
+    """
+    Schreibt einen Block in einer Transaktion.
+    
+    Schlägt der Block an einer Datenbank-Constraint fehl (z.B. eine E-Mail,
+    die parallel angelegt wurde), werden seine Zeilen einzeln per Savepoint
+    wiederholt, damit nur die betroffenen Zeilen als Fehler gemeldet werden.
+    """
+    with db.engine.connect() as connection:
+        try:
+            with connection.begin():
+                touched = importer.write(connection, entries)
+                refresh_customer_stats(touched, connection=connection)
+            result.inserted += len(entries)
+            _record_created(entries, result)
+            return
+        except IntegrityError:
+            pass
+        
+        with connection.begin():
+            touched = set()
+            for line, entry in entries:
+                try:
+                    with connection.begin_nested():
+                        touched |= importer.write(connection, [(line, entry)])
+                    result.inserted += 1
+                    _record_created([(line, entry)], result)
+                except IntegrityError as e:
+                    result.add_error(line, f'Datenbankfehler: {e.orig}')
+            refresh_customer_stats(touched, connection=connection)
+
+
+def _import(kind, rows, chunk_size, parse=None, progress=None):
+    """
+    Verarbeitet (Zeile, Rohdaten)-Paare blockweise mit dem Importer für `kind`.
+    
+    parse wandelt die Rohdaten einer Zeile um (Standard: CSV-Parser des Importers).
+    progress(result) wird nach jedem geschriebenen Block aufgerufen.
+    """
+    if kind not in _IMPORTERS:
+        raise ValueError(f'Unbekannter Import-Typ: {kind}')
+    
+    result = ImportResult(kind)
+    with db.engine.connect() as connection:
+        importer = _IMPORTERS[kind](connection)
+    parse = parse or importer.parse
+    
+    def flush(pending):
+        with db.engine.connect() as connection:
+            entries = importer.prepare(connection, pending, result)
+        if entries:
+            _write_chunk(importer, entries, result)
+        if progress is not None:
+            progress(result)
+    
+    pending = []
+    for line, row in rows:
+        result.processed += 1
+        try:
+            pending.append((line, parse(row)))
+        except RowError as e:
+            result.add_error(line, str(e))
+            continue
+        if len(pending) >= chunk_size:
+            flush(pending)
+            pending = []
+    if pending:
+        flush(pending)
+    
+    result.errors.sort()
+    return result
+
+
+def import_csv(kind, stream, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Importiert eine CSV-Datei (Textstream) in die Tabelle `kind`.
+    
+    Benötigt einen App-Kontext. Bereits geschriebene Blöcke bleiben auch bei
+    späteren Fehlern erhalten. progress(result) wird nach jedem Block
+    aufgerufen (z.B. für den Fortschritt eines Hintergrund-Jobs).
+    
+    Rückgabe: ImportResult
+    """
+    return _import(kind, read_csv_rows(stream), chunk_size, progress=progress)
+
+
+def import_orders(orders, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Legt Bestellungen aus bereits geparstem JSON an (Liste von dicts).
+    
+    Fehler und angelegte IDs werden über den Index in der Liste gemeldet.
+    
+    Rückgabe: ImportResult
+    """
+    return _import('orders', enumerate(orders), chunk_size, parse=_parse_order_json)
@@ -0,0 +1,456 @@
+"""
+Hintergrund-Jobs mit Warteschlange in der Datenbank (Tabelle jobs)
+
+Views geben aufwendige Arbeit (Neuberechnungen, große Importe) per
+enqueue() ab und antworten sofort; ein Worker führt den Job später aus:
+    
+    job = enqueue('repair-stats', dedupe_key='repair-stats')
+    ...
+    GET /jobs/<id>   -> Status, Fortschritt, Ergebnis
+
+Die Warteschlange ist eine gewöhnliche Tabelle, es wird kein externer Broker
+benötigt. Ein Worker holt einen Job per Compare-and-Set ab (UPDATE ... WHERE
+status = 'queued'); wer 0 Zeilen ändert, hat verloren und nimmt den nächsten.
+Dadurch können mehrere Threads und Prozesse parallel arbeiten:
+
+- im Webprozess: JOBS_WORKER_THREADS Threads, gestartet beim ersten Request
+- als eigener Prozess: python -m crm_app.worker (siehe crm_app/worker.py)
+
+Dedupe: Jobs mit gleichem dedupe_key werden zusammengefasst, solange einer
+wartet oder läuft (eindeutiger Teilindex idx_job_dedupe). Schlägt ein Job
+fehl, wird er bis zu max_attempts-mal wiederholt, jeweils nach
+JOBS_RETRY_DELAY * 2^(Versuch - 1) Sekunden. Ein laufender Job meldet sich
+regelmäßig (heartbeat_at); bleibt das länger als JOBS_STALE_SECONDS aus
+(Prozess beendet), wird er erneut eingereiht.
+
+Job-Typen mit interval (z.B. recompute-scores, täglich) reiht jeder laufende
+Worker selbst ein, einmal pro Zeitfenster (dedupe_key "<typ>@<fenster>").
+
+Eigene Job-Typen:
+    
+    @job_handler('mein-job', max_attempts=3)
+    def mein_job(payload, context):
+        context.progress(1, 10, 'Schritt 1')
+        ...
+        return {'ergebnis': 42}   # JSON-fähig, landet in jobs.result
+
+Der Handler läuft in einem eigenen App-Kontext; Änderungen an db.session
+werden nach erfolgreichem Ende committet, bei einer Exception verworfen.
+"""
+
+import os
+import socket
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError, OperationalError
+from models import (db, Job, create_row_counters, rebuild_customer_stats, rebuild_customer_scores,
+                    rebuild_monthly_revenue)
+from crm_app.database import commit_with_retry, is_lock_error
+
+JOB_STATUSES = ['queued', 'running', 'done', 'failed']
+ACTIVE_STATUSES = ('queued', 'running')
+
+# So viele wartende Jobs prüft ein Worker pro Abholversuch
+_CLAIM_BATCH = 5
+
+JobHandler = namedtuple('JobHandler', ['func', 'max_attempts', 'interval'])
+
+_HANDLERS = {}
+
+
+def job_handler(kind, max_attempts=3, interval=None):
+    """
+    Decorator: registriert func(payload, context) als Handler für Jobs vom Typ kind.
+    
+    Mit interval (Sekunden) wird der Job zusätzlich einmal pro Intervall
+    automatisch eingereiht (siehe enqueue_periodic_jobs).
+    """
+    def register(func):
+        _HANDLERS[kind] = JobHandler(func, max_attempts, interval)
+        return func
+    return register
+
+
+# ---------------------------------------------------------------------------
+# Einreihen und Abfragen
+# ---------------------------------------------------------------------------
+
+def find_active_job(dedupe_key):
+    """Wartender oder laufender Job mit diesem Schlüssel, sonst None"""
+    return Job.query.filter(Job.dedupe_key == dedupe_key,
+                            Job.status.in_(ACTIVE_STATUSES)).first()
+
+
+def enqueue(kind, payload=None, dedupe_key=None, delay=0):
+    """
+    Reiht einen Job ein und liefert ihn zurück.
+    
+    Gibt es zu dedupe_key schon einen wartenden oder laufenden Job, wird
+    stattdessen dieser geliefert. Committet die aktuelle Session.
+    """
+    handler = _HANDLERS.get(kind)
+    if handler is None:
+        raise ValueError(f'Unbekannter Job-Typ: {kind}')
+    
+    if dedupe_key is not None:
+        existing = find_active_job(dedupe_key)
+        if existing is not None:
+            return existing
+    
+    job = Job(kind=kind, dedupe_key=dedupe_key, payload=payload,
+              max_attempts=handler.max_attempts,
+              run_after=datetime.utcnow() + timedelta(seconds=delay))
+    try:
+        commit_with_retry(lambda: db.session.add(job))
+    except IntegrityError:
+        # Paralleles enqueue() mit demselben Schlüssel war schneller
+        db.session.rollback()
+        existing = find_active_job(dedupe_key) if dedupe_key is not None else None
+        if existing is None:
+            raise
+        return existing
+    
+    worker = current_app.extensions.get('job_worker')
+    if worker is not None:
+        worker.wake()
+    return job
+
+
+def enqueue_periodic_jobs():
+    """
+    Reiht jeden Job-Typ mit interval ein, der im aktuellen Zeitfenster noch
+    nicht eingereiht wurde (läuft im Heartbeat jedes Workers).
+    
+    Rückgabe: Liste der neu eingereihten Jobs
+    """
+    enqueued = []
+    for kind, handler in _HANDLERS.items():
+        if not handler.interval:
+            continue
+        dedupe_key = f'{kind}@{int(time.time() // handler.interval)}'
+        if Job.query.filter(Job.kind == kind, Job.dedupe_key == dedupe_key).first() is None:
+            enqueued.append(enqueue(kind, dedupe_key=dedupe_key))
+    return enqueued
+
+
+def job_json(job):
+    """Status eines Jobs für GET /jobs/<id>"""
+    def timestamp(value):
+        return value.isoformat() if value else None
+    
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'progress_message': job.progress_message,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'result': job.result,
+        'error': job.error,
+        'created_at': timestamp(job.created_at),
+        'started_at': timestamp(job.started_at),
+        'finished_at': timestamp(job.finished_at),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Ausführung
+# ---------------------------------------------------------------------------
+
+def _update_job(job_id, *conditions, **values):
+    """Ändert einen Job in einer eigenen, sofort committeten Transaktion"""
+    jobs = Job.__table__
+    with db.engine.begin() as connection:
+        return connection.execute(
+            jobs.update().where(jobs.c.id == job_id, *conditions).values(**values)
+        ).rowcount
+
+
+def _claim_next(worker_name):
+    """Holt den nächsten fälligen Job ab (Compare-and-Set), sonst None"""
+    jobs = Job.__table__
+    now = datetime.utcnow()
+    # Eigene Lesetransaktion: eine SQLite-Lesetransaktion, die danach schreiben
+    # will, scheitert sofort, wenn ein anderer Worker inzwischen committet hat
+    with db.engine.connect() as connection:
+        candidates = connection.execute(
+            db.select(jobs.c.id)
+              .where(jobs.c.status == 'queued', jobs.c.run_after <= now)
+              .order_by(jobs.c.run_after, jobs.c.id)
+              .limit(_CLAIM_BATCH)
+        ).scalars().all()
+    
+    for job_id in candidates:
+        claimed = _update_job(job_id, jobs.c.status == 'queued',
+                              status='running', attempts=jobs.c.attempts + 1,
+                              locked_by=worker_name, started_at=now, heartbeat_at=now,
+                              progress=0, progress_message=None)
+        if claimed:
+            return db.session.get(Job, job_id)
+    return None
+
+
+def requeue_stale_jobs(stale_seconds):
+    """
+    Reiht laufende Jobs ohne Lebenszeichen seit stale_seconds wieder ein
+    (bzw. markiert sie als fehlgeschlagen, wenn keine Versuche mehr übrig sind).
+    
+    Rückgabe: (wieder eingereiht, fehlgeschlagen)
+    """
+    jobs = Job.__table__
+    now = datetime.utcnow()
+    stale = [jobs.c.status == 'running', jobs.c.heartbeat_at < now - timedelta(seconds=stale_seconds)]
+    with db.engine.begin() as connection:
+        failed = connection.execute(
+            jobs.update().where(*stale, jobs.c.attempts >= jobs.c.max_attempts)
+                .values(status='failed', locked_by=None, finished_at=now,
+                        error='Worker wurde während der Ausführung beendet')
+        ).rowcount
+        requeued = connection.execute(
+            jobs.update().where(*stale).values(status='queued', locked_by=None, run_after=now)
+        ).rowcount
+    return requeued, failed
+
+
+class JobContext:
+    """Wird dem Handler übergeben: Job-Daten und Fortschrittsmeldung"""
+    
+    def __init__(self, job):
+        self.job_id = job.id
+        self.kind = job.kind
+        self.attempt = job.attempts
+    
+    def progress(self, done, total=None, message=None):
+        """
+        Meldet den Fortschritt (done von total, ohne total: Prozent) samt Text.
+        
+        Wird in einer eigenen Transaktion geschrieben und ist sofort unter
+        GET /jobs/<id> sichtbar. Unter SQLite nicht aufrufen, während die
+        Session noch ungespeicherte Schreibzugriffe hält: die Meldung wartet
+        dann auf die eigene Sperre und entfällt nach busy_timeout.
+        """
+        percent = done if total is None else (100 * done // total if total else 100)
+        # 100 % erst, wenn der Handler wirklich fertig ist
+        percent = max(0, min(int(percent), 99))
+        values = {'progress': percent, 'heartbeat_at': datetime.utcnow()}
+        if message is not None:
+            values['progress_message'] = message[:255]
+        try:
+            _update_job(self.job_id, **values)
+        except OperationalError as error:
+            if not is_lock_error(error):
+                raise
+            current_app.logger.debug('Fortschritt für Job %d übersprungen (Datenbank gesperrt)', self.job_id)
+
+
+class JobWorker:
+    """Führt Jobs in einem Pool aus Threads aus (im Webprozess oder in crm_app.worker)"""
+    
+    def __init__(self, app, threads=None):
+        self.app = app
+        self.threads = app.config['JOBS_WORKER_THREADS'] if threads is None else threads
+        self.poll_interval = app.config['JOBS_POLL_INTERVAL']
+        self.retry_delay = app.config['JOBS_RETRY_DELAY']
+        self.stale_seconds = app.config['JOBS_STALE_SECONDS']
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self._running = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+    
+    @property
+    def started(self):
+        return bool(self._threads)
+    
+    def start(self):
+        """Startet die Worker-Threads und den Heartbeat (nur beim ersten Aufruf)"""
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            threads = [threading.Thread(target=self._work, name=f'job-worker-{number + 1}', daemon=True)
+                       for number in range(self.threads)]
+            threads.append(threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True))
+            for thread in threads:
+                thread.start()
+            self._threads = threads
+    
+    def stop(self, timeout=None):
+        """Nimmt keine neuen Jobs mehr an und wartet auf die laufenden"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+    
+    def wake(self):
+        """Weckt wartende Threads (nach enqueue im selben Prozess)"""
+        self._wakeup.set()
+    
+    def run_pending(self):
+        """Arbeitet alle fälligen Jobs im aktuellen Thread ab; Rückgabe: Anzahl"""
+        with self.app.app_context():
+            requeue_stale_jobs(self.stale_seconds)
+            enqueue_periodic_jobs()
+        count = 0
+        while self.run_next():
+            count += 1
+        return count
+    
+    def run_next(self):
+        """Führt den nächsten fälligen Job aus; False, wenn keiner wartet"""
+        with self.app.app_context():
+            job = _claim_next(self.name)
+            if job is None:
+                return False
+            self._execute(job)
+            return True
+    
+    def _execute(self, job):
+        job_id, kind, attempts, max_attempts = job.id, job.kind, job.attempts, job.max_attempts
+        handler = _HANDLERS.get(kind)
+        with self._lock:
+            self._running.add(job_id)
+        try:
+            if handler is None:
+                # Wiederholen hilft nicht, der Typ ist in diesem Prozess unbekannt
+                attempts = max_attempts
+                raise LookupError(f'Unbekannter Job-Typ: {kind}')
+            result = handler.func(job.payload or {}, JobContext(job))
+            db.session.commit()
+        except Exception as error:
+            db.session.rollback()
+            self.app.logger.exception('Job %d (%s) fehlgeschlagen, Versuch %d von %d',
+                                      job_id, kind, attempts, max_attempts)
+            message = f'{type(error).__name__}: {error}'
+            now = datetime.utcnow()
+            if attempts < max_attempts:
+                retry_at = now + timedelta(seconds=self.retry_delay * 2 ** (attempts - 1))
+                _update_job(job_id, status='queued', locked_by=None, error=message, run_after=retry_at)
+            else:
+                _update_job(job_id, status='failed', locked_by=None, error=message, finished_at=now)
+        else:
+            _update_job(job_id, status='done', locked_by=None, progress=100, result=result,
+                        error=None, finished_at=datetime.utcnow())
+        finally:
+            with self._lock:
+                self._running.discard(job_id)
+    
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                ran = self.run_next()
+            except Exception:
+                # z.B. Datenbank gesperrt beim Abholen; beim nächsten Durchlauf erneut
+                self.app.logger.exception('Job-Worker: Abholen fehlgeschlagen')
+                ran = False
+            if not ran:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+    
+    def _heartbeat(self):
+        interval = max(self.stale_seconds / 4, 1)
+        while not self._stopping.wait(interval):
+            try:
+                with self.app.app_context():
+                    with self._lock:
+                        running = list(self._running)
+                    if running:
+                        jobs = Job.__table__
+                        with db.engine.begin() as connection:
+                            connection.execute(jobs.update().where(jobs.c.id.in_(running))
+                                                   .values(heartbeat_at=datetime.utcnow()))
+                    requeue_stale_jobs(self.stale_seconds)
+                    enqueue_periodic_jobs()
+            except Exception:
+                self.app.logger.exception('Job-Worker: Heartbeat fehlgeschlagen')
+
+
+def init_jobs(app):
+    """Registriert den Worker des Webprozesses (JOBS_WORKER_THREADS = 0: keiner)"""
+    worker = JobWorker(app) if app.config['JOBS_WORKER_THREADS'] > 0 else None
+    app.extensions['job_worker'] = worker
+    if worker is None:
+        return
+    
+    @app.before_request
+    def start_job_worker():
+        # Erst beim ersten Request, damit CLI-Befehle und Skripte keine Threads starten
+        worker.start()
+
+
+# ---------------------------------------------------------------------------
+# Job-Typen
+# ---------------------------------------------------------------------------
+
+@job_handler('repair-stats')
+def repair_stats_job(payload, context):
+    """Kunden-Kennzahlen, Monatsumsätze, Scores und Zeilenzähler neu berechnen (wie flask repair-stats)"""
+    from crm_app.dashboard import invalidate_dashboard
+    
+    context.progress(0, 3, 'Kunden-Kennzahlen')
+    updated = rebuild_customer_stats()
+    db.session.commit()
+    context.progress(1, 3, 'Monatsumsätze')
+    months = rebuild_monthly_revenue()
+    db.session.commit()
+    context.progress(2, 3, 'Kunden-Scores')
+    scores = rebuild_customer_scores()
+    create_row_counters(db.session.connection(), rebuild=True)
+    db.session.commit()
+    invalidate_dashboard()
+    return {'customers': updated, 'months': months, 'scores': scores}
+
+
+@job_handler('recompute-scores', interval=24 * 3600)
+def recompute_scores_job(payload, context):
+    """Score aller Kunden neu berechnen (täglich, da der Kontakt-Score mit der Zeit sinkt)"""
+    with db.engine.connect() as connection:
+        def chunk_done(done, total):
+            # Jeden Block sofort committen: die Schreibsperre wird nur kurz
+            # gehalten und die Fortschrittsmeldung muss nicht darauf warten
+            connection.commit()
+            context.progress(done, total, f'{done} von {total} Kunden')
+        
+        changed = rebuild_customer_scores(connection, progress=chunk_done)
+        connection.commit()
+    return {'changed': changed}
+
+
+@job_handler('import-csv', max_attempts=1)
+def import_csv_job(payload, context):
+    """
+    CSV-Import einer hochgeladenen Datei (payload: kind, path, filename).
+    
+    Nur ein Versuch: bereits geschriebene Blöcke bleiben bei einem Fehler
+    erhalten, eine Wiederholung würde sie doppelt anlegen.
+    """
+    import io
+    from crm_app.dashboard import invalidate_dashboard
+    from crm_app.imports import import_csv
+    
+    path = payload['path']
+    try:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as raw:
+            stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+            result = import_csv(payload['kind'], stream, progress=lambda result: context.progress(
+                raw.tell(), size, f'{result.processed} Zeilen verarbeitet'))
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    
+    if result.inserted:
+        invalidate_dashboard()
+    return {
+        'filename': payload.get('filename'),
+        'processed': result.processed,
+        'inserted': result.inserted,
+        'error_count': result.error_count,
+        'errors': result.errors[:100],
+    }
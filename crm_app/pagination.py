@@ -0,0 +1,106 @@
+"""
+Keyset-Pagination (Seek-Methode) für chronologische Listen
+
+Statt OFFSET/LIMIT und COUNT wird ab dem letzten angezeigten Eintrag
+weitergeblättert: WHERE (datum, id) < (:datum, :id) ORDER BY datum DESC, id DESC.
+Damit kostet jede Seite gleich viel, egal wie weit hinten sie liegt, und die
+Sortierung wird direkt aus einem Index auf der Datumsspalte gelesen
+(SQLite hängt die rowid implizit an jeden Index an).
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+
+
+def encode_cursor(direction, sort_value, row_id):
+    """Kodiert Richtung und Schlüssel eines Eintrags als undurchsichtiges URL-Token"""
+    payload = json.dumps([direction, sort_value.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Dekodiert ein Token aus encode_cursor().
+    
+    Rückgabe: (direction, sort_value, row_id) oder None bei ungültigem Token
+    """
+    if not token:
+        return None
+    
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ('next', 'prev'):
+            return None
+        return direction, datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError, binascii.Error):
+        return None
+
+
+class KeysetPagination:
+    """Ergebnis einer Keyset-Abfrage (ohne Gesamtanzahl)"""
+    
+    def __init__(self, items, per_page, has_next, has_prev, sort_attr):
+        self.items = items
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self._sort_attr = sort_attr
+    
+    def _cursor(self, direction, item):
+        return encode_cursor(direction, getattr(item, self._sort_attr), item.id)
+    
+    @property
+    def next_cursor(self):
+        """Token für die nächste (ältere) Seite"""
+        if not self.has_next or not self.items:
+            return None
+        return self._cursor('next', self.items[-1])
+    
+    @property
+    def prev_cursor(self):
+        """Token für die vorherige (neuere) Seite"""
+        if not self.has_prev or not self.items:
+            return None
+        return self._cursor('prev', self.items[0])
+
+
+def keyset_paginate(query, sort_column, id_column, cursor=None, per_page=50):
+    """
+    Blättert eine Query absteigend nach (sort_column, id_column).
+    
+    query darf bereits Joins und Filter enthalten, aber noch keine Sortierung.
+    cursor ist ein Token aus KeysetPagination.next_cursor/prev_cursor; ein
+    fehlendes oder ungültiges Token liefert die erste Seite.
+    """
+    key = tuple_(sort_column, id_column)
+    decoded = decode_cursor(cursor)
+    
+    if decoded and decoded[0] == 'prev':
+        # Rückwärts blättern: aufsteigend ab dem Cursor lesen und umdrehen
+        _, sort_value, row_id = decoded
+        rows = query.filter(key > tuple_(sort_value, row_id))\
+                    .order_by(sort_column.asc(), id_column.asc())\
+                    .limit(per_page + 1)\
+                    .all()
+        if len(rows) <= per_page:
+            # Anfang der Liste erreicht: immer eine volle erste Seite zeigen
+            return keyset_paginate(query, sort_column, id_column, per_page=per_page)
+        items = list(reversed(rows[:per_page]))
+        return KeysetPagination(items, per_page, has_next=True, has_prev=True,
+                                sort_attr=sort_column.key)
+    
+    if decoded:
+        _, sort_value, row_id = decoded
+        query = query.filter(key < tuple_(sort_value, row_id))
+    
+    rows = query.order_by(sort_column.desc(), id_column.desc())\
+                .limit(per_page + 1)\
+                .all()
+    return KeysetPagination(rows[:per_page], per_page,
+                            has_next=len(rows) > per_page,
+                            has_prev=decoded is not None,
+                            sort_attr=sort_column.key)
@@ -0,0 +1,138 @@
+"""
+SQL-Profiler pro Request mit N+1-Erkennung
+
+Zählt alle SQL-Statements, die während eines Requests ausgeführt werden,
+misst die Datenbankzeit und meldet das Ergebnis als Response-Header
+(Server-Timing, X-DB-Queries) und als strukturierte Log-Zeile.
+
+Wird dasselbe Statement (gleiche SQL-Form, andere Parameter) innerhalb eines
+Requests öfter als SQL_N_PLUS_ONE_THRESHOLD mal ausgeführt, deutet das auf
+ein N+1-Problem hin: es wird eine Warnung geloggt bzw. mit
+SQL_N_PLUS_ONE_RAISE (Standard im Testmodus) ein NPlusOneError ausgelöst.
+"""
+
+import json
+import re
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_WHITESPACE = re.compile(r'\s+')
+
+_listeners_installed = False
+
+
+class NPlusOneError(RuntimeError):
+    """Ein Statement wurde in einem Request zu oft wiederholt"""
+
+
+class RequestProfile:
+    """Gesammelte SQL-Statistik eines Requests"""
+    
+    def __init__(self):
+        self.query_count = 0
+        self.total_time = 0.0
+        self.statements = []
+        self.shapes = Counter()
+    
+    def record(self, statement, duration):
+        shape = _WHITESPACE.sub(' ', statement).strip()
+        self.query_count += 1
+        self.total_time += duration
+        self.statements.append((duration, shape))
+        self.shapes[shape] += 1
+    
+    def slowest(self, limit):
+        """Die langsamsten Statements als Liste von (Sekunden, SQL)"""
+        return sorted(self.statements, key=lambda entry: entry[0], reverse=True)[:limit]
+    
+    def repeated(self, threshold):
+        """SQL-Formen, die öfter als threshold mal ausgeführt wurden"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+def _current_profile():
+    if not has_request_context():
+        return None
+    return g.get('sql_profile')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Startzeit am Ausführungskontext: verschwindet mit dem Statement, auch wenn es
+    # fehlschlägt (an der gepoolten Connection bliebe sie liegen)
+    if context is not None and _current_profile() is not None:
+        context._sql_profile_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile()
+    start = getattr(context, '_sql_profile_start', None)
+    if profile is not None and start is not None:
+        profile.record(statement, time.perf_counter() - start)
+
+
+def _install_listeners():
+    """Registriert die Engine-Events einmalig (gilt für alle Engines/Binds)"""
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listeners_installed = True
+
+
+def _shorten(statement, length=200):
+    return statement if len(statement) <= length else statement[:length - 3] + '...'
+
+
+def init_sql_profiler(app):
+    """Aktiviert den Profiler, falls SQL_PROFILER gesetzt ist"""
+    if not app.config.get('SQL_PROFILER'):
+        return
+    
+    _install_listeners()
+    
+    @app.before_request
+    def start_sql_profile():
+        g.sql_profile = RequestProfile()
+    
+    @app.after_request
+    def report_sql_profile(response):
+        profile = g.pop('sql_profile', None)
+        if profile is None:
+            return response
+        
+        db_ms = profile.total_time * 1000
+        response.headers['X-DB-Queries'] = str(profile.query_count)
+        response.headers['Server-Timing'] = (
+            f'db;dur={db_ms:.2f};desc="{profile.query_count} queries"'
+        )
+        
+        threshold = app.config['SQL_N_PLUS_ONE_THRESHOLD']
+        repeated = profile.repeated(threshold)
+        
+        app.logger.info(json.dumps({
+            'event': 'sql_profile',
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': profile.query_count,
+            'db_ms': round(db_ms, 2),
+            'slowest': [
+                {'ms': round(duration * 1000, 2), 'sql': _shorten(statement)}
+                for duration, statement in profile.slowest(app.config['SQL_PROFILER_SLOWEST'])
+            ],
+            'repeated': [{'count': count, 'sql': _shorten(shape)} for shape, count in repeated],
+        }, ensure_ascii=False))
+        
+        if repeated:
+            shape, count = repeated[0]
+            message = (f'Mögliches N+1-Problem in {request.endpoint}: '
+                       f'{count}x dasselbe Statement: {_shorten(shape)}')
+            if app.config['SQL_N_PLUS_ONE_RAISE'] or app.testing:
+                raise NPlusOneError(message)
+            app.logger.warning(message)
+        
+        return response
@@ -0,0 +1,150 @@
+"""
+Stammdaten-Cache für Produkte und Benutzer
+
+Produkte und Benutzer ändern sich selten, werden aber bei jedem Aufruf der
+Bestell- und Kontaktformulare (auch bei jeder Fehler-Neuanzeige) und bei
+der Preisberechnung neuer Bestellungen gebraucht. Sie werden deshalb einmal
+pro Prozess geladen (beim Start bzw. beim ersten Zugriff) und als
+unveränderlicher Snapshot im Speicher gehalten.
+
+Jeder Snapshot trägt eine Versionsnummer. Ein Commit, der Produkte oder
+Benutzer anlegt, ändert oder löscht, verwirft den Snapshot (Session-Events
+unten); Schreibzugriffe am ORM vorbei (Core-Bulk-Inserts, andere Prozesse)
+rufen invalidate_reference_data() auf bzw. werden spätestens nach
+REFERENCE_CACHE_TTL Sekunden sichtbar.
+
+Wie beim Dashboard-Snapshot enthält der Cache nur einfache Werte
+(namedtuples), keine ORM-Objekte.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from models import db, Product, User
+
+ProductRecord = namedtuple('ProductRecord', 'id sku name base_price')
+UserRecord = namedtuple('UserRecord', 'id name email role')
+
+
+class ReferenceSnapshot:
+    """Unveränderlicher Stand aller Produkte und Benutzer"""
+    
+    def __init__(self, version, products, users):
+        self.version = version
+        # Sortiert wie in den Formularen angezeigt
+        self.products = tuple(sorted(products, key=lambda p: (p.name, p.id)))
+        self.users = tuple(sorted(users, key=lambda u: (u.name, u.id)))
+        self.products_by_id = {product.id: product for product in self.products}
+        self.products_by_sku = {product.sku: product for product in self.products if product.sku}
+        self.users_by_id = {user.id: user for user in self.users}
+        self.users_by_email = {user.email: user for user in self.users if user.email}
+
+
+def load_reference_data(version):
+    """Lädt alle Produkte und Benutzer (benötigt einen App-Kontext)"""
+    with db.engine.connect() as connection:
+        products = [
+            ProductRecord(*row) for row in connection.execute(
+                db.select(Product.id, Product.sku, Product.name, Product.base_price)
+            )
+        ]
+        users = [
+            UserRecord(*row) for row in connection.execute(
+                db.select(User.id, User.name, User.email, User.role)
+            )
+        ]
+    return ReferenceSnapshot(version, products, users)
+
+
+class ReferenceCache:
+    """Versionierter Stammdaten-Snapshot eines Prozesses"""
+    
+    def __init__(self, app, ttl):
+        self.app = app
+        self.ttl = ttl
+        self.snapshot = None
+        self.loaded_at = 0.0
+        self.version = 0
+        self._lock = threading.Lock()
+    
+    def get(self):
+        """Liefert den aktuellen Snapshot (lädt ihn bei Bedarf neu)"""
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.version != self.version or self._expired():
+            snapshot = self._reload()
+        return snapshot
+    
+    def _expired(self):
+        return self.ttl > 0 and time.monotonic() - self.loaded_at >= self.ttl
+    
+    def _reload(self):
+        with self._lock:
+            # Ein anderer Thread hat währenddessen bereits neu geladen
+            snapshot = self.snapshot
+            if snapshot is not None and snapshot.version == self.version and not self._expired():
+                return snapshot
+            
+            version = self.version
+            snapshot = load_reference_data(version)
+            self.snapshot = snapshot
+            self.loaded_at = time.monotonic()
+            return snapshot
+    
+    def invalidate(self):
+        """Verwirft den Snapshot; der nächste Zugriff lädt neu"""
+        with self._lock:
+            self.version += 1
+    
+    def warm_up(self):
+        """Lädt den Snapshot beim Start vor (ohne Fehler, falls die Tabellen noch fehlen)"""
+        try:
+            with self.app.app_context():
+                self.get()
+        except SQLAlchemyError:
+            self.app.logger.info('Stammdaten-Cache wird beim ersten Zugriff geladen')
+
+
+def init_reference_data(app):
+    """Registriert den Stammdaten-Cache an der App und lädt ihn vor"""
+    cache = ReferenceCache(app, app.config['REFERENCE_CACHE_TTL'])
+    app.extensions['reference_data'] = cache
+    if app.config['REFERENCE_CACHE_PRELOAD']:
+        cache.warm_up()
+
+
+def get_reference_data():
+    """Stammdaten-Snapshot der aktuellen App"""
+    return current_app.extensions['reference_data'].get()
+
+
+def invalidate_reference_data():
+    """Verwirft den Stammdaten-Cache nach Schreibzugriffen am ORM vorbei"""
+    cache = current_app.extensions.get('reference_data')
+    if cache is not None:
+        cache.invalidate()
+
+
+# ---------------------------------------------------------------------------
+# Automatische Invalidierung über die ORM-Session
+# ---------------------------------------------------------------------------
+
+_REFERENCE_MODELS = (Product, User)
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_reference_changes(session, flush_context):
+    if any(isinstance(obj, _REFERENCE_MODELS)
+           for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['reference_data_changed'] = True
+
+
+# Nach einem Rollback bleibt die Markierung stehen; der nächste Commit
+# verwirft den Snapshot dann einmal zu viel, aber nie zu wenig.
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop('reference_data_changed', False) and has_app_context():
+        invalidate_reference_data()
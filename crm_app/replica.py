@@ -0,0 +1,84 @@
+"""
+Lese-/Schreib-Trennung mit optionaler Lese-Replica
+
+Ist SQLALCHEMY_REPLICA_URI gesetzt (z.B. eine replizierte SQLite-Kopie oder
+dieselbe Datei read-only: sqlite:///file:crm.db?mode=ro&uri=true), laufen
+GET-Requests der Kunden-, Bestell- und Kontaktseiten, der JSON-API sowie
+das Dashboard gegen diese zweite Engine. Alles andere bleibt auf der primären Datenbank:
+
+- POST-Requests und andere schreibende Methoden
+- jeder Flush und jedes INSERT/UPDATE/DELETE; danach liest auch der Rest
+  des Requests von der primären Datenbank
+- die Requests der nächsten REPLICA_PIN_SECONDS Sekunden nach einem
+  schreibenden Request desselben Benutzers (die Replica könnte der
+  eigenen Änderung noch hinterherhinken, z.B. beim Redirect nach dem Speichern)
+
+Dieses Modul importiert models nicht, weil models.py die RoutingSession
+beim Anlegen von db benötigt.
+"""
+
+import time
+from flask import current_app, request, session
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND_KEY = 'replica'
+
+# Blueprints, deren GET-Routen von der Replica lesen (zusätzlich das Dashboard)
+REPLICA_BLUEPRINTS = ('customers', 'orders', 'contacts', 'api')
+REPLICA_ENDPOINTS = ('index',)
+
+_SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    """Session, die Lesezugriffe auf Wunsch an die Replica-Engine gibt"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('read_replica'):
+            if self._flushing or getattr(clause, 'is_dml', False):
+                # Ab dem ersten Schreibzugriff bleibt der Request auf der primären Datenbank
+                self.info['read_replica'] = False
+            elif clause is None or clause.is_select:
+                # Textuelles SQL (text()) kann auch schreiben und geht immer an die primäre
+                engine = self._db.engines.get(REPLICA_BIND_KEY)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_enabled():
+    """True, wenn für die aktuelle App eine Replica konfiguriert ist"""
+    return bool(current_app.config.get('SQLALCHEMY_REPLICA_URI'))
+
+
+def use_read_replica():
+    """Leitet die Lesezugriffe der aktuellen Session an die Replica (falls konfiguriert)"""
+    if replica_enabled():
+        current_app.extensions['sqlalchemy'].session.info['read_replica'] = True
+
+
+def _pinned_to_primary():
+    return session.get('db_primary_until', 0) > time.time()
+
+
+def _route_request():
+    if request.method not in ('GET', 'HEAD'):
+        return
+    if request.blueprint not in REPLICA_BLUEPRINTS and request.endpoint not in REPLICA_ENDPOINTS:
+        return
+    if not _pinned_to_primary():
+        use_read_replica()
+
+
+def _pin_after_write(response):
+    if request.method not in _SAFE_METHODS:
+        session['db_primary_until'] = time.time() + current_app.config['REPLICA_PIN_SECONDS']
+    return response
+
+
+def init_read_replica(app):
+    """Registriert das Request-Routing, sofern SQLALCHEMY_REPLICA_URI gesetzt ist"""
+    if not app.config.get('SQLALCHEMY_REPLICA_URI'):
+        return
+    app.before_request(_route_request)
+    app.after_request(_pin_after_write)
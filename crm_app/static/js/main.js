@@ -12,8 +12,20 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Datumsfilter-Validierung
     initDateValidation();
+    
+    // Kundenauswahl mit Typeahead
+    initCustomerPickers();
+    
+    // Fortschritt laufender Hintergrund-Jobs
+    initJobProgress();
 });
 
+// Wartezeit nach dem letzten Tastendruck, bevor gesucht wird (ms)
+const CUSTOMER_SEARCH_DELAY = 250;
+
+// Abfrageintervall für den Status laufender Jobs (ms)
+const JOB_POLL_INTERVAL = 2000;
+
 /**
  * Macht Tabellenzeilen klickbar
  */
@@ -80,6 +92,160 @@ function initDateValidation() {
     }
 }
 
+/**
+ * Kundenauswahl mit Typeahead (macros/customer_picker.html)
+ * 
+ * Sucht nach einer kurzen Tipppause über /customers/search und bricht
+ * veraltete Anfragen ab. Die Kunden-ID landet im versteckten Feld; solange
+ * kein Treffer ausgewählt ist, lässt sich das Formular nicht absenden.
+ */
+function initCustomerPickers() {
+    document.querySelectorAll('.customer-picker').forEach(picker => {
+        const input = picker.querySelector('.customer-picker-input');
+        const valueInput = picker.querySelector('.customer-picker-value');
+        const results = picker.querySelector('.customer-picker-results');
+        let timer = null;
+        let controller = null;
+        let activeIndex = -1;
+        
+        function showResults(visible) {
+            results.classList.toggle('d-none', !visible);
+            input.setAttribute('aria-expanded', visible ? 'true' : 'false');
+        }
+        
+        function setActive(index) {
+            const items = results.querySelectorAll('.list-group-item');
+            items.forEach((item, i) => item.classList.toggle('active', i === index));
+            activeIndex = index;
+        }
+        
+        function selectCustomer(item) {
+            valueInput.value = item.dataset.id;
+            input.value = item.dataset.label;
+            input.setCustomValidity('');
+            showResults(false);
+        }
+        
+        function renderResults(customers) {
+            results.innerHTML = '';
+            activeIndex = -1;
+            
+            if (customers.length === 0) {
+                const empty = document.createElement('div');
+                empty.className = 'list-group-item text-muted';
+                empty.textContent = 'Kein Kunde gefunden';
+                results.appendChild(empty);
+            }
+            
+            customers.forEach(customer => {
+                const label = customer.email ? `${customer.name} (${customer.email})` : customer.name;
+                const item = document.createElement('button');
+                item.type = 'button';
+                item.className = 'list-group-item list-group-item-action';
+                item.setAttribute('role', 'option');
+                item.dataset.id = customer.id;
+                item.dataset.label = label;
+                item.textContent = label;
+                // mousedown statt click: feuert vor dem blur des Eingabefelds
+                item.addEventListener('mousedown', function(e) {
+                    e.preventDefault();
+                    selectCustomer(this);
+                });
+                results.appendChild(item);
+            });
+            
+            showResults(true);
+        }
+        
+        function search() {
+            const query = input.value.trim();
+            if (controller) {
+                controller.abort();
+            }
+            if (!query) {
+                showResults(false);
+                return;
+            }
+            
+            controller = new AbortController();
+            const url = `${picker.dataset.searchUrl}?q=${encodeURIComponent(query)}`;
+            fetch(url, { signal: controller.signal })
+                .then(response => response.json())
+                .then(data => renderResults(data.results))
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        console.error('Error loading customers:', error);
+                    }
+                });
+        }
+        
+        input.addEventListener('input', function() {
+            valueInput.value = '';
+            input.setCustomValidity(input.value ? 'Bitte wählen Sie einen Kunden aus der Liste aus' : '');
+            clearTimeout(timer);
+            timer = setTimeout(search, CUSTOMER_SEARCH_DELAY);
+        });
+        
+        input.addEventListener('keydown', function(e) {
+            const items = results.querySelectorAll('.list-group-item-action');
+            if (results.classList.contains('d-none') || items.length === 0) {
+                return;
+            }
+            
+            if (e.key === 'ArrowDown') {
+                e.preventDefault();
+                setActive(Math.min(activeIndex + 1, items.length - 1));
+            } else if (e.key === 'ArrowUp') {
+                e.preventDefault();
+                setActive(Math.max(activeIndex - 1, 0));
+            } else if (e.key === 'Enter' && activeIndex >= 0) {
+                e.preventDefault();
+                selectCustomer(items[activeIndex]);
+            } else if (e.key === 'Escape') {
+                showResults(false);
+            }
+        });
+        
+        input.addEventListener('blur', () => showResults(false));
+    });
+}
+
+/**
+ * Aktualisiert Fortschrittsbalken wartender/laufender Jobs (Zeilen mit data-job-url);
+ * ist ein Job fertig, wird die Seite mit dem Ergebnis neu geladen
+ */
+function initJobProgress() {
+    const rows = document.querySelectorAll('[data-job-url]');
+    if (rows.length === 0) {
+        return;
+    }
+    
+    function poll() {
+        const requests = Array.from(rows).map(row =>
+            fetch(row.dataset.jobUrl)
+                .then(response => response.json())
+                .then(job => {
+                    const bar = row.querySelector('[data-job-progress]');
+                    bar.style.width = `${job.progress}%`;
+                    bar.textContent = `${job.progress} %`;
+                    row.querySelector('[data-job-message]').textContent = job.progress_message || '';
+                    return job.status === 'queued' || job.status === 'running';
+                })
+        );
+        Promise.all(requests)
+            .then(active => {
+                if (active.some(Boolean)) {
+                    setTimeout(poll, JOB_POLL_INTERVAL);
+                } else {
+                    window.location.reload();
+                }
+            })
+            .catch(error => console.error('Error loading job status:', error));
+    }
+    
+    setTimeout(poll, JOB_POLL_INTERVAL);
+}
+
 /**
  * Lädt Umsatzdaten per AJAX (für zukünftige Erweiterungen)
  */
@@ -0,0 +1,45 @@
+"""
+Jinja-Bytecode-Cache und Vorkompilieren der Templates
+
+Jeder neu gestartete Worker übersetzt ein Template beim ersten Rendern von
+Jinja-Quelltext in Python-Code und kompiliert diesen. Der Bytecode-Cache legt
+das Ergebnis als Datei ab (JINJA_BYTECODE_CACHE_DIR, Standard:
+instance/jinja_cache); weitere Worker und Neustarts laden es von dort.
+Geänderte Templates erkennt Jinja an der Prüfsumme des Quelltexts und
+übersetzt sie neu.
+    
+    flask --app app precompile-templates   # Cache beim Deployment füllen
+
+Mit TEMPLATE_PRECOMPILE=1 lädt zusätzlich create_app() alle Templates,
+sodass schon der erste Request jedes Workers keine Templates mehr lädt.
+"""
+
+import os
+import time
+from jinja2 import FileSystemBytecodeCache
+
+
+def init_template_cache(app):
+    """Richtet den Bytecode-Cache ein und kompiliert bei Bedarf alle Templates vor"""
+    directory = app.config['JINJA_BYTECODE_CACHE_DIR']
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    
+    if app.config['TEMPLATE_PRECOMPILE']:
+        compiled, elapsed = precompile_templates(app)
+        app.logger.info('%d Templates in %.0f ms geladen', compiled, elapsed * 1000)
+
+
+def precompile_templates(app):
+    """
+    Lädt alle Templates der App (füllt Bytecode-Cache und Template-Cache).
+    
+    Liefert (Anzahl, Sekunden). Syntaxfehler werden nicht abgefangen, damit
+    ein fehlerhaftes Template schon beim Deployment auffällt.
+    """
+    started = time.perf_counter()
+    names = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names), time.perf_counter() - started
@@ -0,0 +1,277 @@
+"""
+Versionierte JSON-API (nur lesend) für Integrationen
+
+Jede Antwort trägt einen starken ETag, der nur aus den Zeilenversionen
+(Spalte version) berechnet wird. Stimmt er mit If-None-Match überein, wird
+304 geliefert, bevor Datensätze geladen, Positionen oder Monatsumsätze
+abgefragt und JSON serialisiert werden. Ein Abruf, bei dem sich nichts
+geändert hat, kostet damit eine einzige Indexabfrage.
+
+Listen werden aufsteigend nach ID geblättert (?after=<letzte ID>&limit=N).
+"""
+
+import hashlib
+from datetime import date, datetime
+from flask import Blueprint, abort, current_app, jsonify, request, url_for
+from sqlalchemy.orm import selectinload
+from models import db, Customer, Order, Contact, CustomerMonthlyRevenue, month_start
+from crm_app.database import SQLITE_MAX_INTEGER
+from crm_app.exports import json_value
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+# Anzahl Monate (inkl. aktuellem) im monthly_revenue-Block eines Kunden
+REVENUE_MONTHS = 12
+
+
+@api_bp.errorhandler(400)
+def bad_request(e):
+    """400 als JSON mit der Beschreibung aus abort()"""
+    return jsonify({'error': e.description}), 400
+
+
+@api_bp.errorhandler(404)
+def not_found(e):
+    """404 als JSON statt der HTML-Fehlerseite"""
+    return jsonify({'error': 'Nicht gefunden'}), 404
+
+
+def _id_arg(name, minimum=1):
+    """
+    Ganzzahliger ID-Parameter aus dem Query-String (None, wenn er fehlt).
+    
+    Werte außerhalb von minimum..SQLITE_MAX_INTEGER würden erst beim Binden
+    scheitern und werden vorher mit 400 abgewiesen.
+    """
+    value = request.args.get(name, '')
+    if not value:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = None
+    if number is None or not minimum <= number <= SQLITE_MAX_INTEGER:
+        abort(400, description=f'{name} muss eine ganze Zahl von {minimum} bis {SQLITE_MAX_INTEGER} sein')
+    return number
+
+
+# ---------------------------------------------------------------------------
+# ETag / bedingte Antworten
+# ---------------------------------------------------------------------------
+
+def _conditional_response(etag, build, last_modified=None):
+    """
+    304 bei passendem If-None-Match, sonst das Ergebnis von build() als JSON.
+    
+    build wird nur aufgerufen, wenn sich der ETag geändert hat, und liefert
+    (payload, etag); der zweite ETag beschreibt die tatsächlich geladenen Zeilen.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        payload, etag = build()
+        response = jsonify(payload)
+    
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Clients dürfen die Antwort speichern, müssen aber jedes Mal nachfragen
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _page_etag(resource, keys, has_more):
+    """ETag einer Listenseite aus den (id, version)-Paaren ihrer Zeilen"""
+    digest = hashlib.sha1(f'{resource}|{int(has_more)}|'.encode('ascii'))
+    for row_id, version in keys:
+        digest.update(f'{row_id}:{version},'.encode('ascii'))
+    return f'{resource}-{digest.hexdigest()}'
+
+
+def _row_version(model, row_id):
+    """(version, updated_at) einer Zeile oder 404"""
+    if row_id > SQLITE_MAX_INTEGER:
+        abort(404)
+    row = db.session.execute(
+        db.select(model.version, model.updated_at).where(model.id == row_id)
+    ).first()
+    if row is None:
+        abort(404)
+    return row
+
+
+def _paged_list(resource, model, conditions, load_page, serialize, endpoint, **params):
+    """
+    Listenseite mit ETag: zuerst nur (id, version) über den Primärschlüssel,
+    die vollständigen Zeilen (load_page) erst, wenn sich der ETag geändert hat.
+    """
+    after = _id_arg('after', minimum=0) or 0
+    limit = max(1, min(request.args.get('limit', DEFAULT_LIMIT, type=int), MAX_LIMIT))
+    
+    keys = db.session.execute(
+        db.select(model.id, model.version)
+          .where(*conditions, model.id > after)
+          .order_by(model.id)
+          .limit(limit + 1)
+    ).all()
+    has_more = len(keys) > limit
+    keys = keys[:limit]
+    
+    def build():
+        rows = load_page([row_id for row_id, _ in keys]) if keys else []
+        next_url = None
+        if has_more and rows:
+            next_url = url_for(endpoint, after=rows[-1].id, limit=limit, **params)
+        payload = {'data': [serialize(row) for row in rows], 'next': next_url}
+        return payload, _page_etag(resource, [(row.id, row.version) for row in rows], has_more)
+    
+    return _conditional_response(_page_etag(resource, keys, has_more), build)
+
+
+# ---------------------------------------------------------------------------
+# Serialisierung
+# ---------------------------------------------------------------------------
+
+def _row_json(row, fields):
+    return {field: json_value(getattr(row, field)) for field in fields}
+
+
+CUSTOMER_FIELDS = ('id', 'first_name', 'last_name', 'email', 'phone', 'created_at',
+                   'total_revenue', 'order_count', 'last_contact_at', 'score', 'score_rating',
+                   'version', 'updated_at')
+ORDER_FIELDS = ('id', 'customer_id', 'order_date', 'status', 'total_amount', 'version', 'updated_at')
+ORDER_ITEM_FIELDS = ('id', 'product_id', 'quantity', 'unit_price')
+CONTACT_FIELDS = ('id', 'customer_id', 'user_id', 'channel', 'subject', 'notes', 'contact_time',
+                  'version', 'updated_at')
+
+
+def _customer_json(customer):
+    return _row_json(customer, CUSTOMER_FIELDS)
+
+
+def _order_json(order):
+    data = _row_json(order, ORDER_FIELDS)
+    data['items'] = [_row_json(item, ORDER_ITEM_FIELDS) for item in order.items]
+    return data
+
+
+def _contact_json(contact):
+    return _row_json(contact, CONTACT_FIELDS)
+
+
+def _first_revenue_month(current_month):
+    index = current_month.year * 12 + current_month.month - REVENUE_MONTHS
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _monthly_revenue(customer_id, current_month):
+    """Umsatz der letzten REVENUE_MONTHS Monate aus customer_monthly_revenue"""
+    rows = CustomerMonthlyRevenue.query.filter(
+        CustomerMonthlyRevenue.customer_id == customer_id,
+        CustomerMonthlyRevenue.month >= _first_revenue_month(current_month),
+    ).order_by(CustomerMonthlyRevenue.month)
+    return [
+        {'month': f'{row.month:%Y-%m}', 'revenue': str(row.revenue), 'order_count': row.order_count}
+        for row in rows
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Kunden
+# ---------------------------------------------------------------------------
+
+@api_bp.route('/customers')
+def list_customers():
+    """Kunden (ohne Monatsumsätze), aufsteigend nach ID"""
+    return _paged_list(
+        'customers', Customer, [],
+        lambda ids: Customer.query.filter(Customer.id.in_(ids)).order_by(Customer.id).all(),
+        _customer_json, 'api.list_customers',
+    )
+
+
+@api_bp.route('/customers/<int:customer_id>')
+def get_customer(customer_id):
+    """Ein Kunde mit Kennzahlen und Umsatz der letzten 12 Monate"""
+    version, updated_at = _row_version(Customer, customer_id)
+    # Der Monatsblock verschiebt sich mit dem Kalendermonat, daher gehört er in den ETag
+    current_month = month_start(datetime.utcnow())
+    etag = f'customer-{customer_id}-v{version}-{current_month:%Y%m}'
+    
+    def build():
+        customer = db.session.get(Customer, customer_id)
+        if customer is None:
+            abort(404)
+        data = _customer_json(customer)
+        data['monthly_revenue'] = _monthly_revenue(customer_id, current_month)
+        return data, f'customer-{customer_id}-v{customer.version}-{current_month:%Y%m}'
+    
+    return _conditional_response(etag, build, last_modified=updated_at)
+
+
+# ---------------------------------------------------------------------------
+# Bestellungen
+# ---------------------------------------------------------------------------
+
+def _load_orders(ids):
+    return Order.query.options(selectinload(Order.items))\
+                      .filter(Order.id.in_(ids)).order_by(Order.id).all()
+
+
+@api_bp.route('/orders')
+def list_orders():
+    """Bestellungen mit Positionen, optional gefiltert nach ?customer_id="""
+    customer_id = _id_arg('customer_id')
+    conditions = [Order.customer_id == customer_id] if customer_id else []
+    params = {'customer_id': customer_id} if customer_id else {}
+    return _paged_list('orders', Order, conditions, _load_orders, _order_json,
+                       'api.list_orders', **params)
+
+
+@api_bp.route('/orders/<int:order_id>')
+def get_order(order_id):
+    """Eine Bestellung mit Positionen"""
+    version, updated_at = _row_version(Order, order_id)
+    
+    def build():
+        orders = _load_orders([order_id])
+        if not orders:
+            abort(404)
+        return _order_json(orders[0]), f'order-{order_id}-v{orders[0].version}'
+    
+    return _conditional_response(f'order-{order_id}-v{version}', build, last_modified=updated_at)
+
+
+# ---------------------------------------------------------------------------
+# Kontakte
+# ---------------------------------------------------------------------------
+
+def _load_contacts(ids):
+    return Contact.query.filter(Contact.id.in_(ids)).order_by(Contact.id).all()
+
+
+@api_bp.route('/contacts')
+def list_contacts():
+    """Kontakte, optional gefiltert nach ?customer_id="""
+    customer_id = _id_arg('customer_id')
+    conditions = [Contact.customer_id == customer_id] if customer_id else []
+    params = {'customer_id': customer_id} if customer_id else {}
+    return _paged_list('contacts', Contact, conditions, _load_contacts, _contact_json,
+                       'api.list_contacts', **params)
+
+
+@api_bp.route('/contacts/<int:contact_id>')
+def get_contact(contact_id):
+    """Ein Kontakt"""
+    version, updated_at = _row_version(Contact, contact_id)
+    
+    def build():
+        contacts = _load_contacts([contact_id])
+        if not contacts:
+            abort(404)
+        return _contact_json(contacts[0]), f'contact-{contact_id}-v{contacts[0].version}'
+    
+    return _conditional_response(f'contact-{contact_id}-v{version}', build, last_modified=updated_at)
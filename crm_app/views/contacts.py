@@ -3,8 +3,14 @@ Views für Kontakt-bezogene Routen
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from models import db, Contact, Customer, User
+from models import db, Contact, Customer
 from datetime import datetime
+from sqlalchemy.orm import contains_eager, joinedload
+from crm_app.pagination import keyset_paginate
+from crm_app.dashboard import invalidate_dashboard
+from crm_app.database import commit_with_retry
+from crm_app.reference import get_reference_data
+from crm_app.exports import contact_export_query, parse_date_range, stream_export
 
 contacts_bp = Blueprint('contacts', __name__, url_prefix='/contacts')
 
@@ -17,21 +23,20 @@ CONTACT_CHANNELS = ['Telefon', 'E-Mail', 'Meeting', 'Chat']
 @contacts_bp.route('/')
 def list_contacts():
     """Globale Kontaktübersicht mit Filterung und Pagination"""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '', type=str)
     channel_filter = request.args.get('channel', '', type=str)
     
-    # Basis-Query mit JOIN auf Customer
-    query = Contact.query.join(Customer)
+    # Basis-Query mit JOIN auf Customer (Kunde und Mitarbeiter werden gleich mitgeladen)
+    query = Contact.query.join(Customer).options(contains_eager(Contact.customer),
+                                                 joinedload(Contact.user))
     
     # Filter nach Kontaktart
     if channel_filter and channel_filter in CONTACT_CHANNELS:
         query = query.filter(Contact.channel == channel_filter)
     
-    # Sortierung: Chronologisch, neueste zuerst
-    query = query.order_by(Contact.contact_time.desc())
-    
-    # Pagination
-    pagination = query.paginate(page=page, per_page=ITEMS_PER_PAGE, error_out=False)
+    # Keyset-Pagination: Chronologisch, neueste zuerst (Index idx_contact_time)
+    pagination = keyset_paginate(query, Contact.contact_time, Contact.id,
+                                 cursor=cursor, per_page=ITEMS_PER_PAGE)
     contacts = pagination.items
     
     return render_template('contacts/list.html',
@@ -41,10 +46,28 @@ def list_contacts():
                          available_channels=CONTACT_CHANNELS)
 
 
+@contacts_bp.route('/export.<fmt>')
+def export_contacts(fmt):
+    """Export der Kontaktübersicht (inkl. Kontaktart-Filter und optional from/to) als CSV oder NDJSON"""
+    channel_filter = request.args.get('channel', '', type=str)
+    start, end = parse_date_range(request.args.get('from'), request.args.get('to'))
+    
+    query = contact_export_query()
+    if channel_filter and channel_filter in CONTACT_CHANNELS:
+        query = query.where(Contact.channel == channel_filter)
+    if start:
+        query = query.where(Contact.contact_time >= start)
+    if end:
+        query = query.where(Contact.contact_time < end)
+    
+    return stream_export(query, fmt, 'kontakte')
+
+
 @contacts_bp.route('/<int:contact_id>')
 def contact_detail(contact_id):
     """Detailansicht eines Kontakts"""
-    contact = Contact.query.get_or_404(contact_id)
+    contact = Contact.query.options(joinedload(Contact.customer),
+                                    joinedload(Contact.user)).get_or_404(contact_id)
     
     return render_template('contacts/detail.html',
                          contact=contact)
@@ -65,22 +88,16 @@ def new_contact():
         # Validierung
         if not customer_id:
             flash('Bitte wählen Sie einen Kunden aus!', 'danger')
-            customers = Customer.query.order_by(Customer.last_name, Customer.first_name).all()
-            users = User.query.order_by(User.name).all()
             return render_template('contacts/new.html',
-                                 customers=customers,
-                                 users=users,
+                                 users=get_reference_data().users,
                                  channels=CONTACT_CHANNELS)
         
         if not channel or channel not in CONTACT_CHANNELS:
             flash('Bitte wählen Sie eine gültige Kontaktart aus!', 'danger')
-            customers = Customer.query.order_by(Customer.last_name, Customer.first_name).all()
-            users = User.query.order_by(User.name).all()
             return render_template('contacts/new.html',
-                                 customers=customers,
-                                 users=users,
+                                 users=get_reference_data().users,
                                  channels=CONTACT_CHANNELS,
-                                 selected_customer_id=customer_id)
+                                 selected_customer=db.session.get(Customer, customer_id))
         
         # Erstelle Kontakt-Zeitpunkt
         if contact_date and contact_time:
@@ -102,8 +119,8 @@ def new_contact():
         )
         
         try:
-            db.session.add(new_contact)
-            db.session.commit()
+            commit_with_retry(lambda: db.session.add(new_contact))
+            invalidate_dashboard()
             
             customer = Customer.query.get(customer_id)
             flash(f'Kontakt mit {customer.full_name} erfolgreich erstellt!', 'success')
@@ -112,15 +129,14 @@ def new_contact():
             db.session.rollback()
             flash(f'Fehler beim Erstellen des Kontakts: {str(e)}', 'danger')
     
-    # GET: Zeige Formular
-    customers = Customer.query.order_by(Customer.last_name, Customer.first_name).all()
-    users = User.query.order_by(User.name).all()
+    # GET: Zeige Formular (Kunden werden per Typeahead gesucht, siehe customers.customer_search)
+    users = get_reference_data().users
     
     # Wenn customer_id in URL, vorselektieren
     preselected_customer_id = request.args.get('customer_id', type=int)
+    preselected_customer = db.session.get(Customer, preselected_customer_id) if preselected_customer_id else None
     
     return render_template('contacts/new.html',
-                         customers=customers,
                          users=users,
                          channels=CONTACT_CHANNELS,
-                         selected_customer_id=preselected_customer_id)
+                         selected_customer=preselected_customer)
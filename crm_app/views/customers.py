@@ -3,27 +3,54 @@ Views für Kunden-bezogene Routen
 """
 
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
-from models import db, Customer, Order, Contact
+from models import (db, Customer, Order, Contact, CUSTOMER_RATINGS, customer_search_subquery,
+                    customer_typeahead, get_revenue_matrix)
 from datetime import datetime, date
-from sqlalchemy import or_, func
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+from crm_app.counting import counted_paginate
+from crm_app.pagination import keyset_paginate
+from crm_app.dashboard import invalidate_dashboard
+from crm_app.database import commit_with_retry, SQLITE_MAX_INTEGER
+from crm_app.exports import order_export_query, contact_export_query, stream_export
 
 customers_bp = Blueprint('customers', __name__, url_prefix='/customers')
 
 ITEMS_PER_PAGE = 25
 
+# Obergrenzen für den Batch-Umsatz-Endpoint
+MAX_BATCH_CUSTOMERS = 500
+MAX_BATCH_RANGES = 12
+MAX_BATCH_BODY_BYTES = 64 * 1024
+
+# Trefferanzahl der Kundenauswahl in Formularen (Standard / Maximum)
+TYPEAHEAD_LIMIT = 10
+MAX_TYPEAHEAD_LIMIT = 50
+
 
 @customers_bp.route('/')
 def list_customers():
     """Liste aller Kunden mit Suchfunktion und Pagination"""
     page = request.args.get('page', 1, type=int)
     search_query = request.args.get('q', '', type=str)
-    sort_by = request.args.get('sort', 'name', type=str)  # name, last_contact
+    # name, last_contact, score, relevance (nur bei Suche)
+    sort_by = request.args.get('sort', 'relevance' if search_query else 'name', type=str)
+    rating_filter = request.args.get('rating', '', type=str)
     
     # Basis-Query
     query = Customer.query
     
-    # Suchfilter
-    if search_query:
+    # Filter nach gespeichertem Rating (Index idx_customer_rating_score)
+    if rating_filter in CUSTOMER_RATINGS:
+        query = query.filter(Customer.score_rating == rating_filter)
+    else:
+        rating_filter = ''
+    
+    # Suchfilter: Volltextindex mit Präfixsuche, sonst ILIKE als Fallback
+    search_results = customer_search_subquery(search_query) if search_query else None
+    if search_results is not None:
+        query = query.join(search_results, search_results.c.customer_id == Customer.id)
+    elif search_query:
         search_pattern = f"%{search_query}%"
         query = query.filter(
             or_(
@@ -34,28 +61,34 @@ def list_customers():
             )
         )
     
+    if sort_by == 'relevance' and search_results is None:
+        sort_by = 'name'
+    
     # Sortierung
-    if sort_by == 'name':
+    if sort_by == 'relevance':
+        query = query.order_by(search_results.c.rank, Customer.last_name, Customer.first_name)
+    elif sort_by == 'name':
         query = query.order_by(Customer.last_name, Customer.first_name)
     elif sort_by == 'last_contact':
-        # Subquery für letzten Kontakt
-        subquery = db.session.query(
-            Contact.customer_id,
-            func.max(Contact.contact_time).label('last_contact')
-        ).group_by(Contact.customer_id).subquery()
-        
-        query = query.outerjoin(subquery, Customer.id == subquery.c.customer_id)\
-                    .order_by(subquery.c.last_contact.desc().nullslast())
+        # Gespeicherter letzter Kontakt (Index idx_customer_last_contact)
+        query = query.order_by(Customer.last_contact_at.desc().nullslast())
+    elif sort_by == 'score':
+        # Gespeicherter Score, bei Gleichstand neueste Kunden zuerst (Index idx_customer_score)
+        query = query.order_by(Customer.score.desc(), Customer.id.desc())
     
-    # Pagination
-    pagination = query.paginate(page=page, per_page=ITEMS_PER_PAGE, error_out=False)
+    # Pagination; Gesamtanzahl aus Zähler bzw. Cache statt count(*) (crm_app/counting.py)
+    filter_key = (search_query, rating_filter) if search_query or rating_filter else None
+    pagination = counted_paginate(query, 'customers', filter_key,
+                                  page=page, per_page=ITEMS_PER_PAGE)
     customers = pagination.items
     
     return render_template('customers/list.html',
                          customers=customers,
                          pagination=pagination,
                          search_query=search_query,
-                         sort_by=sort_by)
+                         sort_by=sort_by,
+                         rating_filter=rating_filter,
+                         ratings=CUSTOMER_RATINGS)
 
 
 @customers_bp.route('/<int:customer_id>')
@@ -63,27 +96,32 @@ def customer_detail(customer_id):
     """Detailansicht eines Kunden mit KPIs und Tabs"""
     customer = Customer.query.get_or_404(customer_id)
     
-    # KPIs berechnen
-    # 1. Gesamtumsatz
-    total_revenue = customer.get_total_revenue()
-    
-    # 2. Umsatz letztes Jahr (2024)
-    last_year_start = date(2024, 1, 1)
-    last_year_end = date(2024, 12, 31)
-    last_year_revenue = customer.get_total_revenue(last_year_start, last_year_end)
-    
-    # 3. Umsatz im gewählten Zeitraum (falls vorhanden)
     date_from = request.args.get('from', type=str)
     date_to = request.args.get('to', type=str)
     
-    filtered_revenue = None
-    if date_from and date_to:
-        try:
-            start_date = datetime.strptime(date_from, '%Y-%m-%d').date()
-            end_date = datetime.strptime(date_to, '%Y-%m-%d').date()
-            filtered_revenue = customer.get_total_revenue(start_date, end_date)
-        except ValueError:
-            pass  # Ungültiges Datumsformat
+    def revenue_kpis():
+        """KPIs; vom Template nur aufgerufen, wenn das KPI-Fragment nicht im Cache liegt"""
+        # 1. Gesamtumsatz
+        total_revenue = customer.get_total_revenue()
+        
+        # 2. Umsatz letztes Jahr (2024)
+        last_year_start = date(2024, 1, 1)
+        last_year_end = date(2024, 12, 31)
+        last_year_revenue = customer.get_total_revenue(last_year_start, last_year_end)
+        
+        # 3. Umsatz im gewählten Zeitraum (falls vorhanden)
+        filtered_revenue = None
+        if date_from and date_to:
+            try:
+                start_date = datetime.strptime(date_from, '%Y-%m-%d').date()
+                end_date = datetime.strptime(date_to, '%Y-%m-%d').date()
+                filtered_revenue = customer.get_total_revenue(start_date, end_date)
+            except ValueError:
+                pass  # Ungültiges Datumsformat
+        
+        return {'total_revenue': total_revenue,
+                'last_year_revenue': last_year_revenue,
+                'filtered_revenue': filtered_revenue}
     
     # Letzte Bestellungen
     recent_orders = Order.query.filter_by(customer_id=customer_id)\
@@ -92,20 +130,19 @@ def customer_detail(customer_id):
                                .all()
     
     # Letzte Kontakte
-    recent_contacts = Contact.query.filter_by(customer_id=customer_id)\
+    recent_contacts = Contact.query.options(joinedload(Contact.user))\
+                                   .filter_by(customer_id=customer_id)\
                                    .order_by(Contact.contact_time.desc())\
                                    .limit(10)\
                                    .all()
     
     # Anzahl Bestellungen und Kontakte
-    order_count = Order.query.filter_by(customer_id=customer_id).count()
+    order_count = customer.order_count
     contact_count = Contact.query.filter_by(customer_id=customer_id).count()
     
     return render_template('customers/detail.html',
                          customer=customer,
-                         total_revenue=total_revenue,
-                         last_year_revenue=last_year_revenue,
-                         filtered_revenue=filtered_revenue,
+                         revenue_kpis=revenue_kpis,
                          date_from=date_from,
                          date_to=date_to,
                          recent_orders=recent_orders,
@@ -114,6 +151,29 @@ def customer_detail(customer_id):
                          contact_count=contact_count)
 
 
+@customers_bp.route('/search')
+def customer_search():
+    """
+    API-Endpoint für die Kundenauswahl in Formularen (Präfixsuche).
+    
+    GET /customers/search?q=berg&limit=10 liefert die besten Treffer nach
+    Nachname, "Nachname Vorname", E-Mail oder Kundennummer.
+    """
+    search_query = request.args.get('q', '', type=str)
+    limit = request.args.get('limit', TYPEAHEAD_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_TYPEAHEAD_LIMIT))
+    
+    customers = customer_typeahead(search_query, limit=limit)
+    
+    return jsonify({
+        'query': search_query,
+        'results': [
+            {'id': customer.id, 'name': customer.full_name, 'email': customer.email}
+            for customer in customers
+        ],
+    })
+
+
 @customers_bp.route('/<int:customer_id>/revenue')
 def customer_revenue(customer_id):
     """API-Endpoint für Umsatzberechnung mit Datumsfilter"""
@@ -142,15 +202,71 @@ def customer_revenue(customer_id):
     })
 
 
+@customers_bp.route('/revenue', methods=['POST'])
+def customer_revenue_batch():
+    """
+    API-Endpoint für Umsätze vieler Kunden in mehreren Zeiträumen.
+    
+    Erwartet JSON {"customer_ids": [1, 2], "ranges": [{"from": "2024-01-01", "to": "2024-12-31"}]}
+    und liefert eine Matrix mit einer Zeile pro Kunde und einer Spalte pro Zeitraum.
+    """
+    if request.content_length is None:
+        # Chunked Uploads ohne Längenangabe werden nicht gelesen
+        return jsonify({'error': 'Content-Length erforderlich'}), 411
+    if request.content_length > MAX_BATCH_BODY_BYTES:
+        return jsonify({'error': f'Anfrage zu groß (maximal {MAX_BATCH_BODY_BYTES // 1024} KB)'}), 413
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'JSON-Body erwartet'}), 400
+    
+    customer_ids = data.get('customer_ids')
+    ranges = data.get('ranges')
+    if not isinstance(customer_ids, list) or not customer_ids \
+            or not all(isinstance(customer_id, int) and not isinstance(customer_id, bool)
+                       and 0 < customer_id <= SQLITE_MAX_INTEGER for customer_id in customer_ids):
+        return jsonify({'error': 'customer_ids muss eine Liste positiver Kunden-IDs sein'}), 400
+    if not isinstance(ranges, list) or not ranges or not all(isinstance(r, dict) for r in ranges):
+        return jsonify({'error': 'ranges muss eine Liste von {"from", "to"} sein'}), 400
+    
+    customer_ids = list(dict.fromkeys(customer_ids))
+    if len(customer_ids) > MAX_BATCH_CUSTOMERS:
+        return jsonify({'error': f'Maximal {MAX_BATCH_CUSTOMERS} Kunden pro Anfrage'}), 400
+    if len(ranges) > MAX_BATCH_RANGES:
+        return jsonify({'error': f'Maximal {MAX_BATCH_RANGES} Zeiträume pro Anfrage'}), 400
+    
+    parsed_ranges = []
+    for date_range in ranges:
+        try:
+            start_date = datetime.strptime(date_range.get('from', ''), '%Y-%m-%d').date()
+            end_date = datetime.strptime(date_range.get('to', ''), '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Ungültiges Datumsformat (erwartet: YYYY-MM-DD)'}), 400
+        if start_date > end_date:
+            return jsonify({'error': 'Startdatum liegt nach dem Enddatum'}), 400
+        parsed_ranges.append((start_date, end_date))
+    
+    matrix = get_revenue_matrix(customer_ids, parsed_ranges)
+    found_ids = [customer_id for customer_id in customer_ids if customer_id in matrix]
+    
+    return jsonify({
+        'ranges': [[start.isoformat(), end.isoformat()] for start, end in parsed_ranges],
+        'customer_ids': found_ids,
+        'revenue': [matrix[customer_id] for customer_id in found_ids],
+        'not_found': [customer_id for customer_id in customer_ids if customer_id not in matrix],
+    })
+
+
 @customers_bp.route('/<int:customer_id>/orders')
 def customer_orders(customer_id):
     """Alle Bestellungen eines Kunden"""
     customer = Customer.query.get_or_404(customer_id)
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '', type=str)
     
-    pagination = Order.query.filter_by(customer_id=customer_id)\
-                           .order_by(Order.order_date.desc())\
-                           .paginate(page=page, per_page=ITEMS_PER_PAGE, error_out=False)
+    # Keyset-Pagination über Index idx_customer_order_date
+    pagination = keyset_paginate(Order.query.filter_by(customer_id=customer_id),
+                                 Order.order_date, Order.id,
+                                 cursor=cursor, per_page=ITEMS_PER_PAGE)
     
     orders = pagination.items
     
@@ -164,11 +280,13 @@ def customer_orders(customer_id):
 def customer_contacts(customer_id):
     """Alle Kontakte eines Kunden"""
     customer = Customer.query.get_or_404(customer_id)
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '', type=str)
     
-    pagination = Contact.query.filter_by(customer_id=customer_id)\
-                             .order_by(Contact.contact_time.desc())\
-                             .paginate(page=page, per_page=ITEMS_PER_PAGE, error_out=False)
+    # Keyset-Pagination über Index idx_customer_contact_time
+    query = Contact.query.options(joinedload(Contact.user)).filter_by(customer_id=customer_id)
+    pagination = keyset_paginate(query,
+                                 Contact.contact_time, Contact.id,
+                                 cursor=cursor, per_page=ITEMS_PER_PAGE)
     
     contacts = pagination.items
     
@@ -178,6 +296,22 @@ def customer_contacts(customer_id):
                          pagination=pagination)
 
 
+@customers_bp.route('/<int:customer_id>/orders/export.<fmt>')
+def export_customer_orders(customer_id, fmt):
+    """Alle Bestellungen eines Kunden als CSV oder NDJSON"""
+    Customer.query.get_or_404(customer_id)
+    query = order_export_query().where(Order.customer_id == customer_id)
+    return stream_export(query, fmt, f'kunde-{customer_id}-bestellungen')
+
+
+@customers_bp.route('/<int:customer_id>/contacts/export.<fmt>')
+def export_customer_contacts(customer_id, fmt):
+    """Alle Kontakte eines Kunden als CSV oder NDJSON"""
+    Customer.query.get_or_404(customer_id)
+    query = contact_export_query().where(Contact.customer_id == customer_id)
+    return stream_export(query, fmt, f'kunde-{customer_id}-kontakte')
+
+
 @customers_bp.route('/new', methods=['GET', 'POST'])
 def new_customer():
     """Neuen Kunden erstellen"""
@@ -214,8 +348,8 @@ def new_customer():
         )
         
         try:
-            db.session.add(new_customer)
-            db.session.commit()
+            commit_with_retry(lambda: db.session.add(new_customer))
+            invalidate_dashboard()
             flash(f'Kunde "{new_customer.full_name}" erfolgreich erstellt!', 'success')
             return redirect(url_for('customers.customer_detail', customer_id=new_customer.id))
         except Exception as e:
@@ -253,14 +387,16 @@ def edit_customer(customer_id):
                 flash('Ein anderer Kunde verwendet bereits diese E-Mail-Adresse!', 'warning')
                 return render_template('customers/edit.html', customer=customer)
         
-        # Aktualisiere Kundendaten
-        customer.first_name = first_name
-        customer.last_name = last_name
-        customer.email = email if email else None
-        customer.phone = phone if phone else None
+        # Aktualisiere Kundendaten (bei einer Wiederholung nach Sperrkonflikt erneut)
+        def apply_changes():
+            customer.first_name = first_name
+            customer.last_name = last_name
+            customer.email = email if email else None
+            customer.phone = phone if phone else None
         
         try:
-            db.session.commit()
+            commit_with_retry(apply_changes)
+            invalidate_dashboard()
             flash(f'Kunde "{customer.full_name}" erfolgreich aktualisiert!', 'success')
             return redirect(url_for('customers.customer_detail', customer_id=customer.id))
         except Exception as e:
@@ -0,0 +1,71 @@
+"""
+Views für den CSV-Import
+"""
+
+import io
+import os
+import uuid
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for
+from crm_app.imports import import_csv, IMPORT_KINDS
+from crm_app.dashboard import invalidate_dashboard
+from crm_app.jobs import enqueue
+
+imports_bp = Blueprint('imports', __name__, url_prefix='/imports')
+
+# Anzeigenamen der Import-Typen
+IMPORT_LABELS = {
+    'customers': 'Kunden',
+    'orders': 'Bestellungen',
+    'contacts': 'Kontakte',
+}
+
+
+@imports_bp.route('/', methods=['GET', 'POST'])
+def new_import():
+    """CSV-Datei hochladen und importieren"""
+    if request.method == 'POST':
+        kind = request.form.get('kind', '')
+        upload = request.files.get('file')
+        
+        if kind not in IMPORT_KINDS:
+            flash('Bitte wählen Sie aus, was importiert werden soll!', 'danger')
+            return render_template('imports/new.html', labels=IMPORT_LABELS)
+        
+        if not upload or not upload.filename:
+            flash('Bitte wählen Sie eine CSV-Datei aus!', 'danger')
+            return render_template('imports/new.html', labels=IMPORT_LABELS, selected_kind=kind)
+        
+        if request.form.get('background'):
+            job = _enqueue_import(kind, upload)
+            flash(f'Import von "{upload.filename}" im Hintergrund gestartet (Job #{job.id}).', 'info')
+            return redirect(url_for('jobs.list_jobs'))
+        
+        # Datei direkt aus dem Upload-Stream lesen (wird nicht komplett in den Speicher geladen)
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        try:
+            result = import_csv(kind, stream)
+        except UnicodeDecodeError:
+            flash('Die Datei ist nicht UTF-8-kodiert!', 'danger')
+            return render_template('imports/new.html', labels=IMPORT_LABELS, selected_kind=kind)
+        
+        if result.inserted:
+            invalidate_dashboard()
+        
+        if result.error_count:
+            flash(f'{result.inserted} von {result.processed} Zeilen importiert, '
+                  f'{result.error_count} fehlerhaft.', 'warning')
+        else:
+            flash(f'{result.inserted} {IMPORT_LABELS[kind]} erfolgreich importiert!', 'success')
+        
+        return render_template('imports/new.html', labels=IMPORT_LABELS, selected_kind=kind, result=result)
+    
+    return render_template('imports/new.html', labels=IMPORT_LABELS)
+
+
+def _enqueue_import(kind, upload):
+    """Speichert den Upload unter instance/uploads/ und reiht den Import als Job ein"""
+    directory = os.path.join(current_app.instance_path, 'uploads')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{uuid.uuid4().hex}.csv')
+    upload.save(path)
+    return enqueue('import-csv', {'kind': kind, 'path': path, 'filename': upload.filename})
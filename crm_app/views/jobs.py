@@ -0,0 +1,51 @@
+"""
+Views für Hintergrund-Jobs (Übersicht, Status als JSON, Jobs starten)
+"""
+
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, url_for
+from models import Job
+from crm_app.jobs import enqueue, job_json
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+# Anzahl der angezeigten (neuesten) Jobs
+LIST_LIMIT = 50
+
+# Anzeigenamen der Job-Typen
+JOB_LABELS = {
+    'repair-stats': 'Kennzahlen neu berechnen',
+    'import-csv': 'CSV-Import',
+    'recompute-scores': 'Kunden-Scores neu berechnen',
+}
+
+# Status -> (Anzeigename, Bootstrap-Farbe)
+STATUS_LABELS = {
+    'queued': ('Wartend', 'secondary'),
+    'running': ('Läuft', 'primary'),
+    'done': ('Fertig', 'success'),
+    'failed': ('Fehlgeschlagen', 'danger'),
+}
+
+
+@jobs_bp.route('/')
+def list_jobs():
+    """Die neuesten Jobs mit Status und Fortschritt"""
+    jobs = Job.query.order_by(Job.id.desc()).limit(LIST_LIMIT).all()
+    return render_template('jobs/list.html', jobs=jobs,
+                           job_labels=JOB_LABELS, status_labels=STATUS_LABELS,
+                           worker_running=current_app.extensions.get('job_worker') is not None)
+
+
+@jobs_bp.route('/<int:job_id>')
+def job_status(job_id):
+    """Status, Fortschritt und Ergebnis eines Jobs (JSON, wird von der Übersicht abgefragt)"""
+    job = Job.query.get_or_404(job_id)
+    return jsonify(job_json(job))
+
+
+@jobs_bp.route('/repair-stats', methods=['POST'])
+def repair_stats():
+    """Kennzahlen und Monatsumsätze im Hintergrund neu berechnen"""
+    job = enqueue('repair-stats', dedupe_key='repair-stats')
+    flash(f'Neuberechnung der Kennzahlen eingereiht (Job #{job.id}).', 'info')
+    return redirect(url_for('jobs.list_jobs'))
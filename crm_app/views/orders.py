@@ -2,43 +2,56 @@
 Views für Bestellungs-bezogene Routen
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from models import db, Order, Customer, Product, OrderItem
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
+from models import db, Order, Customer, OrderItem
 from datetime import datetime
 from decimal import Decimal
 from sqlalchemy import or_, func
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
+from crm_app.pagination import keyset_paginate
+from crm_app.dashboard import invalidate_dashboard
+from crm_app.database import commit_with_retry
+from crm_app.reference import get_reference_data
+from crm_app.exports import order_export_query, parse_date_range, stream_export
 
 orders_bp = Blueprint('orders', __name__, url_prefix='/orders')
 
 ITEMS_PER_PAGE = 50
 
+# Verfügbare Bestellstatus
+ORDER_STATUSES = ['Offen', 'In Bearbeitung', 'Abgeschlossen', 'Storniert']
+
+# Grenzen für die Bulk-Schnittstelle (Webshop-Sync)
+MAX_BULK_ORDERS = 5000
+MAX_BULK_BODY_BYTES = 8 * 1024 * 1024
+
+
+def order_search_filter(search_query):
+    """Suche nach Bestellnummer oder Kundenname (Query muss Customer joinen)"""
+    search_pattern = f"%{search_query}%"
+    return or_(
+        func.cast(Order.id, db.String).ilike(search_pattern),
+        Customer.first_name.ilike(search_pattern),
+        Customer.last_name.ilike(search_pattern)
+    )
+
 
 @orders_bp.route('/')
 def list_orders():
     """Globale Bestellungsübersicht mit Suchfunktion und Pagination"""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '', type=str)
     search_query = request.args.get('q', '', type=str)
     
-    # Basis-Query mit JOIN auf Customer
-    query = Order.query.join(Customer)
+    # Basis-Query mit JOIN auf Customer (Kunde wird gleich mitgeladen)
+    query = Order.query.join(Customer).options(contains_eager(Order.customer))
     
     # Suchfilter
     if search_query:
-        search_pattern = f"%{search_query}%"
-        # Suche nach Bestellnummer oder Kundenname
-        query = query.filter(
-            or_(
-                func.cast(Order.id, db.String).ilike(search_pattern),
-                Customer.first_name.ilike(search_pattern),
-                Customer.last_name.ilike(search_pattern)
-            )
-        )
-    
-    # Sortierung: Chronologisch, neueste zuerst
-    query = query.order_by(Order.order_date.desc())
+        query = query.filter(order_search_filter(search_query))
     
-    # Pagination
-    pagination = query.paginate(page=page, per_page=ITEMS_PER_PAGE, error_out=False)
+    # Keyset-Pagination: Chronologisch, neueste zuerst (Index idx_order_date)
+    pagination = keyset_paginate(query, Order.order_date, Order.id,
+                                 cursor=cursor, per_page=ITEMS_PER_PAGE)
     orders = pagination.items
     
     return render_template('orders/list.html',
@@ -47,10 +60,69 @@ def list_orders():
                          search_query=search_query)
 
 
+@orders_bp.route('/export.<fmt>')
+def export_orders(fmt):
+    """Export der Bestellübersicht (inkl. Suchfilter und optional from/to) als CSV oder NDJSON"""
+    search_query = request.args.get('q', '', type=str)
+    start, end = parse_date_range(request.args.get('from'), request.args.get('to'))
+    
+    query = order_export_query()
+    if search_query:
+        query = query.where(order_search_filter(search_query))
+    if start:
+        query = query.where(Order.order_date >= start)
+    if end:
+        query = query.where(Order.order_date < end)
+    
+    return stream_export(query, fmt, 'bestellungen')
+
+
+@orders_bp.route('/bulk', methods=['POST'])
+def bulk_orders():
+    """
+    API-Endpoint zum Anlegen vieler Bestellungen auf einmal (Webshop-Sync).
+    
+    Erwartet JSON {"orders": [{"customer_id": 1, "status": "Offen", "order_date": "2025-03-01T10:00:00",
+    "items": [{"sku": "PROD-0001", "quantity": 2, "unit_price": "19.99"}]}]}. Produkte werden
+    blockweise per IN-Abfrage aufgelöst, Bestellungen und Positionen per Bulk-Insert geschrieben.
+    Fehlerhafte Bestellungen werden mit ihrem Index gemeldet, alle anderen angelegt.
+    """
+    if request.content_length is None:
+        return jsonify({'error': 'Content-Length erforderlich'}), 411
+    if request.content_length > MAX_BULK_BODY_BYTES:
+        return jsonify({'error': f'Anfrage zu groß (maximal {MAX_BULK_BODY_BYTES // (1024 * 1024)} MB)'}), 413
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('orders'), list):
+        return jsonify({'error': 'JSON-Body mit einer Liste "orders" erwartet'}), 400
+    
+    orders = data['orders']
+    if len(orders) > MAX_BULK_ORDERS:
+        return jsonify({'error': f'Maximal {MAX_BULK_ORDERS} Bestellungen pro Anfrage'}), 400
+    
+    # Lokaler Import: crm_app.imports bezieht ORDER_STATUSES aus diesem Modul
+    from crm_app.imports import import_orders
+    
+    result = import_orders(orders)
+    if result.inserted:
+        invalidate_dashboard()
+    
+    return jsonify({
+        'received': result.processed,
+        'inserted': result.inserted,
+        'order_ids': [result.created_ids.get(index) for index in range(len(orders))],
+        'error_count': result.error_count,
+        'errors': [{'index': index, 'error': message} for index, message in result.errors],
+    })
+
+
 @orders_bp.route('/<int:order_id>')
 def order_detail(order_id):
     """Detailansicht einer Bestellung"""
-    order = Order.query.get_or_404(order_id)
+    order = Order.query.options(
+        joinedload(Order.customer),
+        selectinload(Order.items).joinedload(OrderItem.product)
+    ).get_or_404(order_id)
     
     return render_template('orders/detail.html',
                          order=order)
@@ -65,9 +137,7 @@ def new_order():
         
         if not customer_id:
             flash('Bitte wählen Sie einen Kunden aus!', 'danger')
-            customers = Customer.query.order_by(Customer.last_name, Customer.first_name).all()
-            products = Product.query.order_by(Product.name).all()
-            return render_template('orders/new.html', customers=customers, products=products)
+            return render_template('orders/new.html', products=get_reference_data().products)
         
         customer = Customer.query.get_or_404(customer_id)
         
@@ -86,10 +156,13 @@ def new_order():
         total = Decimal('0.00')
         items_added = False
         
+        # Produkte und Listenpreise aus dem Stammdaten-Cache
+        products_by_id = get_reference_data().products_by_id
+        
         for prod_id, qty in zip(product_ids, quantities):
             if prod_id and qty:
                 try:
-                    product = Product.query.get(int(prod_id))
+                    product = products_by_id.get(int(prod_id))
                     quantity = int(qty)
                     
                     if product and quantity > 0:
@@ -106,32 +179,28 @@ def new_order():
         
         if not items_added:
             flash('Bitte fügen Sie mindestens eine Bestellposition hinzu!', 'warning')
-            customers = Customer.query.order_by(Customer.last_name, Customer.first_name).all()
-            products = Product.query.order_by(Product.name).all()
             return render_template('orders/new.html', 
-                                 customers=customers, 
-                                 products=products,
-                                 selected_customer_id=customer_id)
+                                 products=get_reference_data().products,
+                                 selected_customer=customer)
         
         new_order.total_amount = total
         
         try:
-            db.session.add(new_order)
-            db.session.commit()
+            commit_with_retry(lambda: db.session.add(new_order))
+            invalidate_dashboard()
             flash(f'Bestellung #{new_order.id} für {customer.full_name} erfolgreich erstellt!', 'success')
             return redirect(url_for('orders.order_detail', order_id=new_order.id))
         except Exception as e:
             db.session.rollback()
             flash(f'Fehler beim Erstellen der Bestellung: {str(e)}', 'danger')
     
-    # GET: Zeige Formular
-    customers = Customer.query.order_by(Customer.last_name, Customer.first_name).all()
-    products = Product.query.order_by(Product.name).all()
+    # GET: Zeige Formular (Kunden werden per Typeahead gesucht, siehe customers.customer_search)
+    products = get_reference_data().products
     
     # Wenn customer_id in URL, vorselektieren
     preselected_customer_id = request.args.get('customer_id', type=int)
+    preselected_customer = db.session.get(Customer, preselected_customer_id) if preselected_customer_id else None
     
     return render_template('orders/new.html', 
-                         customers=customers, 
                          products=products,
-                         selected_customer_id=preselected_customer_id)
+                         selected_customer=preselected_customer)
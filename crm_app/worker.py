@@ -0,0 +1,52 @@
+"""
+Eigenständiger Job-Worker ohne Webserver (siehe crm_app/jobs.py)
+
+Im Projektverzeichnis starten:
+    
+    python -m crm_app.worker                # läuft bis Strg+C / SIGTERM
+    python -m crm_app.worker --threads 4
+    python -m crm_app.worker --once         # fällige Jobs abarbeiten und beenden
+
+Mehrere Worker-Prozesse (auch neben den Threads im Webprozess) dürfen
+gleichzeitig laufen; jeder Job wird genau einem zugeteilt.
+"""
+
+import argparse
+import signal
+import sys
+import time
+from app import create_app
+from crm_app.jobs import JobWorker
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Job-Worker für das CRM System')
+    parser.add_argument('--threads', type=int,
+                        help='Parallel ausgeführte Jobs (Standard: JOBS_WORKER_THREADS, mindestens 1)')
+    parser.add_argument('--once', action='store_true', help='Fällige Jobs abarbeiten und beenden')
+    args = parser.parse_args()
+    
+    app = create_app()
+    threads = args.threads or max(app.config['JOBS_WORKER_THREADS'], 1)
+    worker = JobWorker(app, threads=threads)
+    
+    if args.once:
+        count = worker.run_pending()
+        print(f"✓ {count} Jobs ausgeführt")
+        return
+    
+    # SIGTERM (z.B. systemd, docker stop) wie Strg+C behandeln
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    worker.start()
+    print(f"Job-Worker {worker.name} gestartet ({threads} Threads)")
+    try:
+        while True:
+            time.sleep(1)
+    except (KeyboardInterrupt, SystemExit):
+        print("Worker wird beendet, laufende Jobs werden abgeschlossen ...")
+        worker.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,10 +3,18 @@ Datenbank-Initialisierung mit Testdaten
 Projekt: Einfaches CRM System - 5BHWI
 
 Führen Sie dieses Skript aus, um die Datenbank zu erstellen und mit Beispieldaten zu befüllen.
+
+Ohne Parameter werden 30 Demo-Kunden angelegt. Mit --scale werden beliebig
+viele reproduzierbare Testdaten blockweise erzeugt (Lasttests, Fehlersuche):
+
+    python migrations/init_db.py --scale 100000 --seed 42
+    python migrations/init_db.py --scale 100000 --seed 42 --reference-date 2025-01-01
 """
 
+import argparse
 import sys
 import os
+import time
 from datetime import datetime, timedelta
 from decimal import Decimal
 import random
@@ -16,6 +24,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import create_app
 from models import db, Customer, Order, OrderItem, Product, Contact, User
+from migrations.seed import seed_database, default_reference_date, DEFAULT_CHUNK_SIZE
 
 def init_database():
     """Erstellt die Datenbank und füllt sie mit Testdaten"""
@@ -70,6 +79,40 @@ def init_database():
         print(f"  - Benutzer: {User.query.count()}")
 
 
+def init_scaled_database(customers, seed, chunk_size, reference_date):
+    """Erstellt die Datenbank neu und befüllt sie blockweise mit Massendaten"""
+    app = create_app()
+    reference_date = reference_date or default_reference_date()
+    
+    with app.app_context():
+        print("Erstelle Datenbanktabellen...")
+        db.drop_all()
+        db.create_all()
+        
+        print(f"Erzeuge {customers:,} Kunden (Seed {seed}, Referenzdatum {reference_date:%Y-%m-%d})...")
+        started = time.perf_counter()
+        with db.engine.connect() as connection:
+            # Beim Neuaufbau ist kein Schutz gegen Stromausfall nötig
+            connection.exec_driver_sql('PRAGMA synchronous=OFF')
+            connection.commit()
+            counts = seed_database(
+                connection, customers, seed=seed, chunk_size=chunk_size,
+                reference_date=reference_date,
+                progress=lambda c: print(f"\r  {c['customers']:>10,} / {customers:,} Kunden", end='', flush=True)
+            )
+        
+        print(f"\n\n✅ Datenbank in {time.perf_counter() - started:.1f}s initialisiert!")
+        print(f"\nStatistiken:")
+        print(f"  - Kunden: {counts['customers']:,}")
+        print(f"  - Bestellungen: {counts['orders']:,}")
+        print(f"  - Bestellpositionen: {counts['order_items']:,}")
+        print(f"  - Produkte: {counts['products']:,}")
+        print(f"  - Kontakte: {counts['contacts']:,}")
+        print(f"  - Benutzer: {counts['users']:,}")
+        print(f"\nReproduzierbar mit: --scale {customers} --seed {seed} "
+              f"--reference-date {reference_date:%Y-%m-%d}")
+
+
 def create_users():
     """Erstellt Testbenutzer"""
     users = [
@@ -206,14 +249,36 @@ def create_contacts(customers, users):
     return contacts
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Datenbank-Initialisierung für das CRM System')
+    parser.add_argument('--scale', type=int, metavar='KUNDEN',
+                        help='Anzahl Kunden für Massendaten (ohne: 30 Demo-Kunden)')
+    parser.add_argument('--seed', type=int, default=42, help='Zufalls-Seed für --scale (Standard: 42)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Kunden pro Block und Transaktion (Standard: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--reference-date', type=lambda value: datetime.strptime(value, '%Y-%m-%d'),
+                        metavar='JJJJ-MM-TT', help='Bezugsdatum der Zeitstempel (Standard: heute)')
+    args = parser.parse_args()
+    if args.scale is not None and args.scale < 1:
+        parser.error('--scale muss mindestens 1 sein')
+    if args.chunk_size < 1:
+        parser.error('--chunk-size muss mindestens 1 sein')
+    return args
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    
     print("=" * 60)
     print("CRM System - Datenbank-Initialisierung")
     print("=" * 60)
     print()
     
     try:
-        init_database()
+        if args.scale:
+            init_scaled_database(args.scale, args.seed, args.chunk_size, args.reference_date)
+        else:
+            init_database()
     except Exception as e:
         print(f"\n❌ Fehler bei der Initialisierung: {e}")
         import traceback
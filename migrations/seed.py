@@ -0,0 +1,232 @@
+"""
+Skalierbarer Testdaten-Generator
+
+Schreibt Kunden, Bestellungen, Bestellpositionen und Kontakte in festen
+Blöcken per Core-Bulk-Insert (executemany). Es werden nie mehr als
+chunk_size Kunden samt abhängiger Zeilen gleichzeitig im Speicher gehalten,
+der Speicherbedarf bleibt also unabhängig von der Gesamtmenge konstant.
+
+Bestellsummen werden aus den erzeugten Positionen berechnet, die
+denormalisierten Kunden-Kennzahlen direkt mitgeschrieben und die
+Monatsumsätze, Kunden-Scores und Zeilenzähler am Ende in einem Schritt aufgebaut. Gleicher Seed,
+gleiche Kundenanzahl und gleiches Referenzdatum ergeben exakt dieselbe
+Datenbank.
+
+Verwendung über migrations/init_db.py (--scale) und benchmarks/bench_routes.py.
+"""
+
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+from models import (Customer, Order, OrderItem, Product, Contact, User,
+                    create_customer_search_index, create_row_counters, drop_row_counter_triggers,
+                    rebuild_customer_scores, rebuild_monthly_revenue)
+
+FIRST_NAMES = ["Anna", "Max", "Sophie", "Lukas", "Emma", "Felix", "Laura", "Jonas",
+               "Marie", "Paul", "Lena", "David", "Julia", "Michael", "Sarah"]
+LAST_NAMES = ["Berger", "Huber", "Wagner", "Müller", "Schmidt", "Schneider", "Fischer",
+              "Weber", "Meyer", "Bauer", "Becker", "Hoffmann", "Schulz", "Koch", "Richter"]
+CHANNELS = ["Telefon", "E-Mail", "Meeting", "Chat"]
+STATUSES = ["Offen", "In Bearbeitung", "Abgeschlossen", "Storniert"]
+SUBJECTS = ["Produktanfrage", "Support-Anfrage", "Beratungsgespräch", "Reklamation",
+            "Angebot angefordert", "Feedback zum Service", "Technische Frage",
+            "Vertragsverlängerung", "Neukundenberatung", "Follow-up"]
+
+PRODUCT_COUNT = 50
+USER_COUNT = 10
+
+# Durchschnittlich 4 Bestellungen, 2,5 Positionen pro Bestellung, 5 Kontakte pro Kunde
+MAX_ORDERS_PER_CUSTOMER = 8
+MAX_ITEMS_PER_ORDER = 4
+MAX_CONTACTS_PER_CUSTOMER = 10
+HISTORY_SECONDS = 3 * 365 * 86400
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def default_reference_date():
+    """Heutiges Datum (UTC, Mitternacht) als Bezugspunkt für alle Zeitstempel"""
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _cents(value):
+    """Betrag in Cent als Decimal mit zwei Nachkommastellen"""
+    return Decimal(value).scaleb(-2)
+
+
+def _reference_products(rng):
+    return [
+        {
+            'id': product_id,
+            'sku': f"PROD-{product_id:04d}",
+            'name': f"Produkt {product_id:04d}",
+            'base_price': rng.randint(500, 50000),
+        }
+        for product_id in range(1, PRODUCT_COUNT + 1)
+    ]
+
+
+def _reference_users():
+    return [
+        {
+            'id': user_id,
+            'name': f"Mitarbeiter {user_id:02d}",
+            'email': f"mitarbeiter{user_id:02d}@htl.at",
+            'role': 'Lehrer' if user_id == 1 else 'Schüler',
+        }
+        for user_id in range(1, USER_COUNT + 1)
+    ]
+
+
+def _suspend_customer_search_trigger(connection):
+    """
+    Entfernt den FTS-Insert-Trigger für die Dauer des Ladens.
+    
+    Ein einmaliger 'rebuild' am Ende ist deutlich schneller als ein
+    Index-Update pro eingefügtem Kunden.
+    
+    Rückgabe: True, wenn der Trigger vorhanden war
+    """
+    if connection.dialect.name != 'sqlite':
+        return False
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'customers_fts_ai'"
+    ).scalar() is not None
+    if exists:
+        connection.exec_driver_sql("DROP TRIGGER customers_fts_ai")
+    return exists
+
+
+def seed_database(connection, customers, seed=42, chunk_size=DEFAULT_CHUNK_SIZE,
+                  reference_date=None, progress=None):
+    """
+    Befüllt eine leere Datenbank mit `customers` Kunden und proportionalen Daten.
+    
+    connection muss eine Core-Connection ohne laufende Transaktion sein;
+    jeder Block wird in einer eigenen Transaktion geschrieben. progress wird
+    nach jedem Block mit den bisherigen Zeilenzahlen aufgerufen.
+    
+    Rückgabe: dict mit der Anzahl der erzeugten Zeilen pro Tabelle
+    """
+    rng = random.Random(seed)
+    rand = rng.random
+    now = reference_date or default_reference_date()
+    
+    def pick(sequence):
+        return sequence[int(rand() * len(sequence))]
+    
+    def seconds_ago():
+        return now - timedelta(seconds=int(rand() * HISTORY_SECONDS))
+    
+    products = _reference_products(rng)
+    users = _reference_users()
+    with connection.begin():
+        connection.execute(Product.__table__.insert(),
+                           [dict(p, base_price=_cents(p['base_price'])) for p in products])
+        connection.execute(User.__table__.insert(), users)
+    
+    with connection.begin():
+        search_index = _suspend_customer_search_trigger(connection)
+        # Zähler-Trigger ebenso: ein COUNT(*) am Ende statt eines Updates pro Zeile
+        row_counters = drop_row_counter_triggers(connection)
+    
+    counts = {'customers': 0, 'orders': 0, 'order_items': 0, 'contacts': 0,
+              'products': len(products), 'users': len(users)}
+    order_id = 0
+    item_id = 0
+    contact_id = 0
+    
+    customer_insert = Customer.__table__.insert()
+    order_insert = Order.__table__.insert()
+    item_insert = OrderItem.__table__.insert()
+    contact_insert = Contact.__table__.insert()
+    
+    for chunk_start in range(1, customers + 1, chunk_size):
+        chunk_end = min(chunk_start + chunk_size, customers + 1)
+        customer_rows, order_rows, item_rows, contact_rows = [], [], [], []
+        
+        for customer_id in range(chunk_start, chunk_end):
+            first_name = pick(FIRST_NAMES)
+            last_name = pick(LAST_NAMES)
+            revenue = 0
+            
+            order_count = int(rand() * (MAX_ORDERS_PER_CUSTOMER + 1))
+            for _ in range(order_count):
+                order_id += 1
+                total = 0
+                for _ in range(1 + int(rand() * MAX_ITEMS_PER_ORDER)):
+                    item_id += 1
+                    product = pick(products)
+                    quantity = 1 + int(rand() * 5)
+                    # Preisabweichung von ±10 % gegenüber dem Listenpreis
+                    unit_price = round(product['base_price'] * (90 + int(rand() * 21)) / 100)
+                    item_rows.append({
+                        'id': item_id,
+                        'order_id': order_id,
+                        'product_id': product['id'],
+                        'quantity': quantity,
+                        'unit_price': _cents(unit_price),
+                    })
+                    total += unit_price * quantity
+                order_rows.append({
+                    'id': order_id,
+                    'customer_id': customer_id,
+                    'order_date': seconds_ago(),
+                    'status': pick(STATUSES),
+                    'total_amount': _cents(total),
+                })
+                revenue += total
+            
+            last_contact = None
+            for _ in range(int(rand() * (MAX_CONTACTS_PER_CUSTOMER + 1))):
+                contact_id += 1
+                contact_time = seconds_ago()
+                contact_rows.append({
+                    'id': contact_id,
+                    'customer_id': customer_id,
+                    'user_id': pick(users)['id'] if rand() > 0.2 else None,
+                    'channel': pick(CHANNELS),
+                    'subject': pick(SUBJECTS),
+                    'notes': f"Kontakt am {contact_time:%d.%m.%Y} durchgeführt.",
+                    'contact_time': contact_time,
+                })
+                if last_contact is None or contact_time > last_contact:
+                    last_contact = contact_time
+            
+            customer_rows.append({
+                'id': customer_id,
+                'first_name': first_name,
+                'last_name': last_name,
+                'email': f"{first_name.lower()}.{last_name.lower()}{customer_id}@example.com",
+                'phone': f"+43 {600 + int(rand() * 100)} {100000 + int(rand() * 900000)}",
+                'created_at': seconds_ago(),
+                'total_revenue': _cents(revenue),
+                'order_count': order_count,
+                'last_contact_at': last_contact,
+            })
+        
+        with connection.begin():
+            connection.execute(customer_insert, customer_rows)
+            if order_rows:
+                connection.execute(order_insert, order_rows)
+                connection.execute(item_insert, item_rows)
+            if contact_rows:
+                connection.execute(contact_insert, contact_rows)
+        
+        counts['customers'] += len(customer_rows)
+        counts['orders'] += len(order_rows)
+        counts['order_items'] += len(item_rows)
+        counts['contacts'] += len(contact_rows)
+        if progress:
+            progress(counts)
+    
+    with connection.begin():
+        if search_index:
+            create_customer_search_index(connection, rebuild=True)
+        rebuild_monthly_revenue(connection)
+        rebuild_customer_scores(connection)
+        if row_counters:
+            create_row_counters(connection, rebuild=True)
+        connection.exec_driver_sql("ANALYZE")
+    
+    return counts
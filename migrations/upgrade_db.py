@@ -0,0 +1,169 @@
+"""
+Datenbank-Upgrade für bestehende Installationen
+Projekt: Einfaches CRM System - 5BHWI
+
+Ergänzt neue Spalten, Indizes und Tabellen in einer bestehenden Datenbank,
+ohne vorhandene Daten zu löschen (im Gegensatz zu init_db.py).
+Alle Schritte sind idempotent und können mehrfach ausgeführt werden.
+"""
+
+import sys
+import os
+
+# Füge das Hauptverzeichnis zum Python-Pfad hinzu
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from app import create_app
+from models import (db, rebuild_customer_stats, rebuild_monthly_revenue, rebuild_customer_scores,
+                    create_customer_search_index, create_row_counters)
+
+
+def add_column_if_missing(table, column, ddl):
+    """Fügt eine Spalte hinzu, falls sie in der Tabelle noch fehlt"""
+    columns = {col['name'] for col in inspect(db.engine).get_columns(table)}
+    if column in columns:
+        return False
+    db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+
+def upgrade_row_versions():
+    """Zeilenversion und Änderungszeitpunkt (version, updated_at) für die JSON-API"""
+    for table in ('customers', 'orders', 'contacts'):
+        add_column_if_missing(table, 'version', "INTEGER NOT NULL DEFAULT '1'")
+        add_column_if_missing(table, 'updated_at', "DATETIME")
+
+
+def upgrade_customer_stats():
+    """Denormalisierte Kunden-Kennzahlen (total_revenue, order_count, last_contact_at)"""
+    added = [
+        add_column_if_missing('customers', 'total_revenue', "NUMERIC(12, 2) NOT NULL DEFAULT '0'"),
+        add_column_if_missing('customers', 'order_count', "INTEGER NOT NULL DEFAULT '0'"),
+        add_column_if_missing('customers', 'last_contact_at', "DATETIME"),
+    ]
+    db.session.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_customer_last_contact ON customers (last_contact_at)"
+    ))
+    if any(added):
+        updated = rebuild_customer_stats()
+        print(f"  Kennzahlen für {updated} Kunden berechnet")
+
+
+def upgrade_customer_search():
+    """Volltextindex für die Kundensuche (SQLite FTS5)"""
+    connection = db.session.connection()
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'customers_fts'"
+    ).first() is not None
+    if exists:
+        return
+    if create_customer_search_index(connection, rebuild=True):
+        print("  Volltextindex angelegt")
+    else:
+        print("  FTS5 nicht verfügbar - Suche verwendet weiterhin ILIKE")
+
+
+def upgrade_order_item_index():
+    """Index auf order_items.order_id (Positionsanzahl, Bestelldetails)"""
+    db.session.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_order_item_order ON order_items (order_id)"
+    ))
+
+
+def upgrade_monthly_revenue():
+    """Monatsumsätze pro Kunde (customer_monthly_revenue)"""
+    # Die Tabelle selbst legt db.create_all() an; hier nur einmalig befüllen
+    filled = db.session.execute(text("SELECT 1 FROM customer_monthly_revenue LIMIT 1")).first()
+    has_orders = db.session.execute(text("SELECT 1 FROM orders LIMIT 1")).first()
+    if has_orders and not filled:
+        months = rebuild_monthly_revenue()
+        print(f"  {months} Monatsumsätze berechnet")
+
+
+def upgrade_customer_typeahead_indexes():
+    """Indizes für die Kundenauswahl (Präfixsuche über Name und E-Mail)"""
+    db.session.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_customer_name "
+        "ON customers (last_name COLLATE NOCASE, first_name COLLATE NOCASE)"
+    ))
+    db.session.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_customer_email ON customers (email COLLATE NOCASE)"
+    ))
+
+
+def upgrade_customer_scores():
+    """Gespeicherter Kunden-Score (score, score_rating, score_label) mit Indizes"""
+    added = [
+        add_column_if_missing('customers', 'score', "INTEGER NOT NULL DEFAULT '0'"),
+        add_column_if_missing('customers', 'score_rating', "VARCHAR(2) NOT NULL DEFAULT 'D'"),
+        add_column_if_missing('customers', 'score_label', "VARCHAR(20) NOT NULL DEFAULT 'Inaktiv'"),
+    ]
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS idx_customer_score ON customers (score)"))
+    db.session.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_customer_rating_score ON customers (score_rating, score)"
+    ))
+    if any(added):
+        changed = rebuild_customer_scores()
+        print(f"  Score für {changed} Kunden berechnet")
+
+
+def upgrade_row_counters():
+    """Zeilenzähler für Gesamtanzahlen (row_counts mit Triggern, nur SQLite)"""
+    connection = db.session.connection()
+    if connection.dialect.name != 'sqlite':
+        print("  Keine SQLite-Datenbank - Gesamtanzahlen werden weiterhin gezählt")
+        return
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'customers_count_ai'"
+    ).first() is not None
+    if exists:
+        return
+    create_row_counters(connection, rebuild=True)
+    print("  Zeilenzähler angelegt")
+
+
+# Upgrade-Schritte in der Reihenfolge ihrer Einführung
+UPGRADE_STEPS = [
+    # Muss vor allen anderen Schritten laufen: jedes UPDATE auf customers/orders/
+    # contacts (z.B. rebuild_customer_stats) setzt version = version + 1
+    upgrade_row_versions,
+    upgrade_customer_stats,
+    upgrade_customer_search,
+    upgrade_order_item_index,
+    upgrade_monthly_revenue,
+    upgrade_customer_typeahead_indexes,
+    upgrade_customer_scores,
+    upgrade_row_counters,
+]
+
+
+def upgrade_database():
+    """Führt alle Upgrade-Schritte aus"""
+    app = create_app()
+    
+    with app.app_context():
+        # Fehlende Tabellen anlegen (bestehende bleiben unverändert)
+        db.create_all()
+        
+        for step in UPGRADE_STEPS:
+            print(f"→ {step.__doc__}")
+            step()
+            db.session.commit()
+        
+        print("\n✅ Datenbank erfolgreich aktualisiert!")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("CRM System - Datenbank-Upgrade")
+    print("=" * 60)
+    print()
+    
+    try:
+        upgrade_database()
+    except Exception as e:
+        print(f"\n❌ Fehler beim Upgrade: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
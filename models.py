@@ -3,19 +3,44 @@ SQLAlchemy Datenbankmodelle für das CRM System
 Projekt: Einfaches CRM System - 5BHWI
 """
 
+from flask import current_app, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
 from datetime import datetime
-import pytz
+from functools import lru_cache
+from weakref import WeakKeyDictionary
+import re
+from crm_app.replica import RoutingSession
 
-db = SQLAlchemy()
+# RoutingSession: Lesezugriffe optional über die Replica (siehe crm_app/replica.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Zeilenversion für ETags der JSON-API (crm_app/views/api.py): wird bei jedem
+# UPDATE der Zeile um 1 erhöht, auch bei Core-Updates wie refresh_customer_stats
+ROW_VERSION_ONUPDATE = db.text('version + 1')
 
 # Timezone-Konfiguration für Österreich
-VIENNA_TZ = pytz.timezone('Europe/Vienna')
+VIENNA_TZ_NAME = 'Europe/Vienna'
+
+
+@lru_cache(maxsize=None)
+def get_timezone(name=VIENNA_TZ_NAME):
+    """tzinfo zu einem Zeitzonennamen; pytz wird erst beim ersten Aufruf importiert"""
+    import pytz
+    return pytz.timezone(name)
+
+
+def __getattr__(name):
+    # models.VIENNA_TZ bleibt verfügbar, ohne pytz beim Import von models zu laden
+    if name == 'VIENNA_TZ':
+        return get_timezone()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_local_time():
     """Gibt die aktuelle Zeit in der Wiener Zeitzone zurück"""
-    return datetime.now(VIENNA_TZ)
+    return datetime.now(get_timezone())
 
 
 class Customer(db.Model):
@@ -29,10 +54,39 @@ class Customer(db.Model):
     phone = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Denormalisierte Kennzahlen (werden bei jedem Order/Contact-Flush aktualisiert,
+    # siehe refresh_customer_stats)
+    total_revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0, server_default='0')
+    order_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_contact_at = db.Column(db.DateTime)
+    
+    # Gespeicherter Kunden-Score für Sortierung und Filter der Kundenliste (wird mit
+    # den Kennzahlen aktualisiert und täglich komplett neu berechnet, siehe
+    # refresh_customer_scores/rebuild_customer_scores)
+    score = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    score_rating = db.Column(db.String(2), nullable=False, default='D', server_default='D')
+    score_label = db.Column(db.String(20), nullable=False, default='Inaktiv', server_default='Inaktiv')
+    
+    # Änderungsstand (ETag/Last-Modified der API)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                        onupdate=ROW_VERSION_ONUPDATE)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
     # Beziehungen
     orders = db.relationship('Order', back_populates='customer', cascade='all, delete-orphan')
     contacts = db.relationship('Contact', back_populates='customer', cascade='all, delete-orphan')
     
+    # Indizes
+    __table_args__ = (
+        db.Index('idx_customer_last_contact', 'last_contact_at'),
+        # Präfixsuche ohne Groß-/Kleinschreibung (customer_typeahead)
+        db.Index('idx_customer_name', db.text('last_name COLLATE NOCASE'), db.text('first_name COLLATE NOCASE')),
+        db.Index('idx_customer_email', db.text('email COLLATE NOCASE')),
+        # Sortierung nach Score (ORDER BY score DESC, id DESC) und Filter nach Rating
+        db.Index('idx_customer_score', 'score'),
+        db.Index('idx_customer_rating_score', 'score_rating', 'score'),
+    )
+    
     def __repr__(self):
         return f'<Customer {self.last_name}, {self.first_name}>'
     
@@ -41,24 +95,27 @@ class Customer(db.Model):
         """Vollständiger Name (Nachname, Vorname)"""
         return f"{self.last_name}, {self.first_name}"
     
+    @property
+    def score_color(self):
+        """Bootstrap-Farbe des gespeicherten Ratings"""
+        return CUSTOMER_RATINGS.get(self.score_rating, CUSTOMER_RATINGS['D'])[1]
+    
     @property
     def last_contact_date(self):
         """Datum des letzten Kontakts"""
-        if self.contacts:
-            return max(contact.contact_time for contact in self.contacts)
-        return None
+        return self.last_contact_at
     
     def get_total_revenue(self, start_date=None, end_date=None):
-        """Berechnet den Gesamtumsatz für diesen Kunden im angegebenen Zeitraum"""
-        query = db.session.query(db.func.sum(Order.total_amount)).filter(Order.customer_id == self.id)
+        """
+        Berechnet den Gesamtumsatz für diesen Kunden im angegebenen Zeitraum.
         
-        if start_date:
-            query = query.filter(Order.order_date >= start_date)
-        if end_date:
-            query = query.filter(Order.order_date <= end_date)
+        Ohne Zeitraum wird der gespeicherte Gesamtumsatz verwendet, sonst die
+        Monatsumsätze (siehe customer_revenue_between).
+        """
+        if not start_date and not end_date:
+            return float(self.total_revenue or 0)
         
-        result = query.scalar()
-        return float(result) if result else 0.0
+        return customer_revenue_between(self.id, start_date, end_date)
     
     def get_customer_score(self):
         """
@@ -69,92 +126,329 @@ class Customer(db.Model):
         
         Rückgabe: dict mit score, rating ('A+', 'A', 'B', 'C', 'D'), und color
         """
-        from datetime import timedelta
-        
-        # 1. Umsatz-Score (0-40 Punkte)
-        total_revenue = self.get_total_revenue()
-        if total_revenue >= 10000:
-            revenue_score = 40
-        elif total_revenue >= 5000:
-            revenue_score = 35
-        elif total_revenue >= 2000:
-            revenue_score = 30
-        elif total_revenue >= 1000:
-            revenue_score = 25
-        elif total_revenue >= 500:
-            revenue_score = 20
-        elif total_revenue > 0:
-            revenue_score = 15
-        else:
-            revenue_score = 0
-        
-        # 2. Bestellungs-Score (0-30 Punkte)
-        order_count = len(self.orders)
-        if order_count >= 20:
-            order_score = 30
-        elif order_count >= 10:
-            order_score = 25
-        elif order_count >= 5:
-            order_score = 20
-        elif order_count >= 3:
-            order_score = 15
-        elif order_count >= 1:
-            order_score = 10
-        else:
-            order_score = 0
-        
-        # 3. Kontakt-Score (0-30 Punkte)
-        if self.last_contact_date:
-            days_since_contact = (datetime.utcnow() - self.last_contact_date).days
-            if days_since_contact <= 7:
-                contact_score = 30
-            elif days_since_contact <= 30:
-                contact_score = 25
-            elif days_since_contact <= 90:
-                contact_score = 20
-            elif days_since_contact <= 180:
-                contact_score = 15
-            elif days_since_contact <= 365:
-                contact_score = 10
-            else:
-                contact_score = 5
-        else:
-            contact_score = 0
-        
-        # Gesamtscore
-        total_score = revenue_score + order_score + contact_score
-        
-        # Rating und Farbe
-        if total_score >= 85:
-            rating = 'A+'
-            color = 'success'
-            label = 'Premium'
-        elif total_score >= 70:
-            rating = 'A'
-            color = 'success'
-            label = 'Sehr gut'
-        elif total_score >= 55:
-            rating = 'B'
-            color = 'info'
-            label = 'Gut'
-        elif total_score >= 40:
-            rating = 'C'
-            color = 'warning'
-            label = 'Normal'
+        return calculate_customer_score(self.get_total_revenue(),
+                                         self.order_count or 0,
+                                         self.last_contact_date)
+
+
+def calculate_customer_score(total_revenue, order_count, last_contact_date):
+    """
+    Wendet die Score-Schwellenwerte auf bereits ermittelte Kennzahlen an.
+    
+    Wird von Customer.get_customer_score() verwendet; calculate_customer_scores()
+    bildet dieselben Schwellenwerte vektorisiert für den gespeicherten Score und
+    score_customers() nach.
+    """
+    # 1. Umsatz-Score (0-40 Punkte)
+    if total_revenue >= 10000:
+        revenue_score = 40
+    elif total_revenue >= 5000:
+        revenue_score = 35
+    elif total_revenue >= 2000:
+        revenue_score = 30
+    elif total_revenue >= 1000:
+        revenue_score = 25
+    elif total_revenue >= 500:
+        revenue_score = 20
+    elif total_revenue > 0:
+        revenue_score = 15
+    else:
+        revenue_score = 0
+    
+    # 2. Bestellungs-Score (0-30 Punkte)
+    if order_count >= 20:
+        order_score = 30
+    elif order_count >= 10:
+        order_score = 25
+    elif order_count >= 5:
+        order_score = 20
+    elif order_count >= 3:
+        order_score = 15
+    elif order_count >= 1:
+        order_score = 10
+    else:
+        order_score = 0
+    
+    # 3. Kontakt-Score (0-30 Punkte)
+    if last_contact_date:
+        days_since_contact = (datetime.utcnow() - last_contact_date).days
+        if days_since_contact <= 7:
+            contact_score = 30
+        elif days_since_contact <= 30:
+            contact_score = 25
+        elif days_since_contact <= 90:
+            contact_score = 20
+        elif days_since_contact <= 180:
+            contact_score = 15
+        elif days_since_contact <= 365:
+            contact_score = 10
         else:
-            rating = 'D'
-            color = 'danger'
-            label = 'Inaktiv'
-        
-        return {
-            'score': total_score,
-            'rating': rating,
-            'color': color,
-            'label': label,
-            'revenue_score': revenue_score,
-            'order_score': order_score,
-            'contact_score': contact_score
-        }
+            contact_score = 5
+    else:
+        contact_score = 0
+    
+    # Gesamtscore
+    total_score = revenue_score + order_score + contact_score
+    
+    # Rating und Farbe
+    if total_score >= 85:
+        rating = 'A+'
+        color = 'success'
+        label = 'Premium'
+    elif total_score >= 70:
+        rating = 'A'
+        color = 'success'
+        label = 'Sehr gut'
+    elif total_score >= 55:
+        rating = 'B'
+        color = 'info'
+        label = 'Gut'
+    elif total_score >= 40:
+        rating = 'C'
+        color = 'warning'
+        label = 'Normal'
+    else:
+        rating = 'D'
+        color = 'danger'
+        label = 'Inaktiv'
+    
+    return {
+        'score': total_score,
+        'rating': rating,
+        'color': color,
+        'label': label,
+        'revenue_score': revenue_score,
+        'order_score': order_score,
+        'contact_score': contact_score
+    }
+
+
+def get_revenue_matrix(customer_ids, ranges):
+    """
+    Umsätze mehrerer Kunden für mehrere Zeiträume mit einer einzigen Abfrage.
+    
+    Pro Zeitraum (start, end) wird eine bedingte Summe gebildet
+    (SUM(CASE WHEN start <= order_date <= end ...)), gruppiert nach Kunde.
+    Es werden nur Bestellungen zwischen dem frühesten Start und dem spätesten
+    Ende über den Index idx_customer_order_date gelesen. Die Grenzen
+    verhalten sich wie bei Customer.get_total_revenue().
+    
+    Rückgabe: dict customer_id -> Liste der Umsätze (float) in der Reihenfolge
+    von ranges; nicht vorhandene Kunden fehlen im Ergebnis
+    """
+    customer_ids = list(customer_ids)
+    if not customer_ids or not ranges:
+        return {}
+    
+    orders = Order.__table__
+    customers = Customer.__table__
+    in_range = [(orders.c.order_date >= start) & (orders.c.order_date <= end) for start, end in ranges]
+    
+    query = db.select(
+        customers.c.id,
+        *[db.func.coalesce(db.func.sum(db.case((condition, orders.c.total_amount), else_=0)), 0)
+          for condition in in_range]
+    ).select_from(customers).outerjoin(orders, db.and_(
+        orders.c.customer_id == customers.c.id,
+        orders.c.order_date >= min(start for start, _ in ranges),
+        orders.c.order_date <= max(end for _, end in ranges),
+    )).where(customers.c.id.in_(customer_ids)).group_by(customers.c.id)
+    
+    return {
+        row[0]: [float(value) for value in row[1:]]
+        for row in db.session.execute(query)
+    }
+
+
+# ---------------------------------------------------------------------------
+# Gespeicherter Kunden-Score (vektorisiert mit NumPy)
+# ---------------------------------------------------------------------------
+
+# Rating -> (Bezeichnung, Farbe) wie in calculate_customer_score, beste Stufe zuerst
+CUSTOMER_RATINGS = {
+    'A+': ('Premium', 'success'),
+    'A': ('Sehr gut', 'success'),
+    'B': ('Gut', 'info'),
+    'C': ('Normal', 'warning'),
+    'D': ('Inaktiv', 'danger'),
+}
+
+# Kunden pro Block bei der Neuberechnung aller Scores
+_SCORE_CHUNK_SIZE = 50000
+
+
+def calculate_customer_scores(total_revenue, order_count, last_contact_at, now=None):
+    """
+    Vektorisierte Variante von calculate_customer_score() für beliebig viele Kunden.
+    
+    Erwartet drei gleich lange Folgen (Umsatz, Anzahl Bestellungen, letzter
+    Kontakt als datetime, ISO-Text oder None) und wendet die Schwellenwerte mit NumPy
+    auf alle Werte gleichzeitig an.
+    
+    Rückgabe: (scores, ratings) als NumPy-Arrays
+    """
+    import numpy as np
+    
+    revenue = np.asarray(total_revenue, dtype=np.float64)
+    orders = np.asarray(order_count, dtype=np.int64)
+    contact = np.array(last_contact_at, dtype='datetime64[us]')
+    now = np.datetime64(now or datetime.utcnow(), 'us')
+    
+    revenue_score = np.select(
+        [revenue >= 10000, revenue >= 5000, revenue >= 2000, revenue >= 1000, revenue >= 500, revenue > 0],
+        [40, 35, 30, 25, 20, 15], 0)
+    order_score = np.select(
+        [orders >= 20, orders >= 10, orders >= 5, orders >= 3, orders >= 1],
+        [30, 25, 20, 15, 10], 0)
+    
+    # Ganze Tage seit dem letzten Kontakt (abgerundet wie timedelta.days)
+    has_contact = ~np.isnat(contact)
+    days = (now - np.where(has_contact, contact, now)) // np.timedelta64(1, 'D')
+    contact_score = np.where(has_contact, np.select(
+        [days <= 7, days <= 30, days <= 90, days <= 180, days <= 365],
+        [30, 25, 20, 15, 10], 5), 0)
+    
+    scores = revenue_score + order_score + contact_score
+    ratings = np.select([scores >= 85, scores >= 70, scores >= 55, scores >= 40],
+                        ['A+', 'A', 'B', 'C'], 'D')
+    return scores, ratings
+
+
+def _customer_score_source():
+    """
+    Kennzahlen und bisheriger Score der Kunden.
+    
+    Umsatz als float statt Decimal; den letzten Kontakt liefert SQLite als
+    ISO-Text, den NumPy deutlich schneller umwandelt als datetime-Objekte.
+    """
+    customers = Customer.__table__
+    return db.select(customers.c.id, db.cast(customers.c.total_revenue, db.Float),
+                     customers.c.order_count, db.type_coerce(customers.c.last_contact_at, db.String),
+                     customers.c.score, customers.c.score_rating)
+
+
+def _store_customer_scores(connection, rows, now):
+    """
+    Berechnet die Scores zu den Zeilen aus _customer_score_source() und schreibt nur geänderte zurück.
+    
+    Geschrieben wird gruppiert nach Score (höchstens 101 Werte) mit je einem
+    UPDATE ... WHERE id IN (...) pro _STATS_CHUNK_SIZE Kunden statt einem
+    UPDATE pro Zeile.
+    """
+    import numpy as np
+    
+    if not rows:
+        return 0
+    
+    ids, revenue, order_count, last_contact, old_scores, old_ratings = zip(*rows)
+    scores, ratings = calculate_customer_scores(revenue, order_count, last_contact, now)
+    changed = (scores != np.asarray(old_scores)) | (ratings != np.asarray(old_ratings))
+    if not changed.any():
+        return 0
+    
+    ids = np.asarray(ids)
+    customers = Customer.__table__
+    for score in np.unique(scores[changed]).tolist():
+        selected = changed & (scores == score)
+        rating = str(ratings[selected][0])
+        score_ids = ids[selected].tolist()
+        for start in range(0, len(score_ids), _STATS_CHUNK_SIZE):
+            connection.execute(
+                customers.update()
+                         .where(customers.c.id.in_(score_ids[start:start + _STATS_CHUNK_SIZE]))
+                         .values(score=score, score_rating=rating, score_label=CUSTOMER_RATINGS[rating][0])
+            )
+    return int(changed.sum())
+
+
+def score_customers(customer_ids, now=None):
+    """
+    Batch-Score für mehrere Kunden aus den gespeicherten Kennzahlen, ohne zu speichern.
+    
+    Eine Abfrage für alle Kunden, die Schwellenwerte über
+    calculate_customer_scores(). Die Kundenliste verwendet die gespeicherten
+    Spalten score/score_rating; diese Funktion liefert den Stand "jetzt".
+    
+    Rückgabe: dict customer_id -> {'score', 'rating', 'label', 'color'}
+    """
+    customer_ids = sorted({customer_id for customer_id in customer_ids if customer_id is not None})
+    if not customer_ids:
+        return {}
+    
+    customers = Customer.__table__
+    rows = []
+    for start in range(0, len(customer_ids), _STATS_CHUNK_SIZE):
+        chunk = customer_ids[start:start + _STATS_CHUNK_SIZE]
+        rows.extend(db.session.execute(_customer_score_source().where(customers.c.id.in_(chunk))).all())
+    if not rows:
+        return {}
+    
+    ids, revenue, order_count, last_contact, _, _ = zip(*rows)
+    scores, ratings = calculate_customer_scores(revenue, order_count, last_contact, now=now)
+    return {
+        customer_id: {'score': int(score), 'rating': str(rating),
+                      'label': CUSTOMER_RATINGS[str(rating)][0], 'color': CUSTOMER_RATINGS[str(rating)][1]}
+        for customer_id, score, rating in zip(ids, scores, ratings)
+    }
+
+
+def refresh_customer_scores(customer_ids, connection=None, now=None):
+    """
+    Berechnet den gespeicherten Score für die angegebenen Kunden neu.
+    
+    Wird von refresh_customer_stats() aufgerufen, sobald sich Kennzahlen ändern.
+    
+    Rückgabe: Anzahl der Kunden, deren Score sich geändert hat
+    """
+    customer_ids = sorted({customer_id for customer_id in customer_ids if customer_id is not None})
+    if not customer_ids:
+        return 0
+    
+    if connection is None:
+        connection = db.session.connection()
+    
+    now = now or datetime.utcnow()
+    customers = Customer.__table__
+    changed = 0
+    for start in range(0, len(customer_ids), _STATS_CHUNK_SIZE):
+        chunk = customer_ids[start:start + _STATS_CHUNK_SIZE]
+        rows = connection.execute(_customer_score_source().where(customers.c.id.in_(chunk))).all()
+        changed += _store_customer_scores(connection, rows, now)
+    return changed
+
+
+def rebuild_customer_scores(connection=None, now=None, progress=None):
+    """
+    Berechnet den Score aller Kunden neu.
+    
+    Liest die Kennzahlen blockweise (_SCORE_CHUNK_SIZE Kunden, Keyset über
+    die ID), berechnet jeden Block mit calculate_customer_scores() und
+    schreibt nur geänderte Zeilen zurück. Nötig, weil der Kontakt-Score mit
+    der Zeit sinkt (täglicher Job recompute-scores), sowie nach Upgrades.
+    progress(erledigt, gesamt) wird nach jedem Block aufgerufen.
+    
+    Rückgabe: Anzahl der Kunden, deren Score sich geändert hat
+    """
+    if connection is None:
+        connection = db.session.connection()
+    
+    now = now or datetime.utcnow()
+    customers = Customer.__table__
+    total = connection.execute(db.select(db.func.count()).select_from(customers)).scalar()
+    done = changed = last_id = 0
+    while True:
+        rows = connection.execute(
+            _customer_score_source().where(customers.c.id > last_id)
+                                    .order_by(customers.c.id).limit(_SCORE_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        changed += _store_customer_scores(connection, rows, now)
+        last_id = rows[-1][0]
+        done += len(rows)
+        if progress is not None:
+            progress(done, total)
+    return changed
 
 
 class Order(db.Model):
@@ -162,11 +456,22 @@ class Order(db.Model):
     __tablename__ = 'orders'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id', ondelete='CASCADE'), nullable=False)
-    order_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # active_history: Beim Umbuchen wird der alte Wert geladen, damit auch der
+    # alte Kunde bzw. Monat neu berechnet wird (siehe after_flush-Listener)
+    customer_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('customers.id', ondelete='CASCADE'), nullable=False),
+        active_history=True)
+    order_date = db.column_property(
+        db.Column(db.DateTime, nullable=False, default=datetime.utcnow),
+        active_history=True)
     status = db.Column(db.String(20), default='Offen')
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
     
+    # Änderungsstand (ETag/Last-Modified der API); Positionsänderungen zählen mit
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                        onupdate=ROW_VERSION_ONUPDATE)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
     # Beziehungen
     customer = db.relationship('Customer', back_populates='orders')
     items = db.relationship('OrderItem', back_populates='order', cascade='all, delete-orphan')
@@ -179,11 +484,6 @@ class Order(db.Model):
     
     def __repr__(self):
         return f'<Order {self.id} - {self.customer.full_name if self.customer else "N/A"}>'
-    
-    @property
-    def item_count(self):
-        """Anzahl der Positionen in der Bestellung"""
-        return len(self.items)
 
 
 class OrderItem(db.Model):
@@ -203,12 +503,27 @@ class OrderItem(db.Model):
     def __repr__(self):
         return f'<OrderItem {self.id} - {self.quantity}x {self.product.name if self.product else "N/A"}>'
     
+    # Indizes
+    __table_args__ = (
+        db.Index('idx_order_item_order', 'order_id'),
+    )
+    
     @property
     def subtotal(self):
         """Zwischensumme (Menge * Einzelpreis)"""
         return float(self.quantity * self.unit_price)
 
 
+# Anzahl der Positionen als korrelierte Unterabfrage, damit beim Anzeigen
+# nicht alle OrderItems einer Bestellung geladen werden müssen
+Order.item_count = db.column_property(
+    db.select(db.func.count(OrderItem.id))
+      .where(OrderItem.order_id == Order.id)
+      .correlate_except(OrderItem)
+      .scalar_subquery()
+)
+
+
 class Product(db.Model):
     """Produktmodell"""
     __tablename__ = 'products'
@@ -230,13 +545,20 @@ class Contact(db.Model):
     __tablename__ = 'contacts'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id', ondelete='CASCADE'), nullable=False)
+    customer_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('customers.id', ondelete='CASCADE'), nullable=False),
+        active_history=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     channel = db.Column(db.String(20), nullable=False)  # Telefon, E-Mail, Meeting, Chat
     subject = db.Column(db.String(255))
     notes = db.Column(db.Text)
     contact_time = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
+    # Änderungsstand (ETag/Last-Modified der API)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                        onupdate=ROW_VERSION_ONUPDATE)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
     # Beziehungen
     customer = db.relationship('Customer', back_populates='contacts')
     user = db.relationship('User', back_populates='contacts')
@@ -266,3 +588,746 @@ class User(db.Model):
     
     def __repr__(self):
         return f'<User {self.name} - {self.role}>'
+
+
+class CustomerMonthlyRevenue(db.Model):
+    """Vorberechneter Umsatz pro Kunde und Kalendermonat (siehe refresh_monthly_revenue)"""
+    __tablename__ = 'customer_monthly_revenue'
+    
+    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id', ondelete='CASCADE'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)  # Erster Tag des Monats
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<CustomerMonthlyRevenue {self.customer_id} {self.month:%Y-%m}>'
+
+
+class Job(db.Model):
+    """Hintergrund-Job in der Warteschlange (siehe crm_app/jobs.py)"""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    # Gleicher Schlüssel = gleiche Arbeit; höchstens ein offener Job pro Schlüssel
+    dedupe_key = db.Column(db.String(200))
+    payload = db.Column(db.JSON)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    progress = db.Column(db.Integer, nullable=False, default=0)  # 0-100 %
+    progress_message = db.Column(db.String(255))
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    # Worker, der den Job gerade ausführt, und dessen letztes Lebenszeichen
+    locked_by = db.Column(db.String(100))
+    heartbeat_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('idx_job_queue', 'status', 'run_after'),
+        db.Index('idx_job_dedupe', 'dedupe_key', unique=True,
+                 sqlite_where=db.text("status IN ('queued', 'running')"),
+                 postgresql_where=db.text("status IN ('queued', 'running')")),
+    )
+    
+    @property
+    def is_active(self):
+        return self.status in ('queued', 'running')
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+
+class RowCount(db.Model):
+    """Per Trigger gepflegte Zeilenzahl einer Tabelle (siehe create_row_counters)"""
+    __tablename__ = 'row_counts'
+    
+    table_name = db.Column(db.String(50), primary_key=True)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    # Datenversion: steigt bei jeder Änderung, die gefilterte Anzahlen verändern kann
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<RowCount {self.table_name} {self.row_count}>'
+
+
+# ---------------------------------------------------------------------------
+# Lazy Loading in Requests verbieten (Entwicklung/Tests)
+# ---------------------------------------------------------------------------
+
+def _raiseload_enabled():
+    """Aktiv, wenn SQLALCHEMY_RAISELOAD gesetzt ist oder die App im Testmodus läuft"""
+    if not has_request_context():
+        return False
+    return current_app.config.get('SQLALCHEMY_RAISELOAD') or current_app.testing
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _apply_default_raiseload(orm_execute_state):
+    """
+    Hängt raiseload('*') an jede ORM-Abfrage innerhalb eines Requests an.
+    
+    Jede Route muss die Beziehungen, die ihr Template verwendet, per
+    joinedload/selectinload/contains_eager deklarieren; ungeplantes Lazy
+    Loading (N+1) löst sofort eine Exception aus, statt still zu laufen.
+    Explizit angegebene Loader-Optionen haben Vorrang vor dem Wildcard.
+    """
+    if (orm_execute_state.is_select
+            and not orm_execute_state.is_column_load
+            and _raiseload_enabled()):
+        orm_execute_state.statement = orm_execute_state.statement.options(db.raiseload('*'))
+
+
+# ---------------------------------------------------------------------------
+# Pflege der denormalisierten Kunden-Kennzahlen
+# ---------------------------------------------------------------------------
+
+# Attribute, deren Änderung die Kennzahlen eines Kunden beeinflusst
+_STATS_ATTRIBUTES = {
+    'Order': ('customer_id', 'total_amount'),
+    'Contact': ('customer_id', 'contact_time'),
+}
+
+# SQLite erlaubt nur eine begrenzte Anzahl an Parametern pro Statement
+_STATS_CHUNK_SIZE = 500
+
+
+def _customer_stats_values():
+    """Korrelierte Unterabfragen zur Berechnung der Kennzahlen eines Kunden"""
+    customers = Customer.__table__
+    orders = Order.__table__
+    contacts = Contact.__table__
+    
+    return {
+        'total_revenue': db.select(db.func.coalesce(db.func.sum(orders.c.total_amount), 0))
+                           .where(orders.c.customer_id == customers.c.id)
+                           .scalar_subquery(),
+        'order_count': db.select(db.func.count(orders.c.id))
+                         .where(orders.c.customer_id == customers.c.id)
+                         .scalar_subquery(),
+        'last_contact_at': db.select(db.func.max(contacts.c.contact_time))
+                             .where(contacts.c.customer_id == customers.c.id)
+                             .scalar_subquery(),
+    }
+
+
+def refresh_customer_stats(customer_ids, connection=None):
+    """
+    Berechnet die gespeicherten Kennzahlen für die angegebenen Kunden neu.
+    
+    Pro Kunde werden nur dessen eigene Bestellungen und Kontakte über die
+    Indizes idx_customer_order_date und idx_customer_contact_time gelesen.
+    """
+    customer_ids = sorted({customer_id for customer_id in customer_ids if customer_id is not None})
+    if not customer_ids:
+        return
+    
+    if connection is None:
+        connection = db.session.connection()
+    
+    customers = Customer.__table__
+    values = _customer_stats_values()
+    for start in range(0, len(customer_ids), _STATS_CHUNK_SIZE):
+        chunk = customer_ids[start:start + _STATS_CHUNK_SIZE]
+        connection.execute(
+            customers.update().where(customers.c.id.in_(chunk)).values(**values)
+        )
+    refresh_customer_scores(customer_ids, connection=connection)
+
+
+def rebuild_customer_stats(connection=None):
+    """
+    Berechnet die Kennzahlen aller Kunden von Grund auf neu.
+    
+    Dient zur Reparatur, falls die Werte durch Bulk-Operationen oder direkte
+    SQL-Änderungen abseits der ORM-Session auseinandergelaufen sind.
+    
+    Rückgabe: Anzahl der aktualisierten Kunden
+    """
+    if connection is None:
+        connection = db.session.connection()
+    
+    result = connection.execute(Customer.__table__.update().values(**_customer_stats_values()))
+    return result.rowcount
+
+
+def _collect_stats_customer_ids(session):
+    """Sammelt die Kunden-IDs aller im Flush geänderten Bestellungen und Kontakte"""
+    customer_ids = set()
+    
+    for obj in session.new | session.deleted:
+        attributes = _STATS_ATTRIBUTES.get(type(obj).__name__)
+        if attributes:
+            state = inspect(obj)
+            customer_ids.add(state.dict.get('customer_id'))
+            customer_ids.update(state.attrs.customer_id.history.deleted)
+    
+    for obj in session.dirty:
+        attributes = _STATS_ATTRIBUTES.get(type(obj).__name__)
+        if not attributes:
+            continue
+        state = inspect(obj)
+        if any(state.attrs[name].history.has_changes() for name in attributes):
+            customer_ids.add(state.dict.get('customer_id'))
+            customer_ids.update(state.attrs.customer_id.history.deleted)
+    
+    customer_ids.discard(None)
+    return customer_ids
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_customer_stats(session, flush_context):
+    """Hält die Kunden-Kennzahlen bei jedem Flush von Order/Contact aktuell"""
+    customer_ids = _collect_stats_customer_ids(session)
+    if not customer_ids:
+        return
+    
+    refresh_customer_stats(customer_ids, connection=session.connection())
+    session.info.setdefault('stale_customer_ids', set()).update(customer_ids)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _expire_customer_stats(session, flush_context):
+    """Verwirft veraltete Kennzahlen bereits geladener Kunden-Objekte"""
+    for customer_id in session.info.pop('stale_customer_ids', ()):
+        customer = session.identity_map.get(session.identity_key(Customer, customer_id))
+        if customer is not None:
+            session.expire(customer, ['total_revenue', 'order_count', 'last_contact_at',
+                                      'score', 'score_rating', 'score_label'])
+
+
+# ---------------------------------------------------------------------------
+# Monatsumsätze pro Kunde (Rollup für Zeitraum-Umsätze)
+# ---------------------------------------------------------------------------
+
+def month_start(value):
+    """Erster Tag des Monats (00:00 Uhr) zu einem date/datetime"""
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(value):
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def _as_datetime(value):
+    """date -> datetime um 00:00 Uhr (wie beim direkten Vergleich mit order_date)"""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime(value.year, value.month, value.day)
+
+
+def _order_month(orders, connection):
+    """SQL-Ausdruck: Monatsanfang des Bestelldatums"""
+    if connection.dialect.name == 'sqlite':
+        return db.func.date(orders.c.order_date, 'start of month', type_=db.Date)
+    return db.cast(db.func.date_trunc('month', orders.c.order_date), db.Date)
+
+
+def _insert_monthly_revenue(connection, *conditions):
+    """Berechnet die Monatsumsätze aller Bestellungen, die conditions erfüllen, und fügt sie ein"""
+    orders = Order.__table__
+    month = _order_month(orders, connection)
+    aggregated = db.select(
+        orders.c.customer_id,
+        month,
+        db.func.sum(orders.c.total_amount),
+        db.func.count(orders.c.id),
+    ).where(*conditions).group_by(orders.c.customer_id, month)
+    
+    rollup = CustomerMonthlyRevenue.__table__
+    return connection.execute(rollup.insert().from_select(
+        ['customer_id', 'month', 'revenue', 'order_count'], aggregated
+    ))
+
+
+def refresh_monthly_revenue(customer_ids, connection=None, months=None):
+    """
+    Berechnet die Monatsumsätze der angegebenen Kunden neu.
+    
+    Mit months (dict customer_id -> Menge von Monatsanfängen) werden nur die
+    betroffenen Monate neu berechnet, wie beim Flush einzelner Bestellungen.
+    Ohne months werden alle Monate der Kunden neu aufgebaut (z.B. nach Importen).
+    """
+    customer_ids = sorted({customer_id for customer_id in customer_ids if customer_id is not None})
+    if not customer_ids:
+        return
+    
+    if connection is None:
+        connection = db.session.connection()
+    
+    orders = Order.__table__
+    rollup = CustomerMonthlyRevenue.__table__
+    
+    if months is None:
+        for start in range(0, len(customer_ids), _STATS_CHUNK_SIZE):
+            chunk = customer_ids[start:start + _STATS_CHUNK_SIZE]
+            connection.execute(rollup.delete().where(rollup.c.customer_id.in_(chunk)))
+            _insert_monthly_revenue(connection, orders.c.customer_id.in_(chunk))
+        return
+    
+    for customer_id in customer_ids:
+        customer_months = months.get(customer_id)
+        if not customer_months:
+            continue
+        # Zusammenhängender Bereich vom ersten bis zum letzten betroffenen Monat
+        first, end = min(customer_months), _next_month(max(customer_months))
+        connection.execute(rollup.delete().where(
+            rollup.c.customer_id == customer_id,
+            rollup.c.month >= first.date(),
+            rollup.c.month < end.date(),
+        ))
+        _insert_monthly_revenue(connection,
+                                orders.c.customer_id == customer_id,
+                                orders.c.order_date >= first,
+                                orders.c.order_date < end)
+
+
+def rebuild_monthly_revenue(connection=None):
+    """
+    Baut die Monatsumsätze aller Kunden von Grund auf neu auf.
+    
+    Rückgabe: Anzahl der Kunden-Monate
+    """
+    if connection is None:
+        connection = db.session.connection()
+    
+    connection.execute(CustomerMonthlyRevenue.__table__.delete())
+    return _insert_monthly_revenue(connection).rowcount
+
+
+def customer_revenue_between(customer_id, start=None, end=None):
+    """
+    Umsatz eines Kunden mit start <= order_date <= end (Grenzen optional).
+    
+    Vollständig enthaltene Monate werden aus customer_monthly_revenue gelesen,
+    nur die angeschnittenen Monate am Anfang und Ende über den Index
+    idx_customer_order_date direkt summiert. Die Kosten hängen damit nicht
+    von der Anzahl der Bestellungen im Zeitraum ab. Alle Teile werden in
+    einem einzigen Statement abgefragt.
+    """
+    start, end = _as_datetime(start), _as_datetime(end)
+    orders = Order.__table__
+    rollup = CustomerMonthlyRevenue.__table__
+    
+    def order_sum(*conditions):
+        return db.select(db.func.coalesce(db.func.sum(orders.c.total_amount), 0)) \
+                 .where(orders.c.customer_id == customer_id, *conditions).scalar_subquery()
+    
+    # Volle Monate: [first_full, last_full)
+    first_full = None if start is None else (start if start == month_start(start) else _next_month(start))
+    last_full = None if end is None else month_start(end)
+    
+    if first_full is not None and last_full is not None and first_full >= last_full:
+        # Kein voller Monat im Zeitraum
+        parts = [order_sum(orders.c.order_date >= start, orders.c.order_date <= end)]
+    else:
+        month_conditions = [rollup.c.customer_id == customer_id]
+        if first_full is not None:
+            month_conditions.append(rollup.c.month >= first_full.date())
+        if last_full is not None:
+            month_conditions.append(rollup.c.month < last_full.date())
+        parts = [db.select(db.func.coalesce(db.func.sum(rollup.c.revenue), 0))
+                   .where(*month_conditions).scalar_subquery()]
+        
+        if start is not None and start < first_full:
+            parts.append(order_sum(orders.c.order_date >= start, orders.c.order_date < first_full))
+        if end is not None:
+            parts.append(order_sum(orders.c.order_date >= last_full, orders.c.order_date <= end))
+    
+    total = db.session.execute(db.select(sum(parts[1:], parts[0]))).scalar()
+    return float(total) if total else 0.0
+
+
+def _collect_revenue_months(session):
+    """Sammelt pro Kunde die Monate aller im Flush geänderten Bestellungen"""
+    months = {}
+    
+    def add(customer_id, order_date):
+        if customer_id is not None and order_date is not None:
+            months.setdefault(customer_id, set()).add(month_start(order_date))
+    
+    for obj in session.new | session.deleted:
+        if isinstance(obj, Order):
+            state = inspect(obj)
+            add(state.dict.get('customer_id'), state.dict.get('order_date'))
+    
+    for obj in session.dirty:
+        if not isinstance(obj, Order):
+            continue
+        state = inspect(obj)
+        history = {name: state.attrs[name].history for name in ('customer_id', 'order_date', 'total_amount')}
+        if not any(h.has_changes() for h in history.values()):
+            continue
+        customer_id = state.dict.get('customer_id')
+        order_date = state.dict.get('order_date')
+        add(customer_id, order_date)
+        # Alter Monat bzw. alter Kunde, falls umgebucht
+        add(history['customer_id'].deleted[0] if history['customer_id'].deleted else customer_id,
+            history['order_date'].deleted[0] if history['order_date'].deleted else order_date)
+    
+    return months
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_monthly_revenue(session, flush_context):
+    """Hält customer_monthly_revenue bei jedem Flush von Bestellungen aktuell"""
+    months = _collect_revenue_months(session)
+    if months:
+        refresh_monthly_revenue(months.keys(), connection=session.connection(), months=months)
+
+
+# ---------------------------------------------------------------------------
+# Versionsstand von Bestellungen bei Positionsänderungen
+# ---------------------------------------------------------------------------
+
+@event.listens_for(Session, 'after_flush')
+def _touch_orders_of_changed_items(session, flush_context):
+    """Erhöht version/updated_at einer Bestellung, wenn sich ihre Positionen ändern"""
+    order_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, OrderItem):
+            state = inspect(obj)
+            order_ids.update(value for value in (obj.__dict__.get('order_id'),
+                                                 *state.attrs.order_id.history.deleted)
+                             if value is not None)
+    # Neue Bestellungen haben ihre Positionen gerade erst bekommen
+    order_ids -= {obj.id for obj in session.new if isinstance(obj, Order)}
+    
+    if order_ids:
+        orders = Order.__table__
+        connection = session.connection()
+        order_ids = sorted(order_ids)
+        for start in range(0, len(order_ids), _STATS_CHUNK_SIZE):
+            chunk = order_ids[start:start + _STATS_CHUNK_SIZE]
+            # version wird über ROW_VERSION_ONUPDATE mit erhöht
+            connection.execute(orders.update().where(orders.c.id.in_(chunk))
+                               .values(updated_at=datetime.utcnow()))
+
+
+# ---------------------------------------------------------------------------
+# Volltextsuche über Kunden (SQLite FTS5)
+# ---------------------------------------------------------------------------
+
+# External-Content-Tabelle: der Index speichert nur Tokens, die Daten bleiben
+# in customers. Trigger halten den Index bei INSERT/UPDATE/DELETE synchron,
+# auch für Bulk-Inserts abseits der ORM-Session.
+CUSTOMER_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5(
+        first_name, last_name, email, phone,
+        content='customers', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS customers_fts_ai AFTER INSERT ON customers BEGIN
+        INSERT INTO customers_fts(rowid, first_name, last_name, email, phone)
+        VALUES (new.id, new.first_name, new.last_name, new.email, new.phone);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS customers_fts_ad AFTER DELETE ON customers BEGIN
+        INSERT INTO customers_fts(customers_fts, rowid, first_name, last_name, email, phone)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS customers_fts_au
+    AFTER UPDATE OF first_name, last_name, email, phone ON customers BEGIN
+        INSERT INTO customers_fts(customers_fts, rowid, first_name, last_name, email, phone)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone);
+        INSERT INTO customers_fts(rowid, first_name, last_name, email, phone)
+        VALUES (new.id, new.first_name, new.last_name, new.email, new.phone);
+    END
+    """,
+]
+
+# Cache: Engine -> ob customers_fts vorhanden ist
+_customer_fts_available = WeakKeyDictionary()
+
+
+def sqlite_supports_fts5(connection):
+    """Prüft, ob die SQLite-Bibliothek mit FTS5 kompiliert wurde"""
+    if connection.dialect.name != 'sqlite':
+        return False
+    return bool(connection.exec_driver_sql(
+        "SELECT sqlite_compileoption_used('ENABLE_FTS5')"
+    ).scalar())
+
+
+def create_customer_search_index(connection, rebuild=False):
+    """
+    Legt den FTS5-Index samt Triggern an (falls unterstützt).
+    
+    Mit rebuild=True wird der Index aus der customers-Tabelle neu aufgebaut,
+    z.B. beim Upgrade einer bestehenden Datenbank.
+    
+    Rückgabe: True, wenn der Index angelegt wurde
+    """
+    if not sqlite_supports_fts5(connection):
+        return False
+    
+    for statement in CUSTOMER_FTS_DDL:
+        connection.exec_driver_sql(statement)
+    if rebuild:
+        connection.exec_driver_sql("INSERT INTO customers_fts(customers_fts) VALUES ('rebuild')")
+    
+    _customer_fts_available.pop(connection.engine, None)
+    return True
+
+
+@event.listens_for(Customer.__table__, 'after_create')
+def _create_customer_fts(target, connection, **kw):
+    create_customer_search_index(connection)
+
+
+@event.listens_for(Customer.__table__, 'before_drop')
+def _drop_customer_fts(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql("DROP TABLE IF EXISTS customers_fts")
+        _customer_fts_available.pop(connection.engine, None)
+
+
+def customer_search_available():
+    """Prüft (gecacht pro Engine), ob der Volltextindex genutzt werden kann"""
+    engine = db.engine
+    if engine not in _customer_fts_available:
+        available = False
+        if engine.dialect.name == 'sqlite':
+            with engine.connect() as connection:
+                available = connection.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'customers_fts'"
+                ).first() is not None
+        _customer_fts_available[engine] = available
+    return _customer_fts_available[engine]
+
+
+def build_fts_query(search_query):
+    """
+    Wandelt eine Benutzereingabe in einen FTS5-MATCH-Ausdruck um.
+    
+    Jedes Wort wird als Präfix gesucht, alle Wörter müssen vorkommen:
+    'anna berg' -> '"anna"* AND "berg"*'. Sonderzeichen (z.B. in E-Mail-
+    Adressen oder Telefonnummern) trennen Wörter wie im Index selbst.
+    
+    Rückgabe: MATCH-Ausdruck oder None, wenn die Eingabe keine Wörter enthält
+    """
+    terms = re.findall(r'\w+', search_query)
+    if not terms:
+        return None
+    return ' AND '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def customer_search_subquery(search_query):
+    """
+    Subquery (customer_id, rank) der Treffer im Volltextindex.
+    
+    rank ist der BM25-Wert von FTS5 (kleiner = relevanter).
+    Rückgabe: Subquery oder None, wenn FTS nicht verfügbar oder die Eingabe leer ist
+    """
+    match_expression = build_fts_query(search_query)
+    if match_expression is None or not customer_search_available():
+        return None
+    
+    fts = db.table('customers_fts', db.column('rowid'), db.column('rank'))
+    return db.select(fts.c.rowid.label('customer_id'), fts.c.rank.label('rank'))\
+             .where(db.literal_column('customers_fts').op('MATCH')(match_expression))\
+             .subquery('customer_search')
+
+
+# ---------------------------------------------------------------------------
+# Typeahead für Kundenauswahl (Präfixsuche über Name und E-Mail)
+# ---------------------------------------------------------------------------
+
+def _like_prefix(term):
+    """LIKE-Muster für eine Präfixsuche (Platzhalter in der Eingabe maskiert)"""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def customer_typeahead(term, limit=10):
+    """
+    Kunden, deren Name oder E-Mail mit `term` beginnt.
+    
+    "berg" sucht im Nachnamen, "berg an" bzw. "berg, an" in Nachname und
+    Vorname (auch in umgekehrter Reihenfolge). Einzelne Wörter werden
+    zusätzlich in der E-Mail gesucht, reine Zahlen als Kundennummer. Jede Variante ist
+    eine eigene Abfrage über einen NOCASE-Index (idx_customer_name,
+    idx_customer_email), die höchstens `limit` Zeilen liest.
+    
+    Rückgabe: Liste von Customer, sortiert nach Nachname, Vorname
+    """
+    words = [word for word in re.split(r'[\s,]+', term.strip()) if word]
+    if not words:
+        return []
+    
+    last_name = Customer.last_name.collate('NOCASE')
+    first_name = Customer.first_name.collate('NOCASE')
+    
+    conditions = []
+    if len(words) == 1:
+        conditions.append(Customer.last_name.like(_like_prefix(words[0]), escape='\\'))
+    else:
+        # Nachname zuerst (wie angezeigt) oder Vorname zuerst
+        for last, first in ((words[0], ' '.join(words[1:])), (words[-1], ' '.join(words[:-1]))):
+            conditions.append(db.and_(Customer.last_name.like(_like_prefix(last), escape='\\'),
+                                      Customer.first_name.like(_like_prefix(first), escape='\\')))
+    
+    found = {}
+    for condition in conditions:
+        for customer in Customer.query.filter(condition).order_by(last_name, first_name).limit(limit):
+            found[customer.id] = customer
+    
+    if len(words) == 1:
+        email_matches = Customer.query.filter(
+            Customer.email.like(_like_prefix(words[0]), escape='\\')
+        ).order_by(Customer.email.collate('NOCASE')).limit(limit)
+        for customer in email_matches:
+            found[customer.id] = customer
+        if words[0].isdigit():
+            customer = db.session.get(Customer, int(words[0]))
+            if customer is not None:
+                found[customer.id] = customer
+    
+    matches = sorted(found.values(), key=lambda c: (c.last_name.lower(), c.first_name.lower(), c.id))
+    return matches[:limit]
+
+
+# ---------------------------------------------------------------------------
+# Zeilenzähler für Gesamtanzahlen (SQLite-Trigger)
+# ---------------------------------------------------------------------------
+
+# Gezählte Tabellen -> Spalten, deren Änderung die Trefferzahl gefilterter
+# Listen verändern kann (Suche, Rating-Filter); None = nur INSERT/DELETE
+COUNTED_TABLES = {
+    'customers': 'first_name, last_name, email, phone, score_rating',
+    'orders': None,
+    'contacts': None,
+}
+
+# Cache: Engine -> ob die Zähler-Trigger vorhanden sind
+_row_counters_available = WeakKeyDictionary()
+
+
+def _row_counter_ddl(table_name, update_columns):
+    """CREATE TRIGGER-Anweisungen für eine gezählte Tabelle"""
+    statements = [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table_name}_count_ai AFTER INSERT ON {table_name} BEGIN
+            UPDATE row_counts SET row_count = row_count + 1, version = version + 1
+            WHERE table_name = '{table_name}';
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table_name}_count_ad AFTER DELETE ON {table_name} BEGIN
+            UPDATE row_counts SET row_count = row_count - 1, version = version + 1
+            WHERE table_name = '{table_name}';
+        END
+        """,
+    ]
+    if update_columns:
+        statements.append(f"""
+        CREATE TRIGGER IF NOT EXISTS {table_name}_count_au
+        AFTER UPDATE OF {update_columns} ON {table_name} BEGIN
+            UPDATE row_counts SET version = version + 1 WHERE table_name = '{table_name}';
+        END
+        """)
+    return statements
+
+
+def create_row_counters(connection, rebuild=False):
+    """
+    Legt die Zähler-Trigger für COUNTED_TABLES an (nur SQLite).
+    
+    Mit rebuild=True werden die Zeilenzahlen per COUNT(*) neu ermittelt,
+    z.B. beim Upgrade einer bestehenden Datenbank oder nach dem Seeding.
+    
+    Rückgabe: True, wenn die Zähler angelegt wurden
+    """
+    if connection.dialect.name != 'sqlite':
+        return False
+    
+    for table_name, update_columns in COUNTED_TABLES.items():
+        connection.exec_driver_sql(
+            "INSERT OR IGNORE INTO row_counts (table_name, row_count, version) VALUES (?, 0, 0)",
+            (table_name,)
+        )
+        for statement in _row_counter_ddl(table_name, update_columns):
+            connection.exec_driver_sql(statement)
+        if rebuild:
+            connection.exec_driver_sql(
+                f"UPDATE row_counts SET row_count = (SELECT count(*) FROM {table_name}), "
+                f"version = version + 1 WHERE table_name = ?",
+                (table_name,)
+            )
+    
+    _row_counters_available.pop(connection.engine, None)
+    return True
+
+
+def drop_row_counter_triggers(connection):
+    """
+    Entfernt die Zähler-Trigger, z.B. für schnelle Bulk-Inserts.
+    
+    Danach create_row_counters(connection, rebuild=True) aufrufen.
+    
+    Rückgabe: True, wenn Trigger vorhanden waren
+    """
+    if connection.dialect.name != 'sqlite':
+        return False
+    
+    names = [name for name, in connection.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%\\_count\\_a_' ESCAPE '\\'"
+    )]
+    for name in names:
+        connection.exec_driver_sql(f"DROP TRIGGER {name}")
+    _row_counters_available.pop(connection.engine, None)
+    return bool(names)
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_row_counters(target, connection, tables=(), **kw):
+    # Erst nach allen Tabellen: die Trigger verweisen auf customers, orders, contacts.
+    # rebuild zählt auch Zeilen mit, falls row_counts in einer bestehenden Datenbank
+    # angelegt wird (upgrade_db.py)
+    if RowCount.__table__ in tables:
+        create_row_counters(connection, rebuild=True)
+
+
+def row_counters_available():
+    """Prüft (gecacht pro Engine), ob die Zähler per Trigger gepflegt werden"""
+    engine = db.engine
+    if engine not in _row_counters_available:
+        available = False
+        if engine.dialect.name == 'sqlite':
+            with engine.connect() as connection:
+                available = connection.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'customers_count_ai'"
+                ).first() is not None
+        _row_counters_available[engine] = available
+    return _row_counters_available[engine]
+
+
+def table_row_count(table_name):
+    """
+    Zeilenzahl und Datenversion einer Tabelle aus COUNTED_TABLES.
+    
+    Ohne Zähler-Trigger (andere Datenbanken, nicht migrierte Datenbank)
+    wird per COUNT(*) gezählt; die Version ist dann None.
+    
+    Rückgabe: (row_count, version)
+    """
+    if row_counters_available():
+        row = db.session.execute(
+            db.select(RowCount.row_count, RowCount.version)
+              .where(RowCount.table_name == table_name)
+        ).first()
+        if row is not None:
+            return row.row_count, row.version
+    
+    table = db.metadata.tables[table_name]
+    return db.session.execute(db.select(db.func.count()).select_from(table)).scalar(), None
@@ -0,0 +1,65 @@
+"""
+Gemeinsame Fixtures: Test-App mit eigener SQLite-Datenbank und Demo-Daten
+
+Die Datenbank wird einmal pro Testlauf mit migrations/init_db.py befüllt;
+jede App wird über create_app() mit eigenen Umgebungsvariablen erzeugt.
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Ohne Worker-Threads und Bytecode-Dateien, Replica und Profiler nur auf Wunsch
+BASE_ENV = {
+    'JOBS_WORKER_THREADS': '0',
+    'JINJA_BYTECODE_CACHE_DIR': '',
+    'SQLALCHEMY_REPLICA_URI': '',
+    'SQL_PROFILER': '0',
+    'SQLALCHEMY_RAISELOAD': '0',
+}
+
+
+@pytest.fixture(scope='session')
+def database_uri(tmp_path_factory):
+    """SQLite-Datenbank mit den 30 Demo-Kunden von init_db.py"""
+    uri = f"sqlite:///{tmp_path_factory.mktemp('db') / 'crm.db'}"
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in dict(BASE_ENV, SQLALCHEMY_DATABASE_URI=uri).items():
+            patch.setenv(name, value)
+        from migrations import init_db
+        random.seed(1)
+        init_db.init_database()
+    return uri
+
+
+@pytest.fixture
+def make_app(database_uri, monkeypatch):
+    """Erzeugt eine Test-App; Schlüsselwörter überschreiben Umgebungsvariablen"""
+    def factory(**env):
+        for name, value in {**BASE_ENV, 'SQLALCHEMY_DATABASE_URI': database_uri, **env}.items():
+            monkeypatch.setenv(name, value)
+        from app import create_app
+        app = create_app()
+        app.config['TESTING'] = True
+        return app
+    return factory
+
+
+@pytest.fixture
+def make_writable_app(database_uri, make_app, tmp_path):
+    """Wie make_app, aber auf einer eigenen Kopie der Demo-Datenbank (für Tests, die Daten ändern)"""
+    def factory(**env):
+        path = tmp_path / 'crm.db'
+        source = sqlite3.connect(database_uri.removeprefix('sqlite:///'))
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        return make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{path}', **env)
+    return factory
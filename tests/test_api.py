@@ -0,0 +1,122 @@
+"""
+JSON-API mit ETags (crm_app/views/api.py)
+"""
+
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from models import db, Order, Contact
+
+
+@pytest.fixture
+def app(make_writable_app):
+    return make_writable_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.mark.parametrize('url', [
+    '/api/v1/customers?after=100000000000000000000',
+    '/api/v1/customers?after=-1',
+    '/api/v1/customers?after=abc',
+    '/api/v1/orders?customer_id=100000000000000000000',
+    '/api/v1/orders?customer_id=0',
+    '/api/v1/contacts?customer_id=100000000000000000000',
+    '/api/v1/contacts?customer_id=x',
+])
+def test_out_of_range_query_arguments(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+@pytest.mark.parametrize('url', [
+    '/api/v1/customers/100000000000000000000',
+    '/api/v1/orders/100000000000000000000',
+    '/api/v1/contacts/100000000000000000000',
+])
+def test_out_of_range_ids_are_not_found(client, url):
+    assert client.get(url).status_code == 404
+
+
+def test_largest_after_is_an_empty_page(client):
+    response = client.get(f'/api/v1/customers?after={2 ** 63 - 1}')
+    assert response.status_code == 200
+    assert response.get_json() == {'data': [], 'next': None}
+
+
+def test_filtered_list_matches_raw_rows(app, client):
+    response = client.get('/api/v1/orders?customer_id=1&limit=500')
+    assert response.status_code == 200
+    with app.app_context():
+        ids = [order_id for order_id, in db.session.query(Order.id).filter_by(customer_id=1).order_by(Order.id)]
+    assert [order['id'] for order in response.get_json()['data']] == ids
+
+
+def test_unchanged_row_returns_304(client):
+    response = client.get('/api/v1/customers/1')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    
+    response = client.get('/api/v1/customers/1', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.get_data() == b''
+
+
+def test_version_bump_changes_the_etag(app, client):
+    etag = client.get('/api/v1/contacts/1').headers['ETag']
+    with app.app_context():
+        contact = db.session.get(Contact, 1)
+        version = contact.version
+        contact.subject = 'Geänderter Betreff'
+        db.session.commit()
+        assert contact.version == version + 1
+    
+    response = client.get('/api/v1/contacts/1', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['subject'] == 'Geänderter Betreff'
+
+
+def test_order_etag_changes_with_its_customer_stats(app, client):
+    order_etag = client.get('/api/v1/orders/1').headers['ETag']
+    with app.app_context():
+        customer_id = db.session.get(Order, 1).customer_id
+    customer_etag = client.get(f'/api/v1/customers/{customer_id}').headers['ETag']
+    
+    with app.app_context():
+        db.session.get(Order, 1).total_amount += Decimal('1.00')
+        db.session.commit()
+    
+    assert client.get('/api/v1/orders/1', headers={'If-None-Match': order_etag}).status_code == 200
+    # Neue Kennzahlen erhöhen die Version des Kunden
+    response = client.get(f'/api/v1/customers/{customer_id}', headers={'If-None-Match': customer_etag})
+    assert response.status_code == 200
+
+
+def test_page_etag_changes_when_a_row_is_added(app, client):
+    url = '/api/v1/contacts?customer_id=2'
+    response = client.get(url)
+    etag = response.headers['ETag']
+    count = len(response.get_json()['data'])
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    
+    with app.app_context():
+        db.session.add(Contact(customer_id=2, channel='Telefon', contact_time=datetime(2024, 1, 1)))
+        db.session.commit()
+    
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert len(response.get_json()['data']) == count + 1
+    
+    # Kontakte eines anderen Kunden ändern die Seite nicht
+    etag = response.headers['ETag']
+    with app.app_context():
+        db.session.add(Contact(customer_id=3, channel='Telefon', contact_time=datetime(2024, 1, 1)))
+        db.session.commit()
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
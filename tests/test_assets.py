@@ -0,0 +1,64 @@
+"""
+Statische Assets: CDN-Einbindung mit SRI und Prüfung von static/vendor/ (crm_app/assets.py)
+"""
+
+import io
+import os
+import pytest
+from crm_app import assets
+from crm_app.assets import (VENDOR_DIR, VENDOR_FILES, VENDOR_INTEGRITY, sri_hash,
+                            fetch_vendor_files, verify_vendor_files, build_assets)
+
+BOOTSTRAP_CSS = 'bootstrap/bootstrap.min.css'
+
+
+def test_sri_hash():
+    # Bekannter Wert für eine leere Datei
+    assert sri_hash(b'') == 'sha384-OLBgp1GsljhM2TJ+sbHjaiH9txEUvgdDTAzHv2P24donTt6/529l+9Ua0vFImLlb'
+
+
+def test_cdn_links_carry_integrity(make_app):
+    html = make_app(ASSETS_BUNDLED='0').test_client().get('/').get_data(as_text=True)
+    for target, integrity in VENDOR_INTEGRITY.items():
+        assert f'"{VENDOR_FILES[target]}"' in html
+        assert f'integrity="{integrity}" crossorigin="anonymous"' in html
+    assert html.count('crossorigin="anonymous"') == len(assets.CDN_STYLESHEETS) + len(assets.CDN_SCRIPTS)
+
+
+@pytest.fixture
+def static_folder(tmp_path):
+    return str(tmp_path)
+
+
+def write_vendor_file(static_folder, target, data):
+    path = os.path.join(static_folder, VENDOR_DIR, *target.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as stream:
+        stream.write(data)
+
+
+def test_verify_reports_changed_and_missing_files(static_folder):
+    write_vendor_file(static_folder, BOOTSTRAP_CSS, b'body{color:red}')
+    write_vendor_file(static_folder, 'bootstrap-icons/bootstrap-icons.css', b'.bi{}')
+    
+    results = {target: (status, actual) for target, status, actual in verify_vendor_files(static_folder)}
+    assert results[BOOTSTRAP_CSS] == ('abweichend', sri_hash(b'body{color:red}'))
+    assert results['bootstrap-icons/bootstrap-icons.css'] == ('ungeprüft', sri_hash(b'.bi{}'))
+    assert results['bootstrap/bootstrap.bundle.min.js'] == ('fehlt', None)
+
+
+def test_build_refuses_changed_files(static_folder):
+    for target in VENDOR_FILES:
+        write_vendor_file(static_folder, target, b'/* manipuliert */')
+    with pytest.raises(ValueError, match=BOOTSTRAP_CSS):
+        build_assets(static_folder)
+
+
+def test_fetch_discards_files_with_wrong_hash(static_folder, monkeypatch):
+    import urllib.request
+    monkeypatch.setattr(urllib.request, 'urlopen', lambda url, timeout: io.BytesIO(b'/* manipuliert */'))
+    monkeypatch.setattr(assets, 'VENDOR_FILES', {BOOTSTRAP_CSS: VENDOR_FILES[BOOTSTRAP_CSS]})
+    
+    with pytest.raises(ValueError, match='Prüfsumme'):
+        fetch_vendor_files(static_folder)
+    assert not os.path.exists(os.path.join(static_folder, VENDOR_DIR, *BOOTSTRAP_CSS.split('/')))
@@ -0,0 +1,75 @@
+"""
+Bestellungen per API anlegen (POST /orders/bulk)
+"""
+
+import io
+import json
+from decimal import Decimal
+import pytest
+from models import db, Customer, Order
+
+
+@pytest.fixture
+def app(make_writable_app):
+    return make_writable_app()
+
+
+def post_orders(app, orders):
+    return app.test_client().post('/orders/bulk', json={'orders': orders})
+
+
+def test_valid_and_invalid_orders(app):
+    response = post_orders(app, [
+        {'customer_id': 1, 'items': [{'sku': 'PROD-001', 'quantity': 2, 'unit_price': '19.99'}]},
+        {'customer_id': 1, 'items': [{'sku': 'PROD-001', 'quantity': 1, 'unit_price': '1e30'}]},
+        {'customer_id': 10 ** 20, 'items': [{'sku': 'PROD-001', 'quantity': 1}]},
+        {'customer_id': 1, 'items': [{'sku': 'PROD-001', 'quantity': 10 ** 20}]},
+        {'customer_id': 1, 'items': [{'product_id': 10 ** 20, 'quantity': 1}]},
+        {'customer_id': 1, 'items': [{'sku': 'PROD-001', 'quantity': 2 ** 62}]},
+        {'customer_id': 1, 'items': [{'sku': 'PROD-001', 'quantity': 1, 'unit_price': 1e300}]},
+        {'customer_id': 2, 'items': [{'product_id': 3, 'quantity': 1, 'unit_price': 75}]},
+    ])
+    assert response.status_code == 200
+    data = response.get_json()
+    
+    assert data['received'] == 8
+    assert data['inserted'] == 2
+    assert [error['index'] for error in data['errors']] == [1, 2, 3, 4, 5, 6]
+    errors = {error['index']: error['error'] for error in data['errors']}
+    assert 'ungültiger Betrag' in errors[1]
+    assert 'customer_id' in errors[2]
+    assert 'Menge' in errors[3]
+    assert 'product_id' in errors[4]
+    assert 'Höchstbetrag' in errors[5]
+    assert 'ungültiger Betrag' in errors[6]
+    
+    order_ids = data['order_ids']
+    assert order_ids[1:7] == [None] * 6
+    with app.app_context():
+        assert db.session.get(Order, order_ids[0]).total_amount == Decimal('39.98')
+        assert db.session.get(Order, order_ids[7]).total_amount == Decimal('75.00')
+        
+        # Gespeicherte Kundenumsätze nach dem Bulk-Insert
+        for customer_id in (1, 2):
+            revenue = db.session.query(db.func.sum(Order.total_amount))\
+                                .filter(Order.customer_id == customer_id).scalar()
+            assert db.session.get(Customer, customer_id).total_revenue == \
+                   Decimal(revenue).quantize(Decimal('0.01'))
+
+
+@pytest.mark.parametrize('body', [
+    {},
+    {'orders': {'customer_id': 1}},
+    [],
+])
+def test_malformed_body(app, body):
+    response = app.test_client().post('/orders/bulk', json=body)
+    assert response.status_code == 400
+
+
+def test_chunked_upload_without_length(app):
+    body = io.BytesIO(json.dumps({'orders': []}).encode('utf-8'))
+    response = app.test_client().post('/orders/bulk', input_stream=body,
+                                      headers={'Content-Type': 'application/json',
+                                               'Transfer-Encoding': 'chunked'})
+    assert response.status_code == 411
@@ -0,0 +1,117 @@
+"""
+Zeilenzähler (row_counts) und Gesamtanzahlen der Listen (crm_app/counting.py)
+"""
+
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from models import db, Customer, Order, Contact, table_row_count
+from crm_app.counting import counted_paginate
+
+
+@pytest.fixture
+def app(make_writable_app):
+    app = make_writable_app()
+    with app.app_context():
+        yield app
+
+
+def assert_counters_match():
+    # Zähler gegen count(*) direkt auf den Tabellen
+    for model in (Customer, Order, Contact):
+        table = model.__table__
+        count = db.session.execute(db.select(db.func.count()).select_from(table)).scalar()
+        assert table_row_count(table.name)[0] == count
+
+
+def add_customers(last_name, number):
+    db.session.add_all([Customer(first_name=f'Test{index}', last_name=last_name) for index in range(number)])
+    db.session.commit()
+
+
+def test_counters_follow_orm_and_core_writes(app):
+    assert_counters_match()
+    customer_id = Customer.query.order_by(Customer.id).first().id
+    
+    order = Order(customer_id=customer_id, total_amount=Decimal('10.00'), status='Offen')
+    contact = Contact(customer_id=customer_id, channel='Telefon', subject='Test', contact_time=datetime(2024, 1, 1))
+    db.session.add_all([order, contact])
+    db.session.commit()
+    assert_counters_match()
+    
+    customers = Customer.__table__
+    db.session.execute(customers.insert(), [{'first_name': 'Core', 'last_name': f'Zählung{number}'}
+                                            for number in range(4)])
+    db.session.commit()
+    assert_counters_match()
+    
+    db.session.delete(order)
+    db.session.execute(db.delete(Contact.__table__).where(Contact.__table__.c.id == contact.id))
+    db.session.execute(customers.delete().where(customers.c.last_name.like('Zählung%')))
+    db.session.commit()
+    assert_counters_match()
+
+
+def test_version_changes_with_counted_columns_only(app):
+    customer = Customer.query.order_by(Customer.id).first()
+    _, version = table_row_count('customers')
+    
+    customer.created_at = datetime(2020, 1, 1)
+    db.session.commit()
+    assert table_row_count('customers')[1] == version
+    
+    customer.last_name = 'Umbenannt'
+    db.session.commit()
+    assert table_row_count('customers')[1] > version
+    
+    _, version = table_row_count('customers')
+    add_customers('Neu', 1)
+    assert table_row_count('customers')[1] > version
+
+
+def test_unfiltered_total_is_exact_after_inserts(app):
+    client = app.test_client()
+    count = db.session.query(db.func.count(Customer.id)).scalar()
+    assert f'{count} Kunden gesamt' in client.get('/customers/').get_data(as_text=True)
+    
+    add_customers('Nachtrag', 3)
+    count = db.session.query(db.func.count(Customer.id)).scalar()
+    assert f'{count} Kunden gesamt' in client.get('/customers/').get_data(as_text=True)
+    assert counted_paginate(Customer.query, 'customers', per_page=5).total == count
+
+
+def test_filtered_total_is_exact_after_inserts(app):
+    def paginate():
+        query = Customer.query.filter(Customer.last_name == 'Zählprobe').order_by(Customer.id)
+        return counted_paginate(query, 'customers', ('Zählprobe', ''), per_page=2)
+    
+    add_customers('Zählprobe', 5)
+    pagination = paginate()
+    assert (pagination.total, pagination.total_is_estimate) == (5, False)
+    
+    # Neue Datenversion: der gecachte Wert 5 darf nicht mehr verwendet werden
+    add_customers('Zählprobe', 2)
+    pagination = paginate()
+    assert (pagination.total, pagination.total_is_estimate) == (7, False)
+    
+    Customer.query.filter_by(last_name='Zählprobe').first().last_name = 'Andere'
+    db.session.commit()
+    assert paginate().total == 6
+
+
+def test_count_limit_gives_lower_bound(make_writable_app):
+    app = make_writable_app(COUNT_LIMIT='3')
+    with app.app_context():
+        count = db.session.query(db.func.count(Customer.id)).scalar()
+        
+        def paginate(page):
+            query = Customer.query.filter(Customer.id > 0).order_by(Customer.id)
+            return counted_paginate(query, 'customers', 'alle', page=page, per_page=2)
+        
+        first = paginate(1)
+        assert first.total_is_estimate
+        assert first.total == 4 < count
+        
+        # Auf der letzten Seite ist die Anzahl wieder exakt
+        last = paginate((count + 1) // 2)
+        assert (last.total, last.total_is_estimate) == (count, False)
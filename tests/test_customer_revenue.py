@@ -0,0 +1,81 @@
+"""
+Batch-Umsätze (POST /customers/revenue)
+"""
+
+import io
+import json
+import pytest
+from models import db, Order
+from crm_app.views.customers import MAX_BATCH_CUSTOMERS, MAX_BATCH_RANGES, MAX_BATCH_BODY_BYTES
+
+RANGE = {'from': '2000-01-01', 'to': '2099-12-31'}
+
+
+@pytest.fixture
+def client(make_app):
+    return make_app().test_client()
+
+
+def post(client, payload):
+    return client.post('/customers/revenue', json=payload)
+
+
+def test_matrix_matches_order_sums(client):
+    response = post(client, {'customer_ids': [1, 2, 999999], 'ranges': [RANGE]})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['customer_ids'] == [1, 2]
+    
+    with client.application.app_context():
+        for customer_id, row in zip(data['customer_ids'], data['revenue']):
+            total = db.session.query(db.func.coalesce(db.func.sum(Order.total_amount), 0))\
+                              .filter(Order.customer_id == customer_id).scalar()
+            assert row == [pytest.approx(float(total))]
+
+
+@pytest.mark.parametrize('customer_ids', [
+    [10 ** 20],
+    [2 ** 63],
+    [0],
+    [-1],
+    [True],
+    ['1'],
+    [],
+])
+def test_invalid_customer_ids(client, customer_ids):
+    response = post(client, {'customer_ids': customer_ids, 'ranges': [RANGE]})
+    assert response.status_code == 400
+    assert 'customer_ids' in response.get_json()['error']
+
+
+def test_largest_customer_id_is_accepted(client):
+    response = post(client, {'customer_ids': [2 ** 63 - 1], 'ranges': [RANGE]})
+    assert response.status_code == 200
+    assert response.get_json()['customer_ids'] == []
+
+
+@pytest.mark.parametrize('payload', [
+    {'customer_ids': list(range(1, MAX_BATCH_CUSTOMERS + 2)), 'ranges': [RANGE]},
+    {'customer_ids': [1], 'ranges': [RANGE] * (MAX_BATCH_RANGES + 1)},
+    {'customer_ids': [1], 'ranges': [{'from': '2024-12-31', 'to': '2024-01-01'}]},
+    {'customer_ids': [1], 'ranges': [{'from': '31.12.2024', 'to': '2025-01-01'}]},
+    {'customer_ids': [1]},
+])
+def test_limits_and_invalid_ranges(client, payload):
+    assert post(client, payload).status_code == 400
+
+
+def test_body_limits(client):
+    body = json.dumps({'customer_ids': [1], 'ranges': [RANGE], 'padding': 'x' * MAX_BATCH_BODY_BYTES})
+    response = client.post('/customers/revenue', data=body, content_type='application/json')
+    assert response.status_code == 413
+    
+    response = client.post('/customers/revenue', data='[1, 2]', content_type='application/json')
+    assert response.status_code == 400
+
+
+def test_chunked_upload_without_length(client):
+    body = io.BytesIO(json.dumps({'customer_ids': [1], 'ranges': [RANGE]}).encode('utf-8'))
+    response = client.post('/customers/revenue', input_stream=body,
+                           headers={'Content-Type': 'application/json', 'Transfer-Encoding': 'chunked'})
+    assert response.status_code == 411
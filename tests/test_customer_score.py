@@ -0,0 +1,86 @@
+"""
+Gespeicherter Kunden-Score in Liste und Detailansicht
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from models import (db, Customer, Order, Contact, calculate_customer_score, score_customers,
+                    refresh_customer_scores)
+
+
+def test_detail_page_shows_stored_rating(make_app):
+    app = make_app()
+    with app.app_context():
+        customer_id = db.session.query(Customer.id).filter(Customer.score_rating != 'B').limit(1).scalar()
+        # Gespeicherter Stand weicht von der Live-Berechnung ab (wie zwischen zwei recompute-scores-Läufen)
+        db.session.execute(db.update(Customer).where(Customer.id == customer_id)
+                             .values(score=61, score_rating='B', score_label='Gut'))
+        db.session.commit()
+    try:
+        client = app.test_client()
+        listed = client.get('/customers/?rating=B').get_data(as_text=True)
+        assert f'/customers/{customer_id}' in listed
+        
+        html = client.get(f'/customers/{customer_id}').get_data(as_text=True)
+        assert 'B - Gut' in html
+        assert 'Gesamtscore: 61/100 Punkte' in html
+        assert '61/100' in html.split('Kundenbewertung', 1)[1]
+    finally:
+        with app.app_context():
+            refresh_customer_scores([customer_id])
+            db.session.commit()
+
+
+def stored_score(customer_id):
+    db.session.expire_all()
+    customer = db.session.get(Customer, customer_id)
+    return customer.score, customer.score_rating, customer.score_label
+
+
+def recomputed_score(customer_id):
+    """Score direkt aus orders und contacts berechnet, ohne die gespeicherten Kennzahlen"""
+    orders = Order.__table__
+    contacts = Contact.__table__
+    revenue, count = db.session.execute(
+        db.select(db.func.coalesce(db.func.sum(orders.c.total_amount), 0), db.func.count())
+          .where(orders.c.customer_id == customer_id)
+    ).one()
+    last_contact = db.session.execute(
+        db.select(db.func.max(contacts.c.contact_time)).where(contacts.c.customer_id == customer_id)
+    ).scalar()
+    expected = calculate_customer_score(float(revenue), count, last_contact)
+    return expected['score'], expected['rating'], expected['label']
+
+
+def assert_score_matches(customer_id):
+    stored = stored_score(customer_id)
+    assert stored == recomputed_score(customer_id)
+    batch = score_customers([customer_id])[customer_id]
+    assert stored == (batch['score'], batch['rating'], batch['label'])
+    single = db.session.get(Customer, customer_id).get_customer_score()
+    assert stored == (single['score'], single['rating'], single['label'])
+
+
+def test_stored_score_follows_orders_and_contacts(make_writable_app):
+    app = make_writable_app()
+    with app.app_context():
+        customer_id = db.session.query(Customer.id).order_by(Customer.score, Customer.id).limit(1).scalar()
+        assert_score_matches(customer_id)
+        
+        order = Order(customer_id=customer_id, total_amount=Decimal('12500.00'), status='Offen')
+        db.session.add(order)
+        db.session.commit()
+        assert_score_matches(customer_id)
+        
+        db.session.add(Contact(customer_id=customer_id, channel='Telefon', subject='Test',
+                               contact_time=datetime.utcnow().replace(microsecond=0) - timedelta(days=1)))
+        db.session.commit()
+        assert_score_matches(customer_id)
+        
+        order.total_amount = Decimal('50.00')
+        db.session.commit()
+        assert_score_matches(customer_id)
+        
+        db.session.delete(order)
+        db.session.commit()
+        assert_score_matches(customer_id)
@@ -0,0 +1,34 @@
+"""
+Batch-Scoring (score_customers) gegen die Einzelberechnung
+"""
+
+from models import db, Customer, score_customers
+
+
+def test_batch_scores_match_single_customer_scores(make_app):
+    app = make_app()
+    with app.app_context():
+        customers = Customer.query.all()
+        scores = score_customers([customer.id for customer in customers] + [None, 10 ** 9])
+        
+        assert set(scores) == {customer.id for customer in customers}
+        for customer in customers:
+            expected = customer.get_customer_score()
+            assert scores[customer.id] == {key: expected[key] for key in ('score', 'rating', 'label', 'color')}
+
+
+def test_batch_scores_use_one_query(make_app):
+    app = make_app()
+    with app.app_context():
+        customer_ids = [customer_id for customer_id, in db.session.query(Customer.id)]
+        statements = []
+        
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+        
+        db.event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            score_customers(customer_ids)
+        finally:
+            db.event.remove(db.engine, 'before_cursor_execute', record)
+        assert len(statements) == 1
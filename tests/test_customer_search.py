@@ -0,0 +1,64 @@
+"""
+Volltextindex customers_fts und seine Trigger
+"""
+
+import re
+import pytest
+from models import db, Customer, customer_search_subquery
+
+
+@pytest.fixture
+def app(make_writable_app):
+    app = make_writable_app()
+    with app.app_context():
+        yield app
+
+
+def search_ids(search_query):
+    search = customer_search_subquery(search_query)
+    assert search is not None
+    return {customer_id for customer_id, in db.session.execute(db.select(search.c.customer_id))}
+
+
+def scanned_ids(term):
+    """Treffer für ein Wort, direkt aus der customers-Tabelle gesucht"""
+    pattern = re.compile(r'\b' + re.escape(term), re.IGNORECASE)
+    return {customer.id for customer in Customer.query
+            if any(pattern.search(value or '') for value in
+                   (customer.first_name, customer.last_name, customer.email, customer.phone))}
+
+
+def assert_index_in_sync():
+    # Vergleicht den Index mit dem Inhalt von customers
+    db.session.execute(db.text(
+        "INSERT INTO customers_fts(customers_fts, rank) VALUES ('integrity-check', 1)"
+    ))
+
+
+def test_index_follows_insert_update_delete(app):
+    customer = Customer(first_name='Quirin', last_name='Zwetschke', email='qz@example.com')
+    db.session.add(customer)
+    db.session.commit()
+    assert search_ids('zwetsch') == scanned_ids('zwetsch') == {customer.id}
+    assert_index_in_sync()
+    
+    customer.last_name = 'Xanthopoulos'
+    db.session.commit()
+    assert search_ids('zwetsch') == set()
+    assert search_ids('xantho') == scanned_ids('xantho') == {customer.id}
+    assert_index_in_sync()
+    
+    db.session.delete(customer)
+    db.session.commit()
+    assert search_ids('xantho') == set()
+    assert_index_in_sync()
+
+
+def test_index_follows_core_bulk_insert(app):
+    db.session.execute(Customer.__table__.insert(), [
+        {'first_name': 'Yvette', 'last_name': f'Quastenbach{number}'} for number in range(3)
+    ])
+    db.session.commit()
+    assert len(search_ids('quastenbach')) == 3
+    assert search_ids('yvette') == scanned_ids('yvette')
+    assert_index_in_sync()
@@ -0,0 +1,83 @@
+"""
+Denormalisierte Kunden-Kennzahlen (total_revenue, order_count, last_contact_at)
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from models import db, Customer, Order, Contact
+
+
+@pytest.fixture
+def app(make_writable_app):
+    app = make_writable_app()
+    with app.app_context():
+        yield app
+
+
+def recomputed_stats(customer_id):
+    """Kennzahlen direkt aus orders und contacts berechnet"""
+    orders = Order.__table__
+    contacts = Contact.__table__
+    revenue, count = db.session.execute(
+        db.select(db.func.coalesce(db.func.sum(orders.c.total_amount), 0), db.func.count())
+          .where(orders.c.customer_id == customer_id)
+    ).one()
+    last_contact = db.session.execute(
+        db.select(db.func.max(contacts.c.contact_time)).where(contacts.c.customer_id == customer_id)
+    ).scalar()
+    return Decimal(revenue).quantize(Decimal('0.01')), count, last_contact
+
+
+def stored_stats(customer_id):
+    """Gespeicherte Kennzahlen, frisch aus der Datenbank gelesen"""
+    db.session.expire_all()
+    customer = db.session.get(Customer, customer_id)
+    return customer.total_revenue, customer.order_count, customer.last_contact_at
+
+
+def assert_stats_match(*customer_ids):
+    for customer_id in customer_ids:
+        assert stored_stats(customer_id) == recomputed_stats(customer_id)
+
+
+def test_order_amount_edit(app):
+    order = Order.query.order_by(Order.id).first()
+    order.total_amount = order.total_amount + Decimal('123.45')
+    db.session.commit()
+    assert_stats_match(order.customer_id)
+
+
+def test_new_and_deleted_order(app):
+    customer_id = Customer.query.order_by(Customer.id).first().id
+    order = Order(customer_id=customer_id, total_amount=Decimal('99.90'), status='Offen')
+    db.session.add(order)
+    db.session.commit()
+    assert_stats_match(customer_id)
+    
+    db.session.delete(order)
+    db.session.commit()
+    assert_stats_match(customer_id)
+
+
+def test_order_moved_to_other_customer(app):
+    order = Order.query.order_by(Order.id).first()
+    old_customer_id = order.customer_id
+    new_customer_id = Customer.query.filter(Customer.id != old_customer_id).first().id
+    order.customer_id = new_customer_id
+    db.session.commit()
+    assert_stats_match(old_customer_id, new_customer_id)
+
+
+def test_new_and_moved_contact(app):
+    customer_id = Customer.query.order_by(Customer.id).first().id
+    contact = Contact(customer_id=customer_id, channel='Telefon', subject='Test',
+                      contact_time=datetime.utcnow().replace(microsecond=0) + timedelta(days=1))
+    db.session.add(contact)
+    db.session.commit()
+    assert_stats_match(customer_id)
+    
+    other_customer_id = Customer.query.filter(Customer.id != customer_id).first().id
+    contact.customer_id = other_customer_id
+    db.session.commit()
+    assert_stats_match(customer_id, other_customer_id)
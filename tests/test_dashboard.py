@@ -0,0 +1,52 @@
+"""
+Dashboard-Snapshot (crm_app/dashboard.py)
+"""
+
+from decimal import Decimal
+import pytest
+from models import db, Customer, Order
+from crm_app.dashboard import compute_dashboard_data, get_dashboard
+
+
+@pytest.fixture
+def app(make_writable_app):
+    # DASHBOARD_TTL=0: jeder Aufruf berechnet den Snapshot neu
+    app = make_writable_app(DASHBOARD_TTL='0')
+    with app.app_context():
+        yield app
+
+
+def recomputed_totals():
+    orders = Order.__table__
+    revenue, order_count = db.session.execute(
+        db.select(db.func.coalesce(db.func.sum(orders.c.total_amount), 0), db.func.count())
+    ).one()
+    return {
+        'total_revenue': Decimal(revenue).quantize(Decimal('0.01')),
+        'total_orders': order_count,
+        'total_customers': db.session.execute(db.select(db.func.count()).select_from(Customer.__table__)).scalar(),
+    }
+
+
+def dashboard_totals(data):
+    return {name: data[name] for name in ('total_revenue', 'total_orders', 'total_customers')}
+
+
+def test_totals_match_raw_rows(app):
+    assert dashboard_totals(compute_dashboard_data()) == recomputed_totals()
+
+
+def test_totals_after_order_writes(app):
+    customer = Customer.query.order_by(Customer.id).first()
+    order = Order(customer_id=customer.id, total_amount=Decimal('250.00'), status='Offen')
+    db.session.add(order)
+    db.session.commit()
+    assert dashboard_totals(get_dashboard()) == recomputed_totals()
+    
+    order.total_amount = Decimal('12.34')
+    db.session.commit()
+    assert dashboard_totals(get_dashboard()) == recomputed_totals()
+    
+    db.session.delete(order)
+    db.session.commit()
+    assert dashboard_totals(get_dashboard()) == recomputed_totals()
@@ -0,0 +1,79 @@
+"""
+SQLite-Engine-Profil und Commit-Wiederholung (crm_app/database.py)
+"""
+
+import sqlite3
+import threading
+from decimal import Decimal
+import pytest
+from sqlalchemy.exc import OperationalError
+from models import db, Customer, Order
+from crm_app.database import commit_with_retry
+
+
+@pytest.fixture
+def app(make_writable_app):
+    # Kurzes busy_timeout, damit die Sperre nicht schon im Treiber abgewartet wird
+    app = make_writable_app(SQLITE_BUSY_TIMEOUT_MS='10', DB_COMMIT_RETRIES='5',
+                            DB_COMMIT_RETRY_DELAY_MS='20')
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def write_lock(app):
+    """Zweite Verbindung, die die Schreibsperre hält, bis release() aufgerufen wird"""
+    connection = sqlite3.connect(db.engine.url.database, check_same_thread=False)
+    connection.execute('BEGIN IMMEDIATE')
+    released = threading.Event()
+    
+    def release():
+        if not released.is_set():
+            released.set()
+            connection.rollback()
+    
+    yield release
+    release()
+    connection.close()
+
+
+def test_pragmas_on_new_connections(app):
+    with db.engine.connect() as connection:
+        assert connection.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+        assert connection.exec_driver_sql('PRAGMA busy_timeout').scalar() == 10
+
+
+def test_commit_is_retried_until_the_lock_is_released(app, write_lock):
+    customer_id = Customer.query.order_by(Customer.id).first().id
+    attempts = []
+    
+    def apply_changes():
+        attempts.append(1)
+        db.session.add(Order(customer_id=customer_id, total_amount=Decimal('42.00'), status='Offen'))
+    
+    threading.Timer(0.05, write_lock).start()
+    commit_with_retry(apply_changes)
+    
+    assert len(attempts) > 1
+    # Genau eine Bestellung geschrieben, Kennzahlen passend zu den Rohdaten
+    assert Order.query.filter_by(customer_id=customer_id, total_amount=Decimal('42.00')).count() == 1
+    revenue = db.session.query(db.func.sum(Order.total_amount)).filter_by(customer_id=customer_id).scalar()
+    db.session.expire_all()
+    assert db.session.get(Customer, customer_id).total_revenue == Decimal(revenue).quantize(Decimal('0.01'))
+
+
+def test_last_failure_is_raised(app, write_lock):
+    customer = Customer.query.order_by(Customer.id).first()
+    attempts = []
+    
+    def apply_changes():
+        attempts.append(1)
+        customer.phone = '+43 1 999999'
+    
+    with pytest.raises(OperationalError, match='locked'):
+        commit_with_retry(apply_changes, retries=2, delay=0.001)
+    assert len(attempts) == 3
+    
+    write_lock()
+    db.session.expire_all()
+    assert db.session.get(Customer, customer.id).phone != '+43 1 999999'
@@ -0,0 +1,73 @@
+"""
+Fragment-Cache ({% cache %}, crm_app/fragments.py)
+"""
+
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from models import db, Customer, Order, Contact
+
+
+@pytest.fixture
+def app(make_writable_app):
+    return make_writable_app(FRAGMENT_CACHE_SIZE='100', DASHBOARD_TTL='0')
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def detail_page(client, customer_id=1):
+    response = client.get(f'/customers/{customer_id}')
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def test_unchanged_customer_is_served_from_the_cache(app, client):
+    cache = app.extensions['fragment_cache']
+    first = detail_page(client)
+    hits = cache.hits
+    assert detail_page(client) == first
+    # Kopf, Bewertung und Umsatz-Kennzahlen
+    assert cache.hits == hits + 3
+
+
+def test_edit_bumps_the_version_and_rerenders(app, client):
+    detail_page(client)
+    with app.app_context():
+        db.session.get(Customer, 1).phone = '+43 1 2345678'
+        db.session.commit()
+    assert '+43 1 2345678' in detail_page(client)
+
+
+def test_new_order_rerenders_the_revenue(app, client):
+    detail_page(client)
+    with app.app_context():
+        db.session.add(Order(customer_id=1, total_amount=Decimal('1234.56'), status='Offen'))
+        db.session.commit()
+        revenue = db.session.query(db.func.sum(Order.total_amount)).filter_by(customer_id=1).scalar()
+        expected = app.jinja_env.filters['currency'](float(revenue))
+    assert expected in detail_page(client)
+
+
+def test_writes_without_version_bump_stay_cached(app, client):
+    # Vertrag des Caches: nur Änderungen, die version erhöhen, werden sichtbar
+    detail_page(client)
+    with app.app_context():
+        db.session.execute(db.text("UPDATE customers SET phone = '+43 1 0000000' WHERE id = 1"))
+        db.session.commit()
+    # Außerhalb der Fragmente schon sichtbar, im gecachten Kopf noch nicht
+    stale = detail_page(client).count('+43 1 0000000')
+    
+    app.extensions['fragment_cache'].clear()
+    assert detail_page(client).count('+43 1 0000000') == stale + 1
+
+
+def test_dashboard_activity_follows_the_snapshot_generation(app, client):
+    assert client.get('/').status_code == 200
+    with app.app_context():
+        db.session.add(Contact(customer_id=1, channel='Telefon', subject='Rückruf Fragment-Test',
+                               contact_time=datetime.utcnow()))
+        db.session.commit()
+    assert 'Rückruf Fragment-Test' in client.get('/').get_data(as_text=True)
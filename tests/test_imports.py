@@ -0,0 +1,62 @@
+"""
+CSV-Import (crm_app/imports.py, /imports/)
+"""
+
+import io
+from decimal import Decimal
+import pytest
+from models import db, Customer, Order
+from crm_app.imports import import_csv
+
+
+@pytest.fixture
+def app(make_writable_app):
+    app = make_writable_app()
+    with app.app_context():
+        yield app
+
+
+ORDERS_CSV = """customer_id;order_date;status;items
+1;2024-03-01 10:00;Offen;PROD-001:2:19,99|PROD-002:1
+1;2024-03-02;Offen;PROD-001:1:1e30
+100000000000000000000;2024-03-03;Offen;PROD-001:1
+1;2024-03-04;Offen;PROD-001:100000000000000000000
+1;2024-03-05;Offen;PROD-003:9999999
+2;2024-03-06;Offen;PROD-001:1:NaN
+2;2024-03-07;Offen;PROD-001:3:5.00
+"""
+
+
+def test_bad_rows_are_reported_and_the_rest_is_imported(app):
+    orders_before = db.session.query(db.func.count(Order.id)).scalar()
+    result = import_csv('orders', io.StringIO(ORDERS_CSV))
+    
+    assert result.processed == 7
+    assert result.inserted == 2
+    assert [line for line, _ in result.errors] == [3, 4, 5, 6, 7]
+    assert 'ungültiger Betrag' in dict(result.errors)[3]
+    assert 'customer_id' in dict(result.errors)[4]
+    assert 'Menge' in dict(result.errors)[5]
+    assert 'Höchstbetrag' in dict(result.errors)[6]
+    assert db.session.query(db.func.count(Order.id)).scalar() == orders_before + 2
+    
+    imported = {db.session.get(Order, order_id).total_amount for order_id in result.created_ids.values()}
+    assert imported == {Decimal('99.97'), Decimal('15.00')}
+
+
+def test_stats_of_imported_customers_match_raw_rows(app):
+    import_csv('orders', io.StringIO(ORDERS_CSV))
+    
+    for customer_id in (1, 2):
+        revenue = db.session.query(db.func.sum(Order.total_amount)).filter_by(customer_id=customer_id).scalar()
+        customer = db.session.get(Customer, customer_id)
+        assert customer.total_revenue == Decimal(revenue).quantize(Decimal('0.01'))
+
+
+def test_upload_view_reports_bad_rows(app):
+    response = app.test_client().post('/imports/', data={
+        'kind': 'orders',
+        'file': (io.BytesIO(ORDERS_CSV.encode('utf-8')), 'orders.csv'),
+    })
+    assert response.status_code == 200
+    assert '2 von 7 Zeilen importiert, 5 fehlerhaft.' in response.get_data(as_text=True)
@@ -0,0 +1,99 @@
+"""
+Job-Warteschlange: Abholen per Compare-and-Set und Dedupe (crm_app/jobs.py)
+"""
+
+import threading
+import pytest
+from sqlalchemy.exc import IntegrityError
+from models import db, Job
+from crm_app import jobs
+from crm_app.jobs import JobWorker, enqueue, job_handler, _claim_next
+
+
+@job_handler('test-noop', max_attempts=1)
+def noop_job(payload, context):
+    return {'ok': True}
+
+
+@pytest.fixture
+def app(make_writable_app):
+    app = make_writable_app()
+    with app.app_context():
+        yield app
+
+
+def insert_job(**values):
+    jobs_table = Job.__table__
+    with db.engine.begin() as connection:
+        return connection.execute(
+            jobs_table.insert().values(kind='test-noop', **values)
+        ).inserted_primary_key[0]
+
+
+def test_claim_is_compare_and_set(app):
+    job = enqueue('test-noop')
+    first = _claim_next('worker-a')
+    assert first.id == job.id
+    assert (first.status, first.attempts, first.locked_by) == ('running', 1, 'worker-a')
+    # Bereits abgeholt: der zweite Worker geht leer aus
+    assert _claim_next('worker-b') is None
+
+
+def test_parallel_workers_claim_each_job_once(app):
+    job_ids = {enqueue('test-noop').id for _ in range(20)}
+    claimed = []
+    lock = threading.Lock()
+    
+    def work(name):
+        with app.app_context():
+            while True:
+                job = _claim_next(name)
+                if job is None:
+                    return
+                with lock:
+                    claimed.append(job.id)
+    
+    threads = [threading.Thread(target=work, args=(f'worker-{number}',)) for number in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert sorted(claimed) == sorted(job_ids)
+    db.session.expire_all()
+    assert {job.attempts for job in Job.query.filter(Job.id.in_(job_ids))} == {1}
+
+
+def test_enqueue_returns_the_active_job_for_a_dedupe_key(app):
+    first = enqueue('test-noop', dedupe_key='test-dedupe')
+    assert enqueue('test-noop', dedupe_key='test-dedupe').id == first.id
+    
+    # Nach dem Ende darf derselbe Schlüssel erneut eingereiht werden
+    assert JobWorker(app, threads=1).run_next()
+    db.session.expire_all()
+    assert db.session.get(Job, first.id).status == 'done'
+    assert enqueue('test-noop', dedupe_key='test-dedupe').id != first.id
+
+
+def test_dedupe_index_rejects_a_second_active_job(app):
+    insert_job(dedupe_key='test-index', status='queued')
+    with pytest.raises(IntegrityError):
+        insert_job(dedupe_key='test-index', status='running')
+    # Abgeschlossene Jobs fallen nicht unter den Teilindex
+    insert_job(dedupe_key='test-index', status='done')
+    insert_job(dedupe_key='test-index', status='failed')
+
+
+def test_enqueue_race_falls_back_to_the_existing_job(app, monkeypatch):
+    job_id = insert_job(dedupe_key='test-race', status='queued')
+    # Das parallele enqueue() hat zwischen Prüfung und Insert eingereiht
+    lookups = []
+    original = jobs.find_active_job
+    
+    def racing_lookup(dedupe_key):
+        lookups.append(dedupe_key)
+        return None if len(lookups) == 1 else original(dedupe_key)
+    
+    monkeypatch.setattr(jobs, 'find_active_job', racing_lookup)
+    assert enqueue('test-noop', dedupe_key='test-race').id == job_id
+    assert Job.query.filter_by(dedupe_key='test-race').count() == 1
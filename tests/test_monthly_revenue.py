@@ -0,0 +1,83 @@
+"""
+Monatsumsätze pro Kunde (customer_monthly_revenue, customer_revenue_between)
+"""
+
+from collections import defaultdict
+from datetime import datetime, date
+from decimal import Decimal
+import pytest
+from models import db, Customer, Order, CustomerMonthlyRevenue, customer_revenue_between
+
+
+@pytest.fixture
+def app(make_writable_app):
+    app = make_writable_app()
+    with app.app_context():
+        yield app
+
+
+def stored_rollup():
+    db.session.expire_all()
+    return {(row.customer_id, row.month): (row.revenue, row.order_count)
+            for row in CustomerMonthlyRevenue.query}
+
+
+def recomputed_rollup():
+    """Monatsumsätze direkt aus der orders-Tabelle"""
+    totals = defaultdict(lambda: [Decimal('0.00'), 0])
+    for customer_id, order_date, amount in db.session.query(Order.customer_id, Order.order_date,
+                                                            Order.total_amount):
+        total = totals[(customer_id, date(order_date.year, order_date.month, 1))]
+        total[0] += amount
+        total[1] += 1
+    return {key: tuple(value) for key, value in totals.items()}
+
+
+def test_rollup_after_order_date_change(app):
+    order = Order.query.order_by(Order.id).first()
+    order.order_date = datetime(2021, 2, 14, 9, 30)
+    db.session.commit()
+    assert stored_rollup() == recomputed_rollup()
+    
+    # Innerhalb desselben Monats und in einen anderen Monat
+    order.order_date = datetime(2021, 2, 28, 23, 59)
+    db.session.commit()
+    assert stored_rollup() == recomputed_rollup()
+    order.order_date = datetime(2022, 11, 1)
+    db.session.commit()
+    assert stored_rollup() == recomputed_rollup()
+
+
+def test_rollup_after_customer_and_amount_change(app):
+    order = Order.query.order_by(Order.id.desc()).first()
+    order.customer_id = Customer.query.filter(Customer.id != order.customer_id).first().id
+    order.total_amount = Decimal('777.77')
+    db.session.commit()
+    assert stored_rollup() == recomputed_rollup()
+    
+    db.session.delete(order)
+    db.session.commit()
+    assert stored_rollup() == recomputed_rollup()
+
+
+def test_revenue_between_matches_order_sum(app):
+    order = Order.query.order_by(Order.id).first()
+    order.order_date = datetime(2023, 6, 15, 12, 0)
+    db.session.commit()
+    
+    customer_id = order.customer_id
+    ranges = [
+        (None, None),
+        (datetime(2023, 6, 1), datetime(2023, 6, 30, 23, 59)),
+        (datetime(2023, 6, 15, 12, 0), datetime(2023, 6, 15, 12, 0)),
+        (datetime(2023, 6, 15, 12, 1), None),
+        (datetime(2022, 12, 31), datetime(2024, 1, 1, 12, 0)),
+    ]
+    for start, end in ranges:
+        query = db.session.query(db.func.coalesce(db.func.sum(Order.total_amount), 0))\
+                          .filter(Order.customer_id == customer_id)
+        if start is not None:
+            query = query.filter(Order.order_date >= start)
+        if end is not None:
+            query = query.filter(Order.order_date <= end)
+        assert customer_revenue_between(customer_id, start, end) == pytest.approx(float(query.scalar()))
@@ -0,0 +1,64 @@
+"""
+Keyset-Pagination (crm_app/pagination.py)
+"""
+
+from datetime import datetime
+import pytest
+from models import db, Order
+from crm_app.pagination import keyset_paginate, encode_cursor, decode_cursor
+
+
+@pytest.fixture
+def app(make_writable_app):
+    app = make_writable_app()
+    with app.app_context():
+        # Gleiches Datum für einen Großteil der Bestellungen: die id entscheidet
+        orders = Order.__table__
+        db.session.execute(orders.update().where(orders.c.id % 3 != 0)
+                           .values(order_date=datetime(2024, 5, 1, 12, 0)))
+        db.session.commit()
+        yield app
+
+
+def expected_ids():
+    return [order_id for order_id, in db.session.query(Order.id)
+                                      .order_by(Order.order_date.desc(), Order.id.desc())]
+
+
+def paginate(cursor=None):
+    return keyset_paginate(Order.query, Order.order_date, Order.id, cursor=cursor, per_page=7)
+
+
+def test_forward_pages_with_ties(app):
+    pages = [paginate()]
+    while pages[-1].next_cursor:
+        pages.append(paginate(pages[-1].next_cursor))
+    
+    ids = [order.id for page in pages for order in page.items]
+    assert ids == expected_ids()
+    assert not pages[0].has_prev
+    assert all(page.has_prev for page in pages[1:])
+
+
+def test_backward_pages_with_ties(app):
+    forward = [paginate()]
+    while forward[-1].next_cursor:
+        forward.append(paginate(forward[-1].next_cursor))
+    
+    # Von der vorletzten Seite rückwärts: dieselben Seiten wie vorwärts
+    page = forward[-2]
+    for previous in reversed(forward[:-2]):
+        page = paginate(page.prev_cursor)
+        assert [order.id for order in page.items] == [order.id for order in previous.items]
+    
+    # Vor der ersten Seite: volle erste Seite statt einer kurzen
+    assert [order.id for order in paginate(forward[1].prev_cursor).items] == \
+           [order.id for order in forward[0].items]
+
+
+def test_cursor_roundtrip_and_invalid_tokens():
+    value = datetime(2024, 5, 1, 12, 0, 30, 123456)
+    assert decode_cursor(encode_cursor('next', value, 42)) == ('next', value, 42)
+    
+    for token in (None, '', 'kein-token', encode_cursor('seitwärts', value, 1)):
+        assert decode_cursor(token) is None
@@ -0,0 +1,68 @@
+"""
+SQL-Profiler pro Request (crm_app/profiling.py)
+"""
+
+import re
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from models import db, Customer
+from crm_app.profiling import NPlusOneError
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(SQL_PROFILER='1', SQL_N_PLUS_ONE_THRESHOLD='5')
+
+
+def test_response_headers(app):
+    response = app.test_client().get('/customers/')
+    assert response.status_code == 200
+    
+    queries = int(response.headers['X-DB-Queries'])
+    assert queries > 0
+    match = re.fullmatch(r'db;dur=(\d+\.\d{2});desc="(\d+) queries"', response.headers['Server-Timing'])
+    assert match is not None
+    assert int(match.group(2)) == queries
+
+
+def test_repeated_statement_raises_in_tests(app):
+    @app.route('/_test/n-plus-one')
+    def n_plus_one():
+        # Ein Statement pro Kunde statt einer Abfrage für alle
+        customer_ids = [customer_id for customer_id, in db.session.query(Customer.id).limit(10)]
+        for customer_id in customer_ids:
+            db.session.query(Customer.email).filter(Customer.id == customer_id).scalar()
+        return str(len(customer_ids))
+    
+    with pytest.raises(NPlusOneError, match='n_plus_one'):
+        app.test_client().get('/_test/n-plus-one')
+
+
+def test_below_threshold_passes(app):
+    @app.route('/_test/few-queries')
+    def few_queries():
+        for customer_id in (1, 2, 3):
+            db.session.query(Customer.email).filter(Customer.id == customer_id).scalar()
+        return 'ok'
+    
+    response = app.test_client().get('/_test/few-queries')
+    assert response.status_code == 200
+    assert response.headers['X-DB-Queries'] == '3'
+
+
+def test_failed_statement_leaves_no_state_on_connection(app):
+    @app.route('/_test/failing-query')
+    def failing_query():
+        with pytest.raises(OperationalError):
+            db.session.execute(text('SELECT * FROM no_such_table'))
+        db.session.rollback()
+        connection = db.session.connection()
+        leftovers = [key for key in connection.info if key.startswith('sql_profile')]
+        db.session.execute(text('SELECT 1'))
+        return ','.join(leftovers)
+    
+    response = app.test_client().get('/_test/failing-query')
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == ''
+    assert response.headers['X-DB-Queries'] == '1'
@@ -0,0 +1,60 @@
+"""
+Ungeplantes Lazy Loading (SQLALCHEMY_RAISELOAD, models._apply_default_raiseload)
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from models import db, Order
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(SQLALCHEMY_RAISELOAD='1')
+
+
+@pytest.fixture
+def statements(app):
+    """Alle SQL-Statements, die während des Tests ausgeführt werden"""
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+@pytest.mark.parametrize('url', [
+    '/orders/',
+    '/orders/?q=an',
+    '/contacts/',
+    '/contacts/?channel=Telefon',
+    '/orders/1',
+])
+def test_templates_render_without_lazy_loads(app, url):
+    response = app.test_client().get(url)
+    assert response.status_code == 200
+
+
+def test_lazy_load_raises_in_request(app):
+    with app.test_request_context('/'):
+        order = Order.query.first()
+        with pytest.raises(InvalidRequestError):
+            order.customer
+
+
+def test_item_count_is_loaded_with_the_orders(app, statements):
+    response = app.test_client().get('/orders/')
+    assert response.status_code == 200
+    
+    html = response.get_data(as_text=True)
+    rows = html.count('class="btn btn-sm btn-primary"')
+    assert rows >= 10
+    # Die Positionsanzahl ist eine Unterabfrage der Bestellabfrage, keine eigene Abfrage pro Zeile
+    assert len(statements) < 5
+    assert not [sql for sql in statements if sql.lstrip().upper().startswith('SELECT COUNT(ORDER_ITEMS')]
+    assert any('order_items' in sql and 'FROM orders' in sql for sql in statements)
@@ -0,0 +1,83 @@
+"""
+Stammdaten-Cache für Produkte und Benutzer (crm_app/reference.py)
+"""
+
+from decimal import Decimal
+import pytest
+from models import db, Product, User
+from crm_app.reference import get_reference_data, invalidate_reference_data
+
+
+@pytest.fixture
+def app(make_writable_app):
+    # Ohne TTL: nur die Invalidierung lädt neu
+    app = make_writable_app(REFERENCE_CACHE_TTL='0')
+    with app.app_context():
+        yield app
+
+
+def cached():
+    snapshot = get_reference_data()
+    return ({(p.id, p.sku, p.name, p.base_price) for p in snapshot.products},
+            {(u.id, u.name, u.email, u.role) for u in snapshot.users})
+
+
+def recomputed():
+    """Stand direkt aus den Tabellen products und users"""
+    return ({tuple(row) for row in db.session.execute(
+                db.select(Product.id, Product.sku, Product.name, Product.base_price))},
+            {tuple(row) for row in db.session.execute(
+                db.select(User.id, User.name, User.email, User.role))})
+
+
+def test_orm_writes_invalidate_the_snapshot(app):
+    assert cached() == recomputed()
+    
+    product = Product(sku='TEST-001', name='Testprodukt', base_price=Decimal('12.50'))
+    db.session.add(product)
+    db.session.commit()
+    assert cached() == recomputed()
+    assert get_reference_data().products_by_sku['TEST-001'].base_price == Decimal('12.50')
+    
+    product.base_price = Decimal('13.00')
+    db.session.commit()
+    assert cached() == recomputed()
+    
+    user = User(name='Test Benutzer', email='test.benutzer@example.com', role='Lehrer')
+    db.session.add(user)
+    db.session.commit()
+    assert cached() == recomputed()
+    
+    db.session.delete(product)
+    db.session.commit()
+    assert cached() == recomputed()
+    assert 'TEST-001' not in get_reference_data().products_by_sku
+
+
+def test_core_writes_need_explicit_invalidation(app):
+    version = get_reference_data().version
+    db.session.execute(Product.__table__.insert().values(sku='TEST-CORE', name='Core-Produkt',
+                                                         base_price=Decimal('1.00')))
+    db.session.commit()
+    
+    # Am ORM vorbei: der Snapshot bleibt, bis er verworfen wird (oder die TTL abläuft)
+    assert 'TEST-CORE' not in get_reference_data().products_by_sku
+    invalidate_reference_data()
+    assert get_reference_data().version == version + 1
+    assert cached() == recomputed()
+
+
+def test_rollback_keeps_the_snapshot_consistent(app):
+    db.session.add(Product(sku='TEST-ROLLBACK', name='Verworfen', base_price=Decimal('1.00')))
+    db.session.flush()
+    db.session.rollback()
+    assert cached() == recomputed()
+
+
+def test_order_form_lists_new_product(app):
+    db.session.add(Product(sku='TEST-FORM', name='Formularprodukt', base_price=Decimal('5.00')))
+    db.session.commit()
+    
+    response = app.test_client().get('/orders/new')
+    assert response.status_code == 200
+    assert 'Formularprodukt' in response.get_data(as_text=True)
@@ -0,0 +1,91 @@
+"""
+Lese-/Schreib-Trennung mit Lese-Replica (crm_app/replica.py)
+
+Die Replica ist eine eigene Kopie der Demo-Datenbank, in der Kunde 1 anders
+heißt; so ist an jeder Antwort erkennbar, welche Datenbank gelesen wurde.
+"""
+
+import sqlite3
+import pytest
+from models import db, Customer
+from crm_app.replica import REPLICA_BIND_KEY, use_read_replica
+
+
+@pytest.fixture
+def replica_uri(database_uri, tmp_path):
+    path = tmp_path / 'replica.db'
+    source = sqlite3.connect(database_uri.removeprefix('sqlite:///'))
+    target = sqlite3.connect(path)
+    try:
+        source.backup(target)
+        target.execute("UPDATE customers SET last_name = 'Replikat' WHERE id = 1")
+        target.commit()
+    finally:
+        source.close()
+        target.close()
+    return f'sqlite:///{path}'
+
+
+@pytest.fixture
+def make_replica_app(make_writable_app, replica_uri):
+    def factory(**env):
+        return make_writable_app(SQLALCHEMY_REPLICA_URI=replica_uri, **env)
+    return factory
+
+
+def last_name_in(app, bind_key=None):
+    with app.app_context():
+        engine = db.engines[bind_key]
+        with engine.connect() as connection:
+            return connection.exec_driver_sql('SELECT last_name FROM customers WHERE id = 1').scalar()
+
+
+def test_get_pages_read_from_the_replica(make_replica_app):
+    app = make_replica_app()
+    client = app.test_client()
+    assert 'Replikat' in client.get('/customers/1').get_data(as_text=True)
+    assert 'Replikat' in client.get('/api/v1/customers/1').get_data(as_text=True)
+
+
+def test_writes_go_to_the_primary_and_pin_the_user(make_replica_app):
+    app = make_replica_app(REPLICA_PIN_SECONDS='60')
+    client = app.test_client()
+    response = client.post('/customers/1/edit', data={
+        'first_name': 'Anna', 'last_name': 'Primär', 'email': '', 'phone': '',
+    })
+    assert response.status_code == 302
+    assert last_name_in(app) == 'Primär'
+    assert last_name_in(app, REPLICA_BIND_KEY) == 'Replikat'
+    
+    # Nach dem eigenen Schreibzugriff liest derselbe Benutzer von der primären Datenbank
+    assert 'Primär' in client.get('/customers/1').get_data(as_text=True)
+    # Ein anderer Benutzer liest weiter von der (veralteten) Replica
+    assert 'Replikat' in app.test_client().get('/customers/1').get_data(as_text=True)
+
+
+def test_session_switches_to_primary_after_flush(make_replica_app):
+    app = make_replica_app()
+    with app.test_request_context('/'):
+        use_read_replica()
+        assert db.session.get(Customer, 1).last_name == 'Replikat'
+        
+        customer = db.session.get(Customer, 2)
+        customer.phone = '+43 1 555'
+        db.session.flush()
+        db.session.expire_all()
+        assert db.session.get(Customer, 1).last_name != 'Replikat'
+        db.session.rollback()
+
+
+def test_textual_sql_uses_the_primary(make_replica_app):
+    app = make_replica_app()
+    with app.test_request_context('/'):
+        use_read_replica()
+        last_name = db.session.execute(db.text('SELECT last_name FROM customers WHERE id = 1')).scalar()
+        assert last_name != 'Replikat'
+
+
+def test_without_replica_uri_everything_reads_the_primary(make_writable_app):
+    app = make_writable_app()
+    assert REPLICA_BIND_KEY not in app.config.get('SQLALCHEMY_BINDS', {})
+    assert 'Replikat' not in app.test_client().get('/customers/1').get_data(as_text=True)